@@ -0,0 +1,281 @@
+"""Measures the scalability of EQI processing schemes on synthetic campaigns with a no-op model
+
+For every processing scheme and campaign size, a synthetic campaign is processed by a fresh Executor
+and the following metrics of the client (the process of Executor) are collected:
+
+- preparation time: the preparation of descriptions of tasks (and indexes of iterative tasks),
+- submission time: the requests submitting the tasks to the manager,
+- execution time: the wait for the completion of tasks,
+- sync time: the collection of statuses of tasks and the update of the campaign,
+- per-task and per-run overhead: the total of the above divided by the number of submitted tasks and runs,
+  the latter is comparable between the iterative and non-iterative schemes,
+- peak memory: the peak of memory allocated by Python (measured by tracemalloc in a separate repetition),
+- launch latency and overhead ratio (QCG-PilotJob Manager only): the mean time from the allocation of cores
+  for a task to the start of its process, and the ratio of this overhead to the total core-time of allocations,
+  measured on the side of the manager's service (see `Executor.get_tasks_stats_summary`).
+
+By default the tasks are completed instantly by a null manager, thus only the overhead of EQI is measured
+and large campaigns can be benchmarked on a workstation. With `--backend local_pool` the tasks are executed
+by the local pool of processes, and with `--backend qcgpj` by QCG-PilotJob LocalManager started for every
+repetition, with the no-op model (the encoded input is the output of the run). Since QCG-PilotJob Manager
+is much slower than the other backends, its default campaign sizes are smaller.
+The results are written in the JSON (or CSV, if the name of the output file ends with `.csv`) format.
+
+Usage: python3 benchmarks/processing_schemes.py [--runs N [N ...]] [--schemes SCHEME [SCHEME ...]]
+                                                [--backend {null,local_pool,qcgpj}] [--cores N] [--chunk-size N]
+                                                [--repeat N] [--no-memory] [--output FILE]
+"""
+
+import os
+import csv
+import json
+import time
+import shutil
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+from datetime import datetime
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import Executor, Task, TaskType, TaskRequirements, ProcessingScheme
+from eqi.core.pool_manager import PoolManager, SUCCEED
+
+# The encoded input of a run is a valid output of the run, thus the model doesn't need to do anything
+TEMPLATE = 'y\n$x\n'
+OUTPUT_FILE = 'output.csv'
+NO_OP_MODEL = 'true'
+
+METRICS = ['scheme', 'runs', 'tasks', 'failed_runs', 'preparation_time', 'submission_time', 'execution_time',
+           'sync_time', 'per_task_overhead', 'per_run_overhead', 'launch_latency', 'overhead_ratio', 'peak_memory_mb']
+
+# The default sizes of campaigns, the start-up and scheduling of tasks by QCG-PilotJob Manager limit its sizes
+DEFAULT_RUNS = {'null': [100, 1000, 10000, 100000], 'local_pool': [100, 1000, 10000, 100000], 'qcgpj': [10, 100]}
+
+
+class NullManager:
+    """Completes the submitted tasks instantly, implementing the part of QCG-PilotJob Manager API used by Executor
+
+    The descriptions of tasks are serialised to JSON, as they are by QCG-PilotJob client in the submit request.
+    """
+
+    def __init__(self, cores):
+        self._cores = cores
+        self._jobs = {}
+
+    def submit(self, jobs):
+        descriptions = jobs.ordered_jobs()
+        json.dumps({'request': 'submit', 'jobs': descriptions})
+        for description in descriptions:
+            iteration = description.get('iteration')
+            self._jobs[description['name']] = range(iteration.get('start', 0), iteration['stop']) \
+                if iteration else None
+        return [description['name'] for description in descriptions]
+
+    def list(self):
+        return {name: {'status': SUCCEED} for name in self._jobs}
+
+    def info(self, names, withChilds=False):
+        jobs_info = {}
+        for name in names:
+            data = {'status': SUCCEED}
+            if withChilds and self._jobs[name] is not None:
+                data['childs'] = [{'iteration': it, 'state': SUCCEED} for it in self._jobs[name]]
+            jobs_info[name] = {'status': 0, 'data': data}
+        return {'jobs': jobs_info}
+
+    def wait4all(self):
+        pass
+
+    def resources(self):
+        return {'total_nodes': 1, 'total_cores': self._cores, 'used_cores': 0, 'free_cores': self._cores}
+
+    def finish(self):
+        pass
+
+
+class TimedManager:
+    """Measures the time spent by Executor in the requests to the wrapped manager"""
+
+    def __init__(self, manager):
+        self._manager = manager
+        self.tasks = 0
+        self.submission_time = 0.0
+        self.wait_start = None
+        self.wait_end = None
+
+    def submit(self, jobs):
+        start = time.perf_counter()
+        names = self._manager.submit(jobs)
+        self.submission_time += time.perf_counter() - start
+        self.tasks += len(names)
+        return names
+
+    def wait4all(self):
+        self.wait_start = time.perf_counter()
+        self._manager.wait4all()
+        self.wait_end = time.perf_counter()
+
+    def __getattr__(self, name):
+        return getattr(self._manager, name)
+
+
+def create_campaign(work_dir, runs):
+    template = os.path.join(work_dir, 'no_op.template')
+    with open(template, 'w') as f:
+        f.write(TEMPLATE)
+
+    campaign = uq.Campaign(name='benchmark', work_dir=work_dir)
+    campaign.add_app(name='no_op',
+                     params={'x': {'type': 'float', 'min': 0.0, 'max': 1.0, 'default': 0.5}},
+                     encoder=uq.encoders.GenericEncoder(template_fname=template, delimiter='$',
+                                                        target_filename=OUTPUT_FILE),
+                     decoder=uq.decoders.SimpleCSV(target_filename=OUTPUT_FILE, output_columns=['y']))
+    campaign.set_sampler(uq.sampling.RandomSampler(vary={'x': cp.Uniform(0.0, 1.0)}, max_num=runs))
+    campaign.draw_samples()
+    return campaign
+
+
+def process(campaign, scheme, args):
+    """Processes all runs of the campaign in the scheme, returns the metrics"""
+
+    # the runs processed by the previous repetition are processed again, from the scratch
+    run_ids = list(campaign.campaign_db.run_ids())
+    campaign.campaign_db.set_run_statuses(run_ids, uq.constants.Status.NEW)
+    runs_dir = os.path.join(campaign.campaign_dir, 'runs')
+    for entry in os.listdir(runs_dir) if os.path.isdir(runs_dir) else []:
+        shutil.rmtree(os.path.join(runs_dir, entry))
+
+    executor = Executor(campaign, resume=False, log_level='warning')
+    if args.backend == 'qcgpj':
+        executor.create_manager(resources=str(args.cores), log_level='warning')
+        manager = TimedManager(executor._qcgpjm)
+    elif args.backend == 'local_pool':
+        manager = TimedManager(PoolManager(executor._eqi_dir, args.cores))
+    else:
+        manager = TimedManager(NullManager(args.cores))
+    executor.set_manager(manager)
+
+    executor.add_task(Task(TaskType.ENCODING, TaskRequirements(cores=1), chunk_size=args.chunk_size))
+    executor.add_task(Task(TaskType.EXECUTION, TaskRequirements(cores=1), application=NO_OP_MODEL))
+    executor.add_task(Task(TaskType.ENCODING_AND_EXECUTION, TaskRequirements(cores=1), application=NO_OP_MODEL))
+    executor.add_task(Task(TaskType.DECODING, TaskRequirements(cores=1), chunk_size=args.chunk_size))
+
+    start = time.perf_counter()
+    executor.run(processing_scheme=scheme)
+    end = time.perf_counter()
+    executor.terminate_manager()
+
+    # the overhead on the side of the service is known only from the reports of QCG-PilotJob Manager
+    launch_latency = overhead_ratio = None
+    if args.backend == 'qcgpj':
+        summary = executor.get_tasks_stats_summary()
+        launch_latency = summary['overhead_core_hours'] * 3600 / max(summary['tasks'], 1)
+        overhead_ratio = summary['overhead_ratio']
+
+    submission = manager.wait_start - start
+    total = end - start
+    return {
+        'scheme': scheme.name,
+        'runs': len(run_ids),
+        'tasks': manager.tasks,
+        'failed_runs': len(executor.get_failed_runs()),
+        'preparation_time': submission - manager.submission_time,
+        'submission_time': manager.submission_time,
+        'execution_time': manager.wait_end - manager.wait_start,
+        'sync_time': end - manager.wait_end,
+        'per_task_overhead': total / max(manager.tasks, 1),
+        'per_run_overhead': total / max(len(run_ids), 1),
+        'launch_latency': launch_latency,
+        'overhead_ratio': overhead_ratio,
+    }
+
+
+def measure(campaign, scheme, args):
+    results = [process(campaign, scheme, args) for _ in range(args.repeat)]
+    # the best time of each phase is reported
+    result = {metric: min(result[metric] for result in results)
+              if metric.endswith(('_time', '_overhead', '_latency', '_ratio')) and results[-1][metric] is not None
+              else results[-1][metric] for metric in results[-1]}
+
+    result['peak_memory_mb'] = None
+    if not args.no_memory:
+        tracemalloc.start()
+        try:
+            process(campaign, scheme, args)
+            result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+
+def write_results(output_file, environment, results):
+    if output_file.endswith('.csv'):
+        with open(output_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=METRICS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(output_file, 'w') as f:
+            json.dump({'environment': environment, 'results': results}, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, nargs='+',
+                        help='the sizes of campaigns, by default 10^2 to 10^5 runs (10 and 100 runs for qcgpj)')
+    parser.add_argument('--schemes', nargs='+', default=[scheme.name for scheme in ProcessingScheme],
+                        choices=[scheme.name for scheme in ProcessingScheme], help='the processing schemes')
+    parser.add_argument('--backend', choices=list(DEFAULT_RUNS), default='null',
+                        help='the engine completing the tasks: instantly (null), the local pool of processes '
+                             'or QCG-PilotJob LocalManager')
+    parser.add_argument('--cores', type=int, default=os.cpu_count(), help='the number of cores of the manager')
+    parser.add_argument('--chunk-size', type=int, default=100,
+                        help='the number of runs encoded and decoded by a single (chunked) task')
+    parser.add_argument('--repeat', type=int, default=1, help='the number of repetitions, the best time is shown')
+    parser.add_argument('--no-memory', action='store_true', help='skip the measurement of peak memory')
+    parser.add_argument('--output', help='the output file (JSON, or CSV if the name ends with .csv)')
+    args = parser.parse_args()
+    if args.runs is None:
+        args.runs = DEFAULT_RUNS[args.backend]
+
+    # the Executor prints to stdout, the results are printed once all measurements are completed
+    logging.getLogger('easyvvuq').setLevel(logging.WARNING)
+    environment = {'date': datetime.now().isoformat(), 'host': socket.gethostname(),
+                   'python': platform.python_version(), 'easyvvuq': uq.__version__,
+                   'backend': args.backend, 'cores': args.cores, 'chunk_size': args.chunk_size,
+                   'repeat': args.repeat}
+
+    results = []
+    for runs in args.runs:
+        with tempfile.TemporaryDirectory() as work_dir:
+            start = time.perf_counter()
+            campaign = create_campaign(work_dir, runs)
+            print(f"Campaign with {runs} runs created in {time.perf_counter() - start:.1f} s")
+            for scheme in args.schemes:
+                results.append(measure(campaign, ProcessingScheme[scheme], args))
+
+    print(f"{'scheme':36} {'runs':>7} {'tasks':>7} {'prepare':>8} {'submit':>8} {'execute':>8} "
+          f"{'sync':>8} {'ms/task':>8} {'ms/run':>8} {'latency':>8} {'ovh %':>8} {'MiB':>8}")
+    for result in results:
+        memory = f"{result['peak_memory_mb']:8.1f}" if result['peak_memory_mb'] is not None else f"{'-':>8}"
+        latency = f"{result['launch_latency']:8.3f}" if result['launch_latency'] is not None else f"{'-':>8}"
+        overhead = f"{100 * result['overhead_ratio']:8.1f}" if result['overhead_ratio'] is not None else f"{'-':>8}"
+        print(f"{result['scheme']:36} {result['runs']:7} {result['tasks']:7} {result['preparation_time']:8.3f} "
+              f"{result['submission_time']:8.3f} {result['execution_time']:8.3f} {result['sync_time']:8.3f} "
+              f"{1000 * result['per_task_overhead']:8.3f} {1000 * result['per_run_overhead']:8.3f} "
+              f"{latency} {overhead} {memory}")
+
+    if args.output:
+        write_results(args.output, environment, results)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Compares the MODERATE resume cleanup of the EQI resume engine with the previous shell implementation
+
+A run directory with a given number of files is created and its snapshot is stored. Next, a part of the
+files and directories is added, as if they were created by a killed task, and the cleanup restoring the
+initial state of the run directory is timed (including the read of the snapshot). The sizes of snapshots
+are compared as well.
+
+Usage: python3 benchmarks/resume_cleanup.py [--files N] [--new-files N] [--new-dirs N] [--repeat N]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import subprocess
+
+from glob import glob
+
+from eqi.resume_engine import scan_run_dir, store_snapshot, load_snapshot, moderate_clean
+
+# The cleanup as implemented in eqi_utils.sh before the introduction of the resume engine
+SHELL_CLEANUP = r'''
+snapshot_file=$1
+base_dir=$2
+
+declare -A locked_files
+while IFS= read -r line; do
+    locked_files["$line"]=1
+done < "$snapshot_file"
+
+find "$base_dir" -print0 |
+    while IFS= read -r -d '' line; do
+        if [[ ${locked_files["$line"]} != 1 ]]; then
+            if [[ -f "$line" ]]; then
+                rm "$line"
+            elif [[ -d "$line" ]]; then
+                rm -r "$line"
+            fi
+        fi
+    done
+'''
+
+
+def populate(base_dir, files, prefix, files_per_dir=100):
+    for i in range(files):
+        sub_dir = os.path.join(base_dir, f'{prefix}dir_{i // files_per_dir}')
+        os.makedirs(sub_dir, exist_ok=True)
+        with open(os.path.join(sub_dir, f'{prefix}file_{i}'), 'w') as f:
+            f.write('x')
+
+
+def prepare(work_dir, args):
+    base_dir = os.path.join(work_dir, 'run')
+    populate(base_dir, args.files, 'old_')
+
+    shell_snapshot = os.path.join(work_dir, 'snapshot.find')
+    with open(shell_snapshot, 'w') as f:
+        subprocess.run(['find', base_dir], stdout=f, check=True)
+    store_snapshot(work_dir, 'Run_1', 'execute', scan_run_dir(base_dir))
+
+    # the files created by the killed task, both in the existing and in the new directories
+    for i in range(args.new_files):
+        with open(os.path.join(base_dir, f'old_dir_{i % max(args.files // 100, 1)}', f'new_file_{i}'), 'w') as f:
+            f.write('x')
+    populate(base_dir, args.new_dirs * 10, 'new_', files_per_dir=10)
+
+    return base_dir, shell_snapshot
+
+
+def measure(args, cleanup):
+    times = []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as work_dir:
+            base_dir, shell_snapshot = prepare(work_dir, args)
+            start = time.perf_counter()
+            cleanup(work_dir, base_dir, shell_snapshot)
+            times.append(time.perf_counter() - start)
+            assert len(os.listdir(base_dir)) == max(args.files // 100, 1)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000, help='the number of files in the run directory')
+    parser.add_argument('--new-files', type=int, default=1000, help='the number of new files in existing dirs')
+    parser.add_argument('--new-dirs', type=int, default=50, help='the number of new dirs (with 10 files each)')
+    parser.add_argument('--repeat', type=int, default=3, help='the number of repetitions, the best time is shown')
+    args = parser.parse_args()
+
+    def shell(_, base_dir, shell_snapshot):
+        subprocess.run(['bash', '-c', SHELL_CLEANUP, 'cleanup', shell_snapshot, base_dir], check=True)
+
+    def engine(work_dir, base_dir, _):
+        moderate_clean(load_snapshot(work_dir, 'Run_1', 'execute'), base_dir)
+
+    print(f"Run dir with {args.files} files, {args.new_files} new files and {args.new_dirs} new dirs")
+    shell_time = measure(args, shell)
+    engine_time = measure(args, engine)
+    print(f"shell:  {shell_time:.3f} s")
+    print(f"engine: {engine_time:.3f} s ({shell_time / engine_time:.1f}x faster)")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        prepare(work_dir, args)
+        shell_size = os.path.getsize(os.path.join(work_dir, 'snapshot.find'))
+        engine_size = sum(os.path.getsize(path) for path in glob(os.path.join(work_dir, '.eqi_snapshots_*')))
+    print(f"snapshot size: shell {shell_size} B, engine {engine_size} B "
+          f"({100 * engine_size / shell_size:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
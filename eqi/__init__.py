@@ -3,10 +3,13 @@ from .core.task import Task, TaskType
 from .core.processing_scheme import ProcessingScheme
 from .core.task_requirements import TaskRequirements, Resources
 from .core.resume import ResumeLevel
-from .utils.state_keeper import StateKeeper
+from .core.backend import Backend
+from .utils.state_keeper import StateKeeper, FsyncPolicy
+from .utils.phase_timer import Profiler
+from .utils.runtime_history import RuntimeHistory, CostModelMethod
 
 __all__ = ['Executor', 'Task', 'TaskType', 'ProcessingScheme', 'TaskRequirements', 'Resources', 'ResumeLevel',
-           'StateKeeper']
+           'StateKeeper', 'FsyncPolicy', 'Backend', 'Profiler', 'RuntimeHistory', 'CostModelMethod']
 
 from ._version import get_versions
 __version__ = get_versions()['version']
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class Backend(Enum):
+    """ Specifies the engine used by Executor for the execution of tasks
+    """
+
+    QCGPJ = \
+        "Tasks are executed by QCG-PilotJob Manager, which supports multi-node allocations, " \
+        "all execution models of tasks and the resume of not completed workflows of tasks"
+    LOCAL_POOL = \
+        "Tasks are executed by a lightweight pool of processes on a local machine. " \
+        "It starts almost immediately, thus it is suited for workstations and small numbers of short tasks"
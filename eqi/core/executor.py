@@ -1,19 +1,54 @@
+import hashlib
+import json
 import logging
 import os
+import shutil
+import time
 
 from enum import Enum
+from itertools import islice
 from os.path import exists, dirname, abspath
 from tempfile import mkdtemp
 from glob import glob
 
 import easyvvuq as uq
+from easyvvuq.db.sql import RunTable
 from qcg.pilotjob.api.job import Jobs
-from qcg.pilotjob.api.manager import LocalManager
+from qcg.pilotjob.api.manager import LocalManager, Manager
 
+from eqi.core.backend import Backend
+from eqi.core.pool_manager import PoolManager
 from eqi.core.task import TaskType
+from eqi.core.task_requirements import TaskRequirements
+from eqi.core.task_fitting import fit_task_cores, select_processing_scheme, get_exact_cores
 from eqi.core.tasks_manager import TasksManager
 from eqi.core.processing_scheme import ProcessingScheme
-from eqi.utils.state_keeper import StateKeeper
+from eqi.core.resume import ResumeJournal
+from eqi.encoder_service import ENCODER_STOP_FILE
+from eqi.external_decoder import DECODED_DIR
+from eqi.utils.state_keeper import StateKeeper, FsyncPolicy
+from eqi.utils.run_states import STATE_COMPLETED, STATE_FAILED
+from eqi.utils.run_index import RunIndex
+from eqi.utils.runtimes import read_runtimes
+from eqi.utils.runtime_history import RuntimeHistory, CostModelMethod
+from eqi.utils.tasks_stats import read_tasks_stats, summarise_tasks_stats, get_total_cores
+from eqi.utils.env_snapshot import capture_config_environment, get_environment_size, write_environment_script
+from eqi.utils.phase_timer import PhaseTimer, Profiler
+
+# Default interval (in seconds) of polling QCG-PJ Manager for statuses of tasks in the streaming mode
+DEFAULT_POLL_INTERVAL = 5
+
+# Default minimal interval (in seconds) between writes of the EQI state file, coalescing the progress updates
+DEFAULT_STATE_WRITE_INTERVAL = 10
+
+# Default number of tasks submitted to QCG-PJ Manager in a single request
+DEFAULT_SUBMIT_BATCH_SIZE = 10000
+
+# The file (in the EQI directory) mapping the duplicated runs to their representatives
+DUPLICATES_FILE = 'duplicates.json'
+
+# The script (in the EQI directory) exporting the environment of the config file captured for tasks
+CONFIG_ENV_FILE = '.eqi_config_env'
 
 
 class Executor:
@@ -24,13 +59,30 @@ class Executor:
 
     """
 
-    def __init__(self, campaign, config_file=None, resume=True, log_level='info'):
+    def __init__(self, campaign, config_file=None, resume=True, log_level='info',
+                 state_fsync_policy=FsyncPolicy.FILE, state_write_interval=DEFAULT_STATE_WRITE_INTERVAL,
+                 track_run_states=False, config_snapshot=False, profilers=None, runtime_history=None):
+        if not isinstance(state_write_interval, (int, float)) or state_write_interval < 0:
+            raise ValueError("The value of 'state_write_interval' parameter should be a non-negative number")
+
         self._qcgpjm = None
         self._campaign = campaign
         self._eqi_dir = "."
         self._config_file = None
         self._resume = False
         self._tasks_manager = None
+        self._failed_runs = []
+        self._not_decoded_runs = []
+        self._duplicates = None
+        self._deduplication_report = None
+        self._state_fsync_policy = state_fsync_policy
+        self._state_write_interval = state_write_interval
+        self._track_run_states = track_run_states
+        self._profilers = Profiler.from_environment() if profilers is None else list(profilers)
+        self._phase_timer = PhaseTimer(self._profilers)
+        self._runtime_history = RuntimeHistory(runtime_history) if isinstance(runtime_history, str) \
+            else runtime_history
+        self._run_costs = None
 
         print("EQI initialisation for the campaign: " + self._campaign.campaign_dir)
 
@@ -46,7 +98,18 @@ class Executor:
             self.logger.debug("EQI config file for tasks (from environment variable): "
                               + self._config_file)
 
-        self._tasks_manager = TasksManager(self._campaign, self._eqi_dir, self._config_file)
+        config_env_file = None
+        if self._config_file and config_snapshot:
+            try:
+                config_env = capture_config_environment(self._config_file)
+                config_env_file = abspath(f'{self._eqi_dir}/{CONFIG_ENV_FILE}')
+                write_environment_script(config_env, config_env_file)
+                self.logger.info(f"Environment of the EQI config file captured for tasks: {len(config_env)} "
+                                 f"variables ({get_environment_size(config_env)} B)")
+            except RuntimeError as e:
+                self.logger.warning(f"{e}. The config file will be sourced by every task")
+
+        self._tasks_manager = TasksManager(self._campaign, self._eqi_dir, self._config_file, config_env_file)
 
         """
         Parameters
@@ -62,6 +125,26 @@ class Executor:
             this parameter should be set to False.
         log_level : str, optional
             Logging level for EQI.
+        state_fsync_policy : FsyncPolicy, optional
+            The durability of writes of the EQI state file, used to resume the workflow.
+        state_write_interval : float, optional
+            The minimal interval (in seconds) between writes of the EQI state file. The progress updates made
+            within the interval (e.g. at every poll of `run_streaming`) are coalesced, while the changes needed
+            to resume the workflow (the submission and completion of tasks) are always written immediately.
+        track_run_states : bool, optional
+            If True, the states of processing of individual runs are kept in an indexed table,
+            see `get_run_states`.
+        config_snapshot : bool, optional
+            If True, the config file is sourced once, by the Executor, and the environment variables set by it
+            are stored in the EQI directory and set by QCG-PilotJob tasks instead of sourcing the config file.
+            By default the config file is sourced by every task.
+        profilers : list of Profiler, optional
+            The profilers capturing the phases of processing, see `get_phase_timings`. By default the profilers
+            are taken from the EQI_PROFILE environment variable (comma-separated names, e.g. `cprofile,tracemalloc`).
+        runtime_history : str or RuntimeHistory, optional
+            The path of the runtime history file (or the history), shared by the campaigns of an application.
+            If specified, the wall times of executed runs are recorded in the history at the sync of the campaign,
+            and the cost model fitted to it is used by `advise_task_fitting` and `get_eta`, see `get_cost_model`.
         """
 
     def create_manager(self,
@@ -69,7 +152,8 @@ class Executor:
                        reserve_core=False,
                        enable_rt_stats=False,
                        wrapper_rt_stats=None,
-                       log_level='info'):
+                       log_level='info',
+                       backend=Backend.QCGPJ):
         """Creates new QCG-PilotJob Manager and sets is as the Executor's engine.
 
         Parameters
@@ -90,6 +174,10 @@ class Executor:
             The path to the QCG-PilotJob Manager tasks wrapper program used for collection of statistics
         log_level : str, optional
             Logging level for QCG-PilotJob Manager (for both service and client part).
+        backend : Backend, optional
+            The engine for execution of tasks. If set to `Backend.LOCAL_POOL`, a lightweight pool
+            of processes on a local machine is created instead of QCG-PilotJob Manager. In this case only
+            the number of cores is taken from `resources`, and the remaining parameters are ignored.
 
         Returns
         -------
@@ -97,6 +185,17 @@ class Executor:
 
         """
 
+        if backend == Backend.LOCAL_POOL:
+            self._qcgpjm = PoolManager(self._eqi_dir, _get_total_cores(resources))
+            self.logger.info(f"Local pool manager created - available resources: "
+                             f"{self._qcgpjm.resources()}")
+
+            # the tasks of a resumed workflow are not restored, but the runs completed previously are synced
+            if self._resume:
+                self.logger.info("Syncing the runs completed in resumed workflow")
+                self.__wait_and_sync()
+            return
+
         # ---- QCG PILOT JOB INITIALISATION ---
 
         # Establish logging levels
@@ -177,7 +276,80 @@ class Executor:
         self._tasks_manager.add_task(task)
         self.logger.debug(f"New task added: {task.get_name()}")
 
-    def run(self, processing_scheme=ProcessingScheme.SAMPLE_ORIENTED):
+    def advise_task_fitting(self, runtime_estimates=None, apply=False):
+        """ Proposes the requirements of tasks and the processing scheme that minimise idle cores
+
+        The proposal is based on the resources of the QCG-PilotJob Manager (thus it has to be created or set
+        before), the number of runs of the campaign and the registered tasks. The numbers of cores of
+        the EXECUTION and ENCODING_AND_EXECUTION tasks with the exact requirements for cores are fitted
+        to the allocation, assuming that the application scales linearly within the range from the half
+        to the double of the declared number of cores. The requirements of the remaining tasks are not changed.
+
+        Parameters
+        ----------
+        runtime_estimates : dict, optional
+            the estimated times (in seconds) of processing of a single run by the tasks
+            (with the declared requirements), keyed by the names of tasks (by default the names of tasks are
+            their types). If not given for the EXECUTION task, the mean wall time of executions recorded
+            in the EQI directory (e.g. of the resumed workflow) is used, or, if there are none, the mean wall time
+            of the campaign's runs predicted from the runtime history
+        apply : bool, optional
+            if True, the proposed requirements are set for the tasks
+
+        Returns
+        -------
+        dict
+            the `total_cores` of the allocation, the number of `runs`, the proposed `processing_scheme`
+            and the proposals for `tasks` (keyed by names): the `declared_cores`, the proposed `cores`
+            and `requirements`, and the predicted number of `waves` of tasks, `idle_cores` in a full wave,
+            `utilisation` of the allocation and `makespan` (if the runtime of the task is estimated)
+        """
+        total_cores = self._qcgpjm.resources()['total_cores']
+        run_ids = self._list_run_ids()
+        runs = len(run_ids)
+
+        tasks = self._tasks_manager.get_tasks()
+        runtime_estimates = dict(runtime_estimates or {})
+        for task in tasks:
+            if task.get_type() == TaskType.EXECUTION and task.get_name() not in runtime_estimates:
+                runtime = self._estimate_execution_runtime(run_ids)
+                if runtime is not None:
+                    runtime_estimates[task.get_name()] = runtime
+
+        # the estimates of the types of tasks, for the selection of the processing scheme
+        type_estimates = {task.get_type(): runtime_estimates.get(task.get_name()) for task in tasks}
+
+        proposals = {}
+        execution_cores = 1
+        for task in tasks:
+            declared_cores = get_exact_cores(task.get_requirements())
+            if task.get_type() not in (TaskType.EXECUTION, TaskType.ENCODING_AND_EXECUTION) or not declared_cores:
+                continue
+
+            fit = fit_task_cores(total_cores, declared_cores, runs, runtime_estimates.get(task.get_name()))
+            fit['requirements'] = TaskRequirements(cores=fit.pop('resources'))
+            fit['declared_cores'] = declared_cores
+            proposals[task.get_name()] = fit
+            if task.get_type() == TaskType.EXECUTION:
+                execution_cores = fit['cores']
+            if apply:
+                task.set_requirements(proposals[task.get_name()]['requirements'])
+
+        processing_scheme = select_processing_scheme(
+            set(type_estimates), runs, execution_cores,
+            type_estimates.get(TaskType.ENCODING), type_estimates.get(TaskType.EXECUTION))
+
+        for name, proposal in proposals.items():
+            self.logger.info(f"Task {name}: {proposal['declared_cores']} cores declared, {proposal['cores']} "
+                             f"proposed, {proposal['idle_cores']} idle of {total_cores} cores")
+        self.logger.info(f"Processing scheme proposed: {processing_scheme.name if processing_scheme else None}")
+
+        return {'total_cores': total_cores, 'runs': runs, 'processing_scheme': processing_scheme,
+                'tasks': proposals}
+
+    def run(self, processing_scheme=ProcessingScheme.SAMPLE_ORIENTED, on_run_completed=None,
+            poll_interval=DEFAULT_POLL_INTERVAL, submit_batch_size=DEFAULT_SUBMIT_BATCH_SIZE, deduplicate=False,
+            runtime_predictor=None):
         """ Executes demanding parts of EasyVVUQ campaign with QCG-PilotJob
 
         A user may choose the preferred execution scheme for the given scenario.
@@ -186,14 +358,263 @@ class Executor:
         ----------
         processing_scheme: ProcessingScheme
             Tasks processing scheme
+        on_run_completed: callable, optional
+            If specified, the campaign is synced incrementally while the tasks complete,
+            and the callable is invoked with the id of each successfully processed run
+            (the run is already marked as ENCODED in the campaign)
+        poll_interval: float, optional
+            The interval (in seconds) of polling QCG-PilotJob Manager for statuses of tasks,
+            used only together with `on_run_completed`
+        submit_batch_size: int, optional
+            The maximal number of tasks submitted to QCG-PilotJob Manager in a single request
+        deduplicate: bool, optional
+            If True, only a single representative of the runs with identical parameters
+            (and thus identical encoded inputs) is processed, and its run directory is copied
+            to the duplicates, see `get_deduplication_report`
+        runtime_predictor: callable, optional
+            If specified, the runs are submitted in the order of their predicted runtimes, the longest first,
+            so the allocation is not left waiting for a single expensive run at the end. The callable takes
+            the dict of parameters of a run and returns its predicted runtime (or any comparable cost),
+            the runs for which it returns None are submitted last. The cost model fitted to the runtime history
+            (see `get_cost_model`) may be used
 
         Returns
         -------
         None
         """
         # ---- EXECUTION ---
-        self._submit_jobs(processing_scheme)
-        self.__wait_and_sync()
+        self._phase_timer = PhaseTimer(self._profilers)
+        self._run_costs = None
+        self._submit_jobs(processing_scheme, submit_batch_size, deduplicate, runtime_predictor)
+
+        if on_run_completed:
+            for run_id in self.__stream_and_sync(poll_interval):
+                on_run_completed(run_id)
+        else:
+            self.__wait_and_sync()
+
+        self._report_phase_timings()
+
+    def run_streaming(self, processing_scheme=ProcessingScheme.SAMPLE_ORIENTED,
+                      poll_interval=DEFAULT_POLL_INTERVAL, submit_batch_size=DEFAULT_SUBMIT_BATCH_SIZE,
+                      deduplicate=False, runtime_predictor=None):
+        """ Executes demanding parts of EasyVVUQ campaign with QCG-PilotJob
+        and yields the runs as soon as their processing is completed
+
+        The campaign is synced incrementally, thus the yielded runs are already marked as ENCODED
+        and they may be collated while the remaining tasks are still executed.
+
+        Parameters
+        ----------
+        processing_scheme: ProcessingScheme
+            Tasks processing scheme
+        poll_interval: float, optional
+            The interval (in seconds) of polling QCG-PilotJob Manager for statuses of tasks
+        submit_batch_size: int, optional
+            The maximal number of tasks submitted to QCG-PilotJob Manager in a single request
+        deduplicate: bool, optional
+            If True, only a single representative of the runs with identical parameters is processed,
+            and the duplicates are yielded together with it
+        runtime_predictor: callable, optional
+            If specified, the runs are submitted in the order of their predicted runtimes, the longest first,
+            see `run`
+
+        Yields
+        ------
+        str
+            the id of successfully processed run
+        """
+        self._phase_timer = PhaseTimer(self._profilers)
+        self._run_costs = None
+        self._submit_jobs(processing_scheme, submit_batch_size, deduplicate, runtime_predictor)
+        yield from self.__stream_and_sync(poll_interval)
+
+        self._report_phase_timings()
+
+    def get_failed_runs(self):
+        """ Returns the runs for which the processing by QCG-PilotJob tasks failed
+
+        Returns
+        -------
+        list of str
+            the ids of failed runs, the status of these runs in the campaign is not changed
+        """
+        return self._failed_runs
+
+    def get_not_decoded_runs(self):
+        """ Returns the runs processed successfully, but not decoded by the DECODING tasks
+
+        In the processing schemes with parallel decoding, a DECODING task is not started if the processing
+        of any run of its chunk failed, thus the remaining runs of the chunk are not decoded.
+
+        Returns
+        -------
+        list of str
+            the ids of runs, which remain ENCODED in the campaign and should be decoded with `collate()`
+        """
+        return self._not_decoded_runs
+
+    def get_deduplication_report(self):
+        """ Returns the summary of deduplication of runs with identical parameters
+
+        The saved core-hours are estimated with the wall times of executions of the representative runs,
+        recorded by the tasks, and the number of cores required by the executing task.
+
+        Returns
+        -------
+        dict or None
+            the numbers of `unique_runs` (processed) and `duplicate_runs` (copied from the representatives),
+            and the `saved_core_hours`, None if the runs have not been deduplicated
+        """
+        return self._deduplication_report
+
+    def get_run_states(self):
+        """ Returns the table of states of processing of individual runs, updated with the records
+        of tasks appended since the previous update
+
+        Returns
+        -------
+        RunStateTable or None
+            the table, None if the Executor doesn't track the states of runs (see `track_run_states`)
+        """
+        run_states = self._state_keeper.run_states
+        if run_states:
+            run_states.update()
+        return run_states
+
+    def get_phase_timings(self):
+        """ Returns the wall times of phases of processing of the last run
+
+        The phases are: `prepare` (the listing of runs and the preparation of descriptions of tasks),
+        `submit` (the requests submitting the tasks), `wait` (the wait for the completion of tasks),
+        `collect` (the collection of statuses of tasks) and `sync` (the update of the campaign).
+        If the Executor was created with profilers, every phase is profiled with cProfile
+        (the statistics are stored in the `profile_<PHASE>.prof` files of the EQI directory)
+        and/or the peak of memory allocated during the phase is traced with tracemalloc.
+
+        Returns
+        -------
+        dict(str, dict)
+            for every phase, the total `time` in seconds, the number of `calls` (a phase is entered, e.g.,
+            for every submitted batch of tasks), and the `peak_memory` in bytes (None if not traced)
+        """
+        return self._phase_timer.get_timings()
+
+    def get_cost_model(self, method=CostModelMethod.NEAREST, **kwargs):
+        """ Returns the model of the cost of runs of the campaign's application, fitted to the runtime history
+
+        The model predicts the cost of a run (in core-seconds) from its parameters and it may be passed
+        as the `runtime_predictor` of `run()`, so the runs expected to be the longest are submitted first.
+
+        Parameters
+        ----------
+        method : CostModelMethod, optional
+            the method of prediction, by default the mean cost of the nearest recorded runs
+        kwargs
+            the additional parameters of the model, see `RuntimeHistory.fit`
+
+        Returns
+        -------
+        CostModel or None
+            the model, None if the Executor doesn't record the runtime history (see `runtime_history`)
+        """
+        if not self._runtime_history:
+            return None
+        return self._runtime_history.fit(self._campaign._active_app_name, method, **kwargs)
+
+    def get_eta(self):
+        """ Estimates the time remaining to the completion of execution of the campaign's runs
+
+        The cost of every run, not yet marked as processed in the campaign nor executed successfully,
+        is predicted with the cost model fitted to the runtime history (the runs whose cost is not predicted
+        are assumed to cost the mean of the predicted ones). The remaining time is the total cost
+        divided by the number of cores of the allocation, thus it assumes that the allocation is fully used
+        and the runs being executed are counted as not started.
+
+        Returns
+        -------
+        dict or None
+            the number of `remaining_runs`, their predicted cost in `core_seconds` and the `eta` in seconds,
+            None if the Executor doesn't record the runtime history or the cost of no run is predicted
+        """
+        if not self._runtime_history:
+            return None
+
+        if self._run_costs is None:
+            model = self.get_cost_model()
+            runs_params = self._query_runs_params(self._list_run_ids())
+            self._run_costs = {run_id: model(params) for run_id, params in runs_params.items()}
+
+        predicted = [cost for cost in self._run_costs.values() if cost is not None]
+        if not predicted:
+            return None
+        mean_cost = sum(predicted) / len(predicted)
+
+        run_states = self.get_run_states()
+        state = self._state_keeper.get_from_state_file()
+        if run_states and 'processing_scheme' in state and 'completed' not in state:
+            # the submitted runs are registered in the table, which is queried without scanning the journals
+            remaining = run_states.get_not_completed_runs(_get_final_phase(self._get_processing_scheme()))
+        else:
+            # the runs restored from the result cache are executed too
+            executed = read_runtimes(self._eqi_dir, include_cached=True)
+            duplicates = self._get_duplicates().get('duplicates', {})
+            remaining = [run_id for run_id in self._campaign.campaign_db.run_ids(
+                             status=uq.constants.Status.NEW, sampler=self._campaign._active_sampler_id,
+                             app_id=self._campaign._active_app['id'])
+                         if run_id not in executed and run_id not in duplicates]
+
+        core_seconds = sum(mean_cost if self._run_costs.get(run_id) is None else self._run_costs[run_id]
+                           for run_id in remaining)
+        total_cores = self._qcgpjm.resources()['total_cores']
+        return {'remaining_runs': len(remaining), 'core_seconds': core_seconds, 'eta': core_seconds / total_cores}
+
+    def get_tasks_stats(self, output_file=None):
+        """ Returns the statistics of tasks executed by QCG-PilotJob Manager
+
+        The statistics are read from the reports of QCG-PilotJob Manager in the EQI directory. The real start
+        and finish times of processes are available if the Manager was created with `enable_rt_stats`.
+        The tasks executed by the local pool of processes (`Backend.LOCAL_POOL`) are not reported.
+
+        Parameters
+        ----------
+        output_file : str, optional
+            if given, the statistics are exported to this file, in the Parquet format if its extension
+            is `.parquet` (requires pyarrow or fastparquet), in the CSV format otherwise
+
+        Returns
+        -------
+        pandas.DataFrame
+            a row for every executed task or iteration, with the phase of processing, the queue wait,
+            the launch latency and the runtime (in seconds), and the node placement,
+            see `eqi.utils.tasks_stats.read_tasks_stats`
+        """
+        stats = read_tasks_stats(self._eqi_dir)
+
+        if output_file:
+            if output_file.endswith('.parquet'):
+                stats.to_parquet(output_file, index=False)
+            else:
+                stats.to_csv(output_file, index=False)
+            self.logger.info(f"Statistics of {len(stats)} tasks exported to {output_file}")
+
+        return stats
+
+    def get_tasks_stats_summary(self):
+        """ Returns the summary of the useful work of tasks versus the overhead of their scheduling
+        for the processing scheme of the last run
+
+        Returns
+        -------
+        dict
+            the `processing_scheme`, the number of `tasks`, the `makespan`, the `useful_core_hours`,
+            `overhead_core_hours` (the launch latency of allocated cores), the `overhead_ratio`,
+            the `utilisation` of the allocation, and the statistics of `phases`,
+            see `eqi.utils.tasks_stats.summarise_tasks_stats`
+        """
+        summary = summarise_tasks_stats(read_tasks_stats(self._eqi_dir), get_total_cores(self._eqi_dir))
+        summary['processing_scheme'] = self._state_keeper.get_from_state_file().get('processing_scheme')
+        return summary
 
     def print_resources_info(self):
         """ Displays resources assigned to QCG-PilotJob Manager
@@ -201,11 +622,15 @@ class Executor:
         print("Available resources:\n%s\n" % str(self._qcgpjm.resources()))
 
     def terminate_manager(self):
-        """ Terminates QCG-PilotJob Manager
+        """ Terminates QCG-PilotJob Manager and the encoder services started by tasks
         """
 
         self._qcgpjm.finish()
 
+        if self._tasks_manager.uses_encoder_service():
+            # the services on all nodes check the stop file in the shared EQI directory
+            open(f'{self._eqi_dir}/{ENCODER_STOP_FILE}', 'w').close()
+
     def _setup_eqi_logging(self, log_level):
         log_level = log_level.upper()
 
@@ -255,12 +680,17 @@ class Executor:
                 resume_dir = eqi_dirs[0]    # we get the first eqi-* dir, TODO: get specific one
                 print("Existing EQI directory found: ", resume_dir)
                 self._eqi_dir = resume_dir
-                self._state_keeper = StateKeeper(self._eqi_dir)
+                self._state_keeper = StateKeeper(self._eqi_dir, self._state_fsync_policy, self._state_write_interval,
+                                                 run_states=self._track_run_states)
                 self._state_keeper.setup(self._campaign)
                 _dict = self._state_keeper.get_from_state_file()
                 if 'submitted' in _dict and 'completed' not in _dict:
                     print("EQI resuming in dir: " + self._eqi_dir)
                     self._resume = True
+                    # the resumed tasks read the journal records of the interrupted workflow
+                    ResumeJournal(self._eqi_dir).write_cutoff()
+                    if exists(f'{self._eqi_dir}/{ENCODER_STOP_FILE}'):
+                        os.remove(f'{self._eqi_dir}/{ENCODER_STOP_FILE}')
                 else:
                     print("The EQI not in the submitted state - can't resume")
             else:
@@ -270,113 +700,573 @@ class Executor:
         if self._resume is False:
             self._eqi_dir = mkdtemp(None, ".eqi-", self._campaign.campaign_dir)
             print("EQI starting in dir: " + self._eqi_dir)
-            self._state_keeper = StateKeeper(self._eqi_dir)
+            self._state_keeper = StateKeeper(self._eqi_dir, self._state_fsync_policy, self._state_write_interval,
+                                             run_states=self._track_run_states)
             self._state_keeper.setup(self._campaign)
 
-    def _submit_jobs(self, processing_scheme):
+    def _submit_jobs(self, processing_scheme, batch_size=DEFAULT_SUBMIT_BATCH_SIZE, deduplicate=False,
+                     runtime_predictor=None):
+
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("The value of 'submit_batch_size' parameter should be a positive integer")
 
         self.logger.info("Starting submission of tasks to QCG-PilotJob Manager "
                          "in a processing scheme: " + processing_scheme.name)
 
+        with self._phase_timer.phase('prepare'):
+            # The runs are enumerated once, and the same list is used for preparation of all tasks
+            if deduplicate:
+                run_ids = self._deduplicate_runs(processing_scheme)
+            else:
+                run_ids = self._list_run_ids()
+                self._duplicates = {}
+                if exists(f'{self._eqi_dir}/{DUPLICATES_FILE}'):
+                    os.remove(f'{self._eqi_dir}/{DUPLICATES_FILE}')
+            self.logger.debug(f"{len(run_ids)} runs to process")
+
+            runs_params = {}
+            if runtime_predictor or self._tasks_manager.has_run_requirements():
+                runs_params = self._query_runs_params(run_ids)
+
+            # the tasks are submitted (and thus scheduled by QCG-PJ Manager) in the order of runs
+            if runtime_predictor:
+                run_ids = self._order_by_runtime(run_ids, runs_params, runtime_predictor)
+
+            if self._state_keeper.run_states:
+                self._state_keeper.run_states.register(run_ids, _get_final_phase(processing_scheme))
+
+            # the tasks read only the journal records of the previous workflows
+            ResumeJournal(self._eqi_dir).write_cutoff()
+
+            if self._tasks_manager.has_run_requirements():
+                if processing_scheme.is_iterative():
+                    self.logger.warning("The requirements per run are not applied in the iterative processing "
+                                        "schemes, all iterations use the requirements of tasks")
+                    self._tasks_manager.set_runs_params({})
+                else:
+                    self._tasks_manager.set_runs_params(runs_params)
+
         if processing_scheme.is_iterative():
-            jobs = self._prepare_iterative_jobs(processing_scheme)
+            tasks = self._prepare_iterative_jobs(processing_scheme, run_ids)
         else:
-            jobs = self._prepare_separate_jobs(processing_scheme)
-
-        if jobs and jobs.job_names():
-            self._qcgpjm.submit(jobs)
-            self.logger.info("Tasks submitted")
+            tasks = self._prepare_separate_jobs(processing_scheme, run_ids)
+        tasks = self._phase_timer.timed_iter(tasks, 'prepare')
+
+        # The tasks are prepared lazily and submitted in batches, so the memory usage is bounded
+        # and QCG-PJ Manager starts the execution of the first tasks while the next ones are prepared.
+        # The tasks are generated after their dependencies, thus they are always submitted later.
+        submitted = 0
+        for batch in _split_into_chunks(tasks, batch_size):
+            jobs = Jobs()
+            for task in batch:
+                jobs.add_std(task)
+            with self._phase_timer.phase('submit'):
+                self._qcgpjm.submit(jobs)
+            submitted += len(batch)
+            self.logger.debug(f"{submitted} tasks submitted so far")
+
+        self._state_keeper.write_to_state_file({'processing_scheme': processing_scheme.name})
+        if submitted:
+            self.logger.info(f"Tasks submitted: {submitted}")
+            self._report_eta(logging.INFO)
             # Store information to the state file that the jobs has been already submitted
             self._state_keeper.write_to_state_file({'submitted': True})
         else:
             self.logger.error("Tasks not submitted")
             # Store information to the state file that the jobs has been already submitted
             self._state_keeper.write_to_state_file({'submitted': False})
+        self._state_keeper.flush()
 
-    def _prepare_separate_jobs(self, processing_scheme):
-
-        sampler = self._campaign._active_sampler_id
-
-        jobs = Jobs()
+    def _prepare_separate_jobs(self, processing_scheme, run_ids):
+        """Generates the separate tasks for the runs"""
 
         if processing_scheme == ProcessingScheme.SAMPLE_ORIENTED_CONDENSED:
-            for run in self._campaign.list_runs(sampler):
-                jobs.add_std(self._tasks_manager.get_task(TaskType.ENCODING_AND_EXECUTION, key=run[0]))
+            for run_id in run_ids:
+                yield self._tasks_manager.get_task(TaskType.ENCODING_AND_EXECUTION, key=run_id)
 
         elif processing_scheme == ProcessingScheme.SAMPLE_ORIENTED:
-            for run in self._campaign.list_runs(sampler):
-                t1 = self._tasks_manager.get_task(TaskType.ENCODING, key=run[0])
-                t2 = self._tasks_manager.get_task(
-                    TaskType.EXECUTION, key=run[0], after=(t1['name'],))
-                jobs.add_std(t1)
-                jobs.add_std(t2)
+            yield from self._prepare_sample_oriented_jobs(run_ids)
+
+        elif processing_scheme == ProcessingScheme.SAMPLE_ORIENTED_DECODING:
+            chunk_size = self._tasks_manager.get_chunk_size(TaskType.DECODING)
+            for chunk in _split_into_chunks(run_ids, chunk_size):
+                exec_names = []
+                yield from self._prepare_sample_oriented_jobs(chunk, exec_names)
+                yield self._tasks_manager.get_task(
+                    TaskType.DECODING, key=','.join(chunk), after=tuple(exec_names))
 
         elif processing_scheme == ProcessingScheme.STEP_ORIENTED:
+            chunk_size = self._tasks_manager.get_chunk_size(TaskType.ENCODING)
             wait_list = []
-            for run in self._campaign.list_runs(sampler):
-                t = self._tasks_manager.get_task(TaskType.ENCODING, key=run[0])
-                jobs.add_std(t)
+            for chunk in _split_into_chunks(run_ids, chunk_size):
+                t = self._tasks_manager.get_task(TaskType.ENCODING, key=','.join(chunk))
                 wait_list.append(t['name'])
+                yield t
 
-            i = 0
-            for run in self._campaign.list_runs(sampler):
-                jobs.add_std(self._tasks_manager.get_task(
-                    TaskType.EXECUTION, key=run[0], after=(wait_list[i],)))
-                i += 1
+            for i, chunk in enumerate(_split_into_chunks(run_ids, chunk_size)):
+                for run_id in chunk:
+                    yield self._tasks_manager.get_task(TaskType.EXECUTION, key=run_id, after=(wait_list[i],))
 
         elif processing_scheme == ProcessingScheme.EXEC_ONLY:
-            for run in self._campaign.list_runs(sampler):
-                jobs.add_std(self._tasks_manager.get_task(TaskType.EXECUTION, key=run[0]))
+            for run_id in run_ids:
+                yield self._tasks_manager.get_task(TaskType.EXECUTION, key=run_id)
+
+    def _prepare_sample_oriented_jobs(self, run_ids, exec_names=None):
+        """Generates encoding (in chunks) and execution tasks for the runs,
+        the names of execution tasks are appended to `exec_names` if it is given"""
+
+        chunk_size = self._tasks_manager.get_chunk_size(TaskType.ENCODING)
+        for chunk in _split_into_chunks(run_ids, chunk_size):
+            t1 = self._tasks_manager.get_task(TaskType.ENCODING, key=','.join(chunk))
+            yield t1
+            for run_id in chunk:
+                t2 = self._tasks_manager.get_task(TaskType.EXECUTION, key=run_id, after=(t1['name'],))
+                if exec_names is not None:
+                    exec_names.append(t2['name'])
+                yield t2
+
+    def _prepare_iterative_jobs(self, processing_scheme, run_ids):
+        """Generates the iterative tasks processing the runs"""
+
+        if not run_ids:
+            return
+
+        # The iterations of tasks are mapped to runs by the index files, so any set of runs can be processed
+        if processing_scheme == ProcessingScheme.STEP_ORIENTED_ITERATIVE:
+            t1 = self._tasks_manager.get_task(TaskType.ENCODING, index=self._write_index("encode", run_ids))
+            yield t1
+            yield self._tasks_manager.get_task(
+                TaskType.EXECUTION, index=self._write_index("execute", run_ids), after=(t1['name'],))
 
-        return jobs
+        elif processing_scheme == ProcessingScheme.STEP_ORIENTED_CHUNKED_ITERATIVE:
+            chunk_size = self._tasks_manager.get_chunk_size(TaskType.ENCODING)
+            t1 = self._tasks_manager.get_task(
+                TaskType.ENCODING, index=self._write_index("encode", run_ids, chunk_size))
+            yield t1
+            yield self._tasks_manager.get_task(
+                TaskType.EXECUTION, index=self._write_index("execute", run_ids), after=(t1['name'],))
+
+        elif processing_scheme == ProcessingScheme.STEP_ORIENTED_DECODING_ITERATIVE:
+            enc_chunk_size = self._tasks_manager.get_chunk_size(TaskType.ENCODING)
+            dec_chunk_size = self._tasks_manager.get_chunk_size(TaskType.DECODING)
+            t1 = self._tasks_manager.get_task(
+                TaskType.ENCODING, index=self._write_index("encode", run_ids, enc_chunk_size))
+            yield t1
+            t2 = self._tasks_manager.get_task(
+                TaskType.EXECUTION, index=self._write_index("execute", run_ids), after=(t1['name'],))
+            yield t2
+            yield self._tasks_manager.get_task(
+                TaskType.DECODING, index=self._write_index("decode", run_ids, dec_chunk_size), after=(t2['name'],))
 
-    def _prepare_iterative_jobs(self, processing_scheme):
+        elif processing_scheme == ProcessingScheme.SAMPLE_ORIENTED_CONDENSED_ITERATIVE:
+            yield self._tasks_manager.get_task(
+                TaskType.ENCODING_AND_EXECUTION, index=self._write_index("encode_execute", run_ids))
 
-        sampler = self._campaign._active_sampler_id
+        elif processing_scheme == ProcessingScheme.EXEC_ONLY_ITERATIVE:
+            yield self._tasks_manager.get_task(
+                TaskType.EXECUTION, index=self._write_index("execute", run_ids))
 
-        list_runs = self._campaign.list_runs(sampler)
-        min_run = int(list_runs[0][0][len("Run_"):])
-        max_run = int(list_runs[len(list_runs) - 1][0][len("Run_"):])
+    def _list_run_ids(self):
+        """Returns the ids of runs of the active sampler and app"""
 
-        if len(list_runs) != max_run - min_run + 1:
-            raise ValueError("Number of runs in a list is not homogeneous with their keys. "
-                             "The iterative ProcessingScheme can't be applied")
+        return list(self._campaign.campaign_db.run_ids(sampler=self._campaign._active_sampler_id,
+                                                       app_id=self._campaign._active_app['id']))
 
-        jobs = Jobs()
+    def _query_runs_params(self, run_ids):
+        """Returns the parameters of the runs of the active sampler and app, by the ids of runs"""
 
-        if processing_scheme == ProcessingScheme.STEP_ORIENTED_ITERATIVE:
-            t1 = self._tasks_manager.get_task(
-                TaskType.ENCODING, key_min=min_run, key_max=max_run)
-            t2 = self._tasks_manager.get_task(
-                TaskType.EXECUTION, key_min=min_run, key_max=max_run, after=(t1['name'],))
-            jobs.add_std(t1)
-            jobs.add_std(t2)
+        run_ids = set(run_ids)
+        query = self._campaign.campaign_db.session.query(RunTable.run_name, RunTable.params) \
+            .filter_by(sampler=self._campaign._active_sampler_id, app=self._campaign._active_app['id'])
+        return {run_id: json.loads(params) for run_id, params in query.yield_per(10000) if run_id in run_ids}
 
-        elif processing_scheme == ProcessingScheme.SAMPLE_ORIENTED_CONDENSED_ITERATIVE:
-            jobs.add_std(self._tasks_manager.get_task(
-                TaskType.ENCODING_AND_EXECUTION, key_min=min_run, key_max=max_run))
+    def _order_by_runtime(self, run_ids, runs_params, runtime_predictor):
+        """Returns the runs sorted by their predicted runtimes, the longest first and the not predicted last"""
 
-        elif processing_scheme == ProcessingScheme.EXEC_ONLY_ITERATIVE:
-            jobs.add_std(self._tasks_manager.get_task(
-                TaskType.EXECUTION, key_min=min_run, key_max=max_run))
+        predictions = {run_id: runtime_predictor(runs_params[run_id]) for run_id in run_ids}
+        ordered = sorted(run_ids, key=lambda run_id: (predictions[run_id] is None, -(predictions[run_id] or 0)))
 
-        return jobs
+        predicted = [prediction for prediction in predictions.values() if prediction is not None]
+        if predicted:
+            self.logger.info(f"Runs ordered by the predicted runtime: {len(predicted)} of {len(run_ids)} runs "
+                             f"predicted, from {max(predicted)} to {min(predicted)}")
+        else:
+            self.logger.warning("No runtime predicted, the order of runs is not changed")
+        return ordered
+
+    def _deduplicate_runs(self, processing_scheme):
+        """Returns the representative runs of the groups of runs with identical parameters,
+        the mapping of the remaining runs to the representatives is stored in the EQI directory"""
+
+        representatives = {}
+        unique_runs = []
+        duplicates = {}
+        run_dirs = {}
+        query = self._campaign.campaign_db.session.query(RunTable.run_name, RunTable.params, RunTable.run_dir) \
+            .filter_by(sampler=self._campaign._active_sampler_id, app=self._campaign._active_app['id']) \
+            .order_by(RunTable.id)
+
+        for run_id, params, run_dir in query.yield_per(10000):
+            # the parameters are normalised, so the order of keys doesn't matter
+            key = hashlib.sha256(json.dumps(json.loads(params), sort_keys=True).encode()).digest()
+            representative, representative_dir = representatives.setdefault(key, (run_id, run_dir))
+            if representative == run_id:
+                unique_runs.append(run_id)
+            else:
+                duplicates[run_id] = representative
+                run_dirs[run_id] = run_dir
+                run_dirs[representative] = representative_dir
+
+        if processing_scheme in (ProcessingScheme.SAMPLE_ORIENTED_CONDENSED,
+                                 ProcessingScheme.SAMPLE_ORIENTED_CONDENSED_ITERATIVE):
+            cores = self._tasks_manager.get_cores(TaskType.ENCODING_AND_EXECUTION)
+        else:
+            cores = self._tasks_manager.get_cores(TaskType.EXECUTION)
+
+        self._duplicates = {'duplicates': duplicates, 'run_dirs': run_dirs, 'cores': cores,
+                            'unique_runs': len(unique_runs)}
+        with open(f'{self._eqi_dir}/{DUPLICATES_FILE}', 'w') as duplicates_file:
+            json.dump(self._duplicates, duplicates_file)
+
+        self.logger.info(f"{len(duplicates)} duplicated runs found, {len(unique_runs)} unique runs to process")
+        return unique_runs
+
+    def _write_index(self, name, run_ids, chunk_size=1):
+        """Writes the index mapping iterations of the task of a given name to the chunks of runs"""
+
+        index = RunIndex(self._eqi_dir, name)
+        index.write(_split_into_chunks(run_ids, chunk_size))
+        return index
 
     def __wait_and_sync(self):
 
         # wait for completion of all PJ tasks
-        self._qcgpjm.wait4all()
+        with self._phase_timer.phase('wait'):
+            self._qcgpjm.wait4all()
 
         self.logger.info("Tasks execution completed")
         self.logger.debug("Syncing state of campaign")
 
-        def update_status(run_id, run_data):
-            self._campaign.campaign_db.set_run_statuses([run_id], uq.constants.Status.ENCODED)
+        with self._phase_timer.phase('collect'):
+            succeeded, failed = self._collect_runs_statuses()
+        with self._phase_timer.phase('sync'):
+            self._sync_campaign(succeeded, failed)
+
+        self._state_keeper.write_to_state_file({'completed': True})
+        self._state_keeper.flush()
+        self.logger.info("Campaign synced")
+
+    def __stream_and_sync(self, poll_interval):
 
-        self._campaign.call_for_each_run(update_status, status=uq.constants.Status.NEW)
+        self.logger.info("Streaming sync of campaign started")
+
+        reported = set()
+        succeeded, failed = set(), set()
+        # the names of not finished tasks, only these are polled after the first listing of all tasks
+        pending = None
+        while pending is None or pending:
+            with self._phase_timer.phase('collect'):
+                if pending is None:
+                    jobs = self._qcgpjm.list()
+                else:
+                    jobs = {name: job_info.get('data', {})
+                            for name, job_info in self._qcgpjm.info(sorted(pending)).get('jobs', {}).items()}
+                # checked before collection of statuses, so no run finished in the meantime is missed
+                pending = {name for name, job_data in jobs.items()
+                           if not Manager.is_status_finished(job_data.get('status'))}
+
+                polled_succeeded, polled_failed = self._collect_runs_statuses(jobs)
+                succeeded |= polled_succeeded
+                failed = (failed | polled_failed) - succeeded
+                completed = sorted(succeeded - reported)
+                reported.update(succeeded, failed)
+                # the progress is written at most once per the write interval of the state file
+                self._state_keeper.write_to_state_file({'succeeded_runs': len(succeeded),
+                                                        'failed_runs': len(failed)})
+
+                if self._state_keeper.run_states:
+                    self.logger.debug(f"States of runs: {self.get_run_states().get_summary()}")
+                self._report_eta(logging.DEBUG)
+
+            if completed:
+                with self._phase_timer.phase('sync'):
+                    completed += self._fan_out(completed)
+                    self._campaign.campaign_db.set_run_statuses(completed, uq.constants.Status.ENCODED)
+                self.logger.debug(f"{len(completed)} runs marked as ENCODED")
+                yield from completed
+
+            if pending:
+                with self._phase_timer.phase('wait'):
+                    time.sleep(poll_interval)
+
+        self.logger.info("Tasks execution completed")
+
+        # the final sync covers the runs unknown to QCG-PJ Manager and reports the failed runs
+        with self._phase_timer.phase('sync'):
+            self._sync_campaign(succeeded, failed)
         self._state_keeper.write_to_state_file({'completed': True})
+        self._state_keeper.flush()
         self.logger.info("Campaign synced")
 
+    def _report_eta(self, level):
+        """Logs the estimated time remaining to the completion of execution of runs"""
+
+        eta = self.get_eta()
+        if eta:
+            self.logger.log(level, f"Estimated time to completion: {eta['eta']:.0f} s "
+                                   f"({eta['remaining_runs']} runs, {eta['core_seconds']:.0f} core-seconds)")
+
+    def _report_phase_timings(self):
+        """Logs the wall times of phases of processing and stores the profiles of phases"""
+
+        timings = self._phase_timer.get_timings()
+        self.logger.info("Phase timings: " + ", ".join(
+            f"{name} {phase['time']:.3f} s ({phase['calls']} calls"
+            + (f", peak memory {phase['peak_memory'] / 2 ** 20:.1f} MiB)" if phase['peak_memory'] is not None
+               else ")")
+            for name, phase in timings.items()))
+
+        for path in self._phase_timer.dump_profiles(self._eqi_dir):
+            self.logger.info(f"Profile stored in {path}")
+        self._phase_timer.stop()
+
+    def _collect_runs_statuses(self, jobs=None):
+        """Returns the sets of runs, for which the processing succeeded and failed,
+        according to the statuses of QCG-PJ tasks"""
+
+        if jobs is None:
+            jobs = self._qcgpjm.list()
+
+        succeeded = set()
+        failed = set()
+
+        def classify(runs, status):
+            if status == 'SUCCEED':
+                succeeded.update(runs)
+            elif Manager.is_status_finished(status):
+                failed.update(runs)
+
+        iterative_jobs = []
+        for job_name, job_data in jobs.items():
+            if job_name in TasksManager.FINAL_TASKS:
+                iterative_jobs.append(job_name)
+            else:
+                classify(self._tasks_manager.get_final_runs(job_name), job_data.get('status'))
+
+        if iterative_jobs:
+            jobs_info = self._qcgpjm.info(iterative_jobs, withChilds=True).get('jobs', {})
+            for job_name, job_info in jobs_info.items():
+                for child in job_info.get('data', {}).get('childs', []):
+                    classify(self._tasks_manager.get_final_runs(job_name, child['iteration']),
+                             child.get('state'))
+
+        return succeeded, failed - succeeded
+
+    def _sync_campaign(self, succeeded, failed):
+        """Marks the successfully processed runs as ENCODED in a single batch update of the campaign"""
+
+        campaign_db = self._campaign.campaign_db
+        new_runs = campaign_db.run_ids(status=uq.constants.Status.NEW, app_id=self._campaign._active_app['id'])
+
+        # the runs unknown to QCG-PJ Manager are checked with the resume journal
+        run_states = self.get_run_states()
+        if run_states:
+            run_states.mark(succeeded, STATE_COMPLETED)
+            run_states.mark(failed, STATE_FAILED)
+            completed = run_states.get_runs(TasksManager.FINAL_TASKS, STATE_COMPLETED)
+        else:
+            completed = ResumeJournal(self._eqi_dir).get_completed_runs(TasksManager.FINAL_TASKS)
+
+        encoded = []
+        for run_id in new_runs:
+            if run_id in succeeded or (run_id not in failed and run_id in completed):
+                encoded.append(run_id)
+
+        # the duplicates share the status of their representatives
+        duplicates = self._get_duplicates().get('duplicates', {})
+        if duplicates:
+            encoded += self._fan_out(encoded)
+            failed = failed | {run_id for run_id, representative in duplicates.items() if representative in failed}
+
+        campaign_db.set_run_statuses(encoded, uq.constants.Status.ENCODED)
+        self.logger.info(f"{len(encoded)} runs marked as ENCODED")
+
+        self._failed_runs = sorted(failed)
+        if self._failed_runs:
+            self.logger.warning(f"Processing of {len(self._failed_runs)} runs failed: {self._failed_runs}")
+
+        self._merge_decoded_results(succeeded | set(encoded))
+        self._report_deduplication()
+        self._record_runtime_history()
+
+    def _get_duplicates(self):
+        """Returns the information about the duplicated runs, stored in the EQI directory"""
+
+        if self._duplicates is None:
+            self._duplicates = {}
+            if exists(f'{self._eqi_dir}/{DUPLICATES_FILE}'):
+                with open(f'{self._eqi_dir}/{DUPLICATES_FILE}', 'r') as duplicates_file:
+                    self._duplicates = json.load(duplicates_file)
+
+        return self._duplicates
+
+    def _fan_out(self, representatives):
+        """Copies the run directories of the processed representatives to their duplicates,
+        returns the ids of the duplicates"""
+
+        duplicates = self._get_duplicates().get('duplicates', {})
+        run_dirs = self._get_duplicates().get('run_dirs', {})
+        representatives = set(representatives)
+
+        fanned_out = []
+        for run_id, representative in duplicates.items():
+            if representative not in representatives:
+                continue
+
+            # the files are hardlinked, the (possibly partial) copy from the previous sync is replaced
+            if exists(run_dirs[run_id]):
+                shutil.rmtree(run_dirs[run_id])
+            shutil.copytree(run_dirs[representative], run_dirs[run_id], symlinks=True, copy_function=os.link)
+            fanned_out.append(run_id)
+
+        if fanned_out:
+            self.logger.debug(f"Run directories copied to {len(fanned_out)} duplicated runs")
+        return fanned_out
+
+    def _report_deduplication(self):
+        """Estimates the core-hours saved by the deduplication of runs"""
+
+        duplicates = self._get_duplicates()
+        if not duplicates:
+            return
+
+        runtimes = read_runtimes(self._eqi_dir)
+        saved_time = sum(runtimes.get(representative, 0.0) for representative in duplicates['duplicates'].values())
+
+        self._deduplication_report = {
+            'unique_runs': duplicates['unique_runs'],
+            'duplicate_runs': len(duplicates['duplicates']),
+            'saved_core_hours': saved_time * duplicates['cores'] / 3600
+        }
+        self.logger.info(f"Deduplication report: {self._deduplication_report}")
+
+    def _estimate_execution_runtime(self, run_ids):
+        """Returns the mean wall time of executions recorded in the EQI directory, or predicted for the runs
+        from the runtime history, None if not available"""
+
+        measured = read_runtimes(self._eqi_dir)
+        if measured:
+            return sum(measured.values()) / len(measured)
+
+        model = self.get_cost_model()
+        if not model:
+            return None
+        predicted = [model.predict_wall_time(params, self._tasks_manager.get_cores(TaskType.EXECUTION, params))
+                     for params in self._query_runs_params(run_ids).values()]
+        predicted = [runtime for runtime in predicted if runtime is not None]
+        if not predicted:
+            return None
+
+        self.logger.info(f"Runtime of EXECUTION task predicted from the history of {len(model)} runs")
+        return sum(predicted) / len(predicted)
+
+    def _record_runtime_history(self):
+        """Records the wall times of runs executed in the EQI directory in the runtime history"""
+
+        if not self._runtime_history:
+            return
+
+        runtimes = read_runtimes(self._eqi_dir)
+        if not runtimes:
+            return
+
+        # the runs are executed by the task of the scheme, with the requirements per run in non-iterative schemes
+        scheme = self._get_processing_scheme()
+        task = TaskType.ENCODING_AND_EXECUTION if _get_final_phase(scheme) == 'encode_execute' else TaskType.EXECUTION
+        per_run = not scheme.is_iterative()
+
+        records = [(run_id, params, self._tasks_manager.get_cores(task, params if per_run else None),
+                    runtimes[run_id]) for run_id, params in self._query_runs_params(runtimes).items()]
+        recorded = self._runtime_history.record(self._campaign._active_app_name, self._campaign.campaign_dir,
+                                                records)
+        self.logger.info(f"Wall times of {recorded} runs recorded in the runtime history: "
+                         f"{self._runtime_history.path}")
+
+    def _get_processing_scheme(self):
+        """Returns the processing scheme of the submitted tasks, stored in the state file"""
+
+        scheme = self._state_keeper.get_from_state_file().get('processing_scheme')
+        return ProcessingScheme[scheme] if scheme else ProcessingScheme.SAMPLE_ORIENTED
+
+    def _merge_decoded_results(self, processed):
+        """Stores the results decoded by DECODING tasks in the campaign, in a single bulk operation
+
+        The runs of `processed` (successfully, by the tasks of the workflow) without the decoded results
+        are reported as not decoded.
+        """
+
+        if self._get_processing_scheme() not in (ProcessingScheme.SAMPLE_ORIENTED_DECODING,
+                                                 ProcessingScheme.STEP_ORIENTED_DECODING_ITERATIVE):
+            return
+
+        results = {}
+        for shard in glob(f'{self._eqi_dir}/{DECODED_DIR}/*.jsonl'):
+            with open(shard, 'r') as shard_file:
+                for line in shard_file:
+                    # the last line may be incomplete if a task was killed while appending it
+                    if not line.endswith('\n'):
+                        continue
+                    entry = json.loads(line)
+                    results[entry['run_id']] = entry['result']
+
+        processed = set(processed)
+        for run_id, representative in self._get_duplicates().get('duplicates', {}).items():
+            if representative in results:
+                results[run_id] = results[representative]
+            if representative in processed:
+                processed.add(run_id)
+
+        # only the successfully processed runs, which are not yet collated, are stored
+        campaign_db = self._campaign.campaign_db
+        encoded_runs = list(campaign_db.run_ids(status=uq.constants.Status.ENCODED,
+                                                app_id=self._campaign._active_app['id']))
+        collated = [(run_id, results[run_id]) for run_id in encoded_runs if run_id in results]
+
+        if collated:
+            campaign_db.store_results(self._campaign._active_app_name, collated)
+        self.logger.info(f"Results of {len(collated)} runs decoded in tasks stored in the campaign")
+
+        # QCG-PJ starts a task only if all its dependencies succeeded, thus a failed execution
+        # prevents the decoding of the remaining runs of its chunk
+        self._not_decoded_runs = [run_id for run_id in encoded_runs if run_id in processed and run_id not in results]
+        if self._not_decoded_runs:
+            self.logger.warning(f"{len(self._not_decoded_runs)} runs not decoded in tasks, they remain ENCODED "
+                                f"and should be decoded with collate(): {self._not_decoded_runs}")
+
+
+def _get_final_phase(processing_scheme):
+    """Returns the phase of processing, which completes the processing of a run in a given scheme"""
+
+    if processing_scheme in (ProcessingScheme.SAMPLE_ORIENTED_CONDENSED,
+                             ProcessingScheme.SAMPLE_ORIENTED_CONDENSED_ITERATIVE):
+        return 'encode_execute'
+    return 'execute'
+
+
+def _get_total_cores(resources):
+    # the cores on all nodes in a QCG-PilotJob resources specification, e.g. "node_1:2,node_2:3"
+    if not resources:
+        return None
+    return sum(int(node.split(':')[-1]) for node in str(resources).split(','))
+
+
+def _split_into_chunks(items, chunk_size):
+    iterator = iter(items)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
 
 class ServiceLogLevel(Enum):
     CRITICAL = "critical"
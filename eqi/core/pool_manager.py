@@ -0,0 +1,311 @@
+import os
+import subprocess
+import threading
+
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+
+# The statuses of tasks, consistent with QCG-PilotJob
+QUEUED = 'QUEUED'
+EXECUTING = 'EXECUTING'
+SUCCEED = 'SUCCEED'
+FAILED = 'FAILED'
+OMITTED = 'OMITTED'
+
+FINISHED_STATUSES = (SUCCEED, FAILED, OMITTED)
+
+# The QCG-PilotJob iteration variable substituted in the descriptions of iterative tasks
+ITERATION_VARIABLE = '${it}'
+
+
+class PoolManager:
+    """Executes tasks on a pool of processes on a local machine
+
+    The manager is a lightweight replacement of QCG-PilotJob LocalManager. It accepts the same
+    descriptions of tasks, as prepared by TasksManager, and implements the part of QCG-PilotJob Manager API
+    used by Executor, thus the processing schemes work in the same way for both engines.
+    The tasks are started in the working directory of the manager, once their dependencies (`after`)
+    are completed and there are enough free cores for them (according to the `numCores` requirements).
+    The tasks which depend on not successfully completed tasks are omitted.
+
+    Parameters
+    ----------
+    wd : str
+        the working directory of tasks
+    cores : int, optional
+        the number of cores available for tasks, by default the number of CPUs of the machine
+    """
+
+    def __init__(self, wd, cores=None):
+        self._wd = wd
+        self._total_cores = cores or os.cpu_count()
+        self._free_cores = self._total_cores
+
+        self._jobs = {}
+        # the tasks with all dependencies completed successfully and not started iterations, in submission order
+        self._ready = deque()
+        # the numbers of not yet completed dependencies of the waiting tasks
+        self._waiting = {}
+        # the tasks waiting for a task, by its name
+        self._dependents = defaultdict(list)
+        self._unfinished = 0
+        self._condition = threading.Condition()
+        self._finishing = False
+
+        self._pool = ThreadPoolExecutor(max_workers=self._total_cores)
+        self._scheduler = threading.Thread(target=self._schedule, daemon=True)
+        self._scheduler.start()
+
+    def submit(self, jobs):
+        """Submits the tasks for execution
+
+        Parameters
+        ----------
+        jobs : qcg.pilotjob.api.job.Jobs
+            the descriptions of tasks
+
+        Returns
+        -------
+        list of str
+            the names of submitted tasks
+        """
+        descriptions = jobs.ordered_jobs()
+
+        with self._condition:
+            for description in descriptions:
+                if description['name'] in self._jobs:
+                    raise ValueError(f"Task {description['name']} already submitted")
+
+            for description in descriptions:
+                job = _PoolJob(description)
+                self._jobs[job.name] = job
+                self._unfinished += 1
+                if job.cores > self._total_cores:
+                    self._finish_job(job, FAILED, f"Task requires {job.cores} cores, "
+                                                  f"but only {self._total_cores} are available")
+                else:
+                    self._queue_job(job)
+
+            self._condition.notify_all()
+
+        return [description['name'] for description in descriptions]
+
+    def list(self):
+        """Returns the statuses of all submitted tasks
+
+        Returns
+        -------
+        dict
+            the statuses of tasks in a form `{name: {'status': status}}`
+        """
+        with self._condition:
+            return {name: {'status': job.status} for name, job in self._jobs.items()}
+
+    def info(self, names, withChilds=False):
+        """Returns the detailed information about tasks
+
+        Parameters
+        ----------
+        names : list of str
+            the names of tasks
+        withChilds : bool, optional
+            if True, the statuses of iterations of iterative tasks are included
+
+        Returns
+        -------
+        dict
+            the information in a form of QCG-PilotJob Manager response
+        """
+        with self._condition:
+            jobs_info = {}
+            for name in names:
+                job = self._jobs[name]
+                data = {'status': job.status, 'message': job.message}
+                if withChilds and job.children is not None:
+                    data['childs'] = [{'iteration': it, 'state': state} for it, state in job.children.items()]
+                jobs_info[name] = {'status': 0, 'data': data}
+
+        return {'jobs': jobs_info}
+
+    def wait4all(self):
+        """Waits for completion of all submitted tasks
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._unfinished == 0)
+
+    def resources(self):
+        """Returns the information about cores available for tasks
+        """
+        with self._condition:
+            return {'total_nodes': 1, 'total_cores': self._total_cores,
+                    'used_cores': self._total_cores - self._free_cores, 'free_cores': self._free_cores}
+
+    def finish(self):
+        """Waits for completion of the executing tasks and stops the manager
+        """
+        with self._condition:
+            self._finishing = True
+            self._condition.notify_all()
+
+        self._scheduler.join()
+        self._pool.shutdown(wait=True)
+
+    def _schedule(self):
+        with self._condition:
+            while not self._finishing:
+                self._start_ready()
+                self._condition.wait()
+
+    def _start_ready(self):
+        """Starts the iterations of the ready tasks, as long as there are free cores"""
+
+        # if there are not enough free cores for a task, they still may be used by the next tasks
+        skipped = []
+        while self._ready and self._free_cores > 0:
+            job = self._ready.popleft()
+            while job.pending and job.cores <= self._free_cores:
+                self._free_cores -= job.cores
+                iteration = job.start_next()
+                self._pool.submit(self._execute, job, iteration)
+
+            if job.pending:
+                skipped.append(job)
+
+        self._ready.extendleft(reversed(skipped))
+
+    def _queue_job(self, job):
+        """Queues the submitted job as ready or waiting for its dependencies, omits the job that will never be ready"""
+
+        waiting = 0
+        for dependency in job.after:
+            dependency_job = self._jobs.get(dependency)
+
+            if dependency_job is None or dependency_job.status in (FAILED, OMITTED):
+                self._finish_job(job, OMITTED, f"Dependency {dependency} not completed successfully")
+                return
+
+            if dependency_job.status != SUCCEED:
+                waiting += 1
+                self._dependents[dependency].append(job)
+
+        if waiting:
+            self._waiting[job.name] = waiting
+        else:
+            self._ready.append(job)
+
+    def _finish_job(self, job, status, message):
+        job.finish(status, message)
+        self._job_finished(job)
+
+    def _job_finished(self, job):
+        """Releases the tasks waiting for the finished job, or omits them (and their dependents) if it failed"""
+
+        finished = [job]
+        while finished:
+            job = finished.pop()
+            self._unfinished -= 1
+
+            for dependent in self._dependents.pop(job.name, []):
+                # the task might have been omitted due to another dependency
+                if dependent.status in FINISHED_STATUSES:
+                    continue
+
+                if job.status == SUCCEED:
+                    self._waiting[dependent.name] -= 1
+                    if self._waiting[dependent.name] == 0:
+                        del self._waiting[dependent.name]
+                        self._ready.append(dependent)
+                else:
+                    del self._waiting[dependent.name]
+                    dependent.finish(OMITTED, f"Dependency {job.name} not completed successfully")
+                    finished.append(dependent)
+
+    def _execute(self, job, iteration):
+        execution = job.execution
+
+        def substitute(value):
+            return value.replace(ITERATION_VARIABLE, str(iteration)) if iteration is not None else value
+
+        args = [execution['exec']] + [substitute(str(arg)) for arg in execution.get('args', [])]
+
+        env = os.environ.copy()
+        env.update({name: substitute(str(value)) for name, value in execution.get('env', {}).items()})
+
+        stdout_path = join(self._wd, substitute(execution.get('stdout', os.devnull)))
+        stderr_path = join(self._wd, substitute(execution.get('stderr', os.devnull)))
+
+        try:
+            with open(stdout_path, 'w') as stdout, open(stderr_path, 'w') as stderr:
+                exit_code = subprocess.call(args, cwd=self._wd, env=env, stdout=stdout, stderr=stderr,
+                                            stdin=subprocess.DEVNULL)
+            message = None if exit_code == 0 else f"Exit code {exit_code}"
+        except OSError as e:
+            exit_code, message = -1, str(e)
+
+        with self._condition:
+            self._free_cores += job.cores
+            job.complete(iteration, SUCCEED if exit_code == 0 else FAILED, message)
+            if job.status in FINISHED_STATUSES:
+                self._job_finished(job)
+            self._condition.notify_all()
+
+
+class _PoolJob:
+    """The state of a task executed by PoolManager"""
+
+    def __init__(self, description):
+        self.name = description['name']
+        self.execution = description['execution']
+        self.after = description.get('dependencies', {}).get('after', [])
+        self.cores = get_required_cores(description.get('resources', {}))
+        self.status = QUEUED
+        self.message = None
+        self._executing = 0
+        self._failed = 0
+
+        iteration = description.get('iteration')
+        if iteration:
+            iterations = range(iteration.get('start', 0), iteration['stop'])
+            self.children = {it: QUEUED for it in iterations}
+            self.pending = deque(iterations)
+        else:
+            self.children = None
+            self.pending = deque([None])
+
+    def start_next(self):
+        iteration = self.pending.popleft()
+        self._executing += 1
+        self.status = EXECUTING
+        if iteration is not None:
+            self.children[iteration] = EXECUTING
+        return iteration
+
+    def complete(self, iteration, status, message):
+        self._executing -= 1
+        if iteration is not None:
+            self.children[iteration] = status
+        if status != SUCCEED:
+            self._failed += 1
+            self.message = message
+
+        if not self.pending and self._executing == 0:
+            self.status = SUCCEED if self._failed == 0 else FAILED
+
+    def finish(self, status, message):
+        if self.children is not None:
+            for iteration in self.pending:
+                self.children[iteration] = status
+        self.pending = deque()
+        self.status = status
+        self.message = message
+
+
+def get_required_cores(resources):
+    # the minimal number of cores that satisfies the requirements (the nodes are multiplied by the cores)
+    def minimal(requirement, default):
+        if not requirement:
+            return default
+        return requirement.get('exact') or requirement.get('min') or default
+
+    return minimal(resources.get('numCores'), 1) * minimal(resources.get('numNodes'), 1)
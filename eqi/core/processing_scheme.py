@@ -21,11 +21,21 @@ class ProcessingScheme(Enum):
          "(e.g. encoding) for all samples (a single iteration is here an execution of "
          "the encoding operation for a single sample)"
          "and then do the same for the next EasyVVUQ operation (e.g. for execution)", True)
+    STEP_ORIENTED_CHUNKED_ITERATIVE = \
+        ("Submits an iterative task for encoding of all samples, where a single iteration "
+         "encodes a chunk of samples (of size defined by the `chunk_size` parameter of the ENCODING task), "
+         "and then submits an iterative task for execution of all samples "
+         "(a single iteration is here an execution for a single sample)", True)
 
     SAMPLE_ORIENTED = \
         ("Submits a workflow of EasyVVUQ operations as "
          "separate QCG PJ tasks for a sample "
          "(e.g. encoding -> execution) and then goes to the next sample")
+    SAMPLE_ORIENTED_DECODING = \
+        ("Submits a workflow of EasyVVUQ operations as "
+         "separate QCG PJ tasks for a sample (e.g. encoding -> execution) "
+         "and then goes to the next sample. Once the execution of a chunk of samples is completed, "
+         "their outputs are decoded by a separate QCG PJ task")
     SAMPLE_ORIENTED_CONDENSED = \
         ("Submits all EasyVVUQ operations for a sample "
          "as a single QCG PJ task (e.g. encoding -> execution) "
@@ -35,6 +45,11 @@ class ProcessingScheme(Enum):
          "where a single iteration is composed of"
          "all EasyVVUQ operations for a sample (e.g. encoding -> execution)", True)
 
+    STEP_ORIENTED_DECODING_ITERATIVE = \
+        ("Submits iterative tasks for encoding and for execution of all samples, "
+         "and then an iterative task for decoding of outputs of all samples "
+         "(a single iteration decodes a chunk of samples)", True)
+
     EXEC_ONLY = \
         ("Submits a workflow of EasyVVUQ operations as "
          "separate QCG PJ tasks for execution only")
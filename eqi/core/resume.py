@@ -1,4 +1,27 @@
+import os
+import shutil
+
 from enum import Enum
+from glob import glob
+
+# Must be consistent with the names and records used in eqi_utils.sh
+JOURNAL_FILE_PFX = ".eqi_journal_"
+SNAPSHOTS_FILE_PFX = ".eqi_snapshots_"
+
+# The sizes of journal files at the submission of tasks, written by the Executor
+JOURNAL_CUTOFF_FILE = ".eqi_journal_cutoff"
+
+# The index of records and snapshots written before the submission of tasks, built by the Executor.
+# The records of a run's phase are stored in the file `<PHASE>/<KEY>`, where the key is the end of the run's id
+JOURNAL_INDEX_DIR = ".eqi_records_index"
+INDEX_KEY_LENGTH = 3
+
+# The manifest of outputs of a run's phase is stored in the run directory, used by the VERIFIED level
+OUTPUTS_MANIFEST_PFX = ".eqi_outputs_"
+
+RECORD_NO_DIR = "EQI_NO_DIR"
+RECORD_STARTED = "EQI_STARTED"
+RECORD_COMPLETED = "EQI_COMPLETED"
 
 
 class ResumeLevel(Enum):
@@ -20,3 +43,224 @@ class ResumeLevel(Enum):
         "At the beginning of a task's execution, the list of directories and files in a run directory " \
         "is generated and stored. The resumed task checks for the differences and remove new files and directories" \
         "in order to resurrect the initial state."
+    VERIFIED = \
+        "This level processes all operations offered by MODERATE level, and adds the following. " \
+        "At the completion of a task, the content hashes of its declared output files (the `outputs` parameter " \
+        "of a task) are stored in the run directory. The resumed task is skipped if the outputs are intact, " \
+        "even if the journal of the EQI directory was lost, and processed again if they are missing or corrupted."
+
+
+class ResumeJournal:
+    """ Reads the resume journal of tasks
+
+    The tasks append records about the start and completion of processing of runs' phases to the journal,
+    a single file per node (`.eqi_journal_<NODE_NAME>` in the EQI directory). Every record is a single line:
+    `<RECORD> <RUN_ID> <PHASE>`. All journal files are read sequentially once, at the first query,
+    and indexed by runs and phases.
+
+    Every phase of a run is processed by a single task of a workflow, thus a task needs only the records
+    written before the submission (or the resume) of the workflow's tasks, i.e. by the interrupted workflow.
+    At the submission and resume, the Executor stores the sizes of journal files and indexes these records
+    (see `write_cutoff`), so a task reads only the small index files of its runs, and nothing in a fresh workflow.
+    The index also locates the snapshots of runs' phases in the snapshot journals (see `get_snapshot_locations`).
+
+    Parameters
+    ----------
+    eqi_dir : str
+        the EQI directory where the journal is stored
+    before_cutoff : bool, optional
+        if True, only the records written before the submission of tasks are read,
+        all records are read if the sizes of journal files have not been stored
+    """
+
+    def __init__(self, eqi_dir, before_cutoff=False):
+        self._eqi_dir = eqi_dir
+        self._before_cutoff = before_cutoff
+        self._records = None
+        self._index_files = {}
+
+    def get_records(self, run_id, phase):
+        """ Returns the records stored in the journal for a run's phase
+
+        Parameters
+        ----------
+        run_id : str
+            the id of the run
+        phase : str
+            the phase of processing, e.g. `encode`, `execute` or `encode_execute`
+
+        Returns
+        -------
+        set of str
+            the records, empty if the processing of the phase has not been started
+        """
+        if self._is_indexed():
+            return self._read_index_file(run_id, phase).get(run_id, (set(), None))[0]
+
+        return self._get_index().get((run_id, phase), set())
+
+    def get_snapshot_locations(self, keys):
+        """ Returns the locations of snapshots of runs' phases stored before the submission of tasks
+
+        Parameters
+        ----------
+        keys : iterable of (str, str)
+            the ids of runs and the phases
+
+        Returns
+        -------
+        dict((str, str), (str, int)) or None
+            the names of snapshot journals and the offsets of the stored snapshots, keyed by the runs and phases,
+            None if the records are not read from the index
+        """
+        if not self._is_indexed():
+            return None
+
+        locations = {}
+        for run_id, phase in keys:
+            location = self._read_index_file(run_id, phase).get(run_id, (set(), None))[1]
+            if location is not None:
+                locations[(run_id, phase)] = location
+        return locations
+
+    def is_completed(self, run_id, phase):
+        """ Checks if the journal reports the completion of a run's phase
+
+        Parameters
+        ----------
+        run_id : str
+            the id of the run
+        phase : str
+            the phase of processing, e.g. `encode`, `execute` or `encode_execute`
+
+        Returns
+        -------
+        bool
+            True if the phase of the run has been completed
+        """
+        return RECORD_COMPLETED in self.get_records(run_id, phase)
+
+    def get_completed_runs(self, phases):
+        """ Returns the runs for which any of the phases has been completed
+
+        Parameters
+        ----------
+        phases : iterable of str
+            the phases of processing
+
+        Returns
+        -------
+        set of str
+            the ids of runs
+        """
+        phases = set(phases)
+        return {run_id for (run_id, phase), records in self._get_index().items()
+                if phase in phases and RECORD_COMPLETED in records}
+
+    def write_cutoff(self):
+        """ Stores the sizes of journal files and indexes their records, called before the submission of tasks
+
+        The sizes are cut to the last complete record, so the tasks never read a record partially written
+        by a killed task. The records of every run's phase are written on a single line
+        `<RUN_ID> <RECORD>[,<RECORD>...] [<SNAPSHOTS_FILE> <OFFSET>]` of the index file selected by the phase
+        and the end of the run's id, with the location of the first complete snapshot of the phase.
+        """
+        lines = []
+        for journal_file in sorted(glob(f'{self._eqi_dir}/{JOURNAL_FILE_PFX}*')):
+            # only the end of the file is read to find the last complete record
+            with open(journal_file, 'rb') as journal:
+                start = max(journal.seek(0, os.SEEK_END) - 4096, 0)
+                journal.seek(start)
+                size = start + journal.read().rfind(b'\n') + 1
+            lines.append(f'{os.path.basename(journal_file)} {size}\n')
+
+        cutoff_file = os.path.join(self._eqi_dir, JOURNAL_CUTOFF_FILE)
+        with open(f'{cutoff_file}.tmp', 'w') as cutoff:
+            cutoff.writelines(lines)
+        os.replace(f'{cutoff_file}.tmp', cutoff_file)
+
+        self._write_index()
+
+    def _write_index(self):
+        records = ResumeJournal(self._eqi_dir, before_cutoff=True)._get_index()
+
+        snapshots = {}
+        for snapshots_file in sorted(glob(f'{self._eqi_dir}/{SNAPSHOTS_FILE_PFX}*')):
+            name = os.path.basename(snapshots_file)
+            with open(snapshots_file, 'rb') as snapshots_journal:
+                offset = 0
+                for line in snapshots_journal:
+                    fields = line.split(b' ', 2)
+                    if len(fields) == 3 and line.endswith(b'\n'):
+                        key = (fields[0].decode(), fields[1].decode())
+                        if key in records:
+                            snapshots.setdefault(key, (name, offset))
+                    offset += len(line)
+
+        index_files = {}
+        for (run_id, phase), run_records in records.items():
+            line = f'{run_id} {",".join(sorted(run_records))}'
+            if (run_id, phase) in snapshots:
+                line += ' {} {}'.format(*snapshots[(run_id, phase)])
+            index_files.setdefault(os.path.join(phase, _get_index_key(run_id)), []).append(line + '\n')
+
+        # the index is built aside and replaced as a whole, the tasks are not running yet
+        index_dir = os.path.join(self._eqi_dir, JOURNAL_INDEX_DIR)
+        shutil.rmtree(f'{index_dir}.tmp', ignore_errors=True)
+        os.makedirs(f'{index_dir}.tmp')
+        for path, index_lines in index_files.items():
+            os.makedirs(os.path.dirname(os.path.join(f'{index_dir}.tmp', path)), exist_ok=True)
+            with open(os.path.join(f'{index_dir}.tmp', path), 'w') as index_file:
+                index_file.writelines(index_lines)
+        shutil.rmtree(index_dir, ignore_errors=True)
+        os.rename(f'{index_dir}.tmp', index_dir)
+
+    def _is_indexed(self):
+        return self._before_cutoff and os.path.isdir(os.path.join(self._eqi_dir, JOURNAL_INDEX_DIR))
+
+    def _read_index_file(self, run_id, phase):
+        """Returns the records and snapshot locations of runs stored in the index file of a run's phase"""
+
+        path = os.path.join(self._eqi_dir, JOURNAL_INDEX_DIR, phase, _get_index_key(run_id))
+        if path not in self._index_files:
+            runs = {}
+            if os.path.exists(path):
+                with open(path, 'r') as index_file:
+                    for line in index_file:
+                        fields = line.split()
+                        location = (fields[2], int(fields[3])) if len(fields) == 4 else None
+                        runs[fields[0]] = (set(fields[1].split(',')), location)
+            self._index_files[path] = runs
+
+        return self._index_files[path]
+
+    def _read_journals(self):
+        """Yields the lines of journal files, up to the stored sizes if read before the cutoff"""
+
+        cutoff_file = os.path.join(self._eqi_dir, JOURNAL_CUTOFF_FILE)
+        if self._before_cutoff and os.path.exists(cutoff_file):
+            with open(cutoff_file, 'r') as cutoff:
+                sizes = [line.rsplit(' ', 1) for line in cutoff.read().splitlines()]
+            for journal_file, size in sizes:
+                with open(os.path.join(self._eqi_dir, journal_file), 'r') as journal:
+                    yield from journal.read(int(size)).splitlines(keepends=True)
+        else:
+            for journal_file in sorted(glob(f'{self._eqi_dir}/{JOURNAL_FILE_PFX}*')):
+                with open(journal_file, 'r') as journal:
+                    yield from journal
+
+    def _get_index(self):
+        if self._records is None:
+            self._records = {}
+            for line in self._read_journals():
+                fields = line.split()
+                # the last line may be incomplete if a task was killed while appending it
+                if len(fields) == 3 and line.endswith('\n'):
+                    self._records.setdefault((fields[1], fields[2]), set()).add(fields[0])
+
+        return self._records
+
+
+def _get_index_key(run_id):
+    # the ends of ids of consecutive runs are different, so the runs are spread over many index files
+    return run_id[-INDEX_KEY_LENGTH:]
@@ -1,12 +1,14 @@
 from enum import Enum
 
 from eqi.core.resume import ResumeLevel
+from eqi.core.task_requirements import TaskRequirements
 
 
 class TaskType(Enum):
     ENCODING = "ENCODING"
     EXECUTION = "EXECUTION"
     ENCODING_AND_EXECUTION = "ENCODING_AND_EXECUTION"
+    DECODING = "DECODING"
     OTHER = "OTHER"
 
 
@@ -16,7 +18,7 @@ class Task:
     Parameters
     ----------
     type : TaskType
-        The type of the task. Allowed tasks are: ENCODING, EXECUTION, ENCODING_AND_EXECUTION,
+        The type of the task. Allowed tasks are: ENCODING, EXECUTION, ENCODING_AND_EXECUTION, DECODING
          and OTHER (currently not supported)
     requirements : TaskRequirements, optional
         The requirements for the Task
@@ -29,10 +31,30 @@ class Task:
     resume_level : ResumeLevel, optional
         The resume level applied for a task.
     params : kwargs
-        additional parameters that may be used by specific Task types
+        additional parameters that may be used by specific Task types, e.g.
+        `application` - the command to run the application (EXECUTION, ENCODING_AND_EXECUTION),
+        `chunk_size` - the number of samples encoded or decoded by a single QCG-PilotJob task (ENCODING, DECODING)
+        `encoder_service` - if True, the samples are encoded by the per-node encoder service
+        (ENCODING, ENCODING_AND_EXECUTION)
+        `outputs` - the list of glob patterns (relative to the run directory) of output files,
+        verified on resume by the VERIFIED resume level (required for this level)
+        `cache_dir` - the directory of the result cache, shared between campaigns, the outputs of executions
+        are restored from it for the same input files and application (EXECUTION, ENCODING_AND_EXECUTION)
+        `cache_size` - the bound of the total size of the result cache in bytes, by default 10 GiB
+        `cache_links` - if True, the outputs are restored from the result cache with read-only hardlinks
+        instead of copies
+        `requirements_per_run` - the requirements of a task processing a single run, computed from the parameters
+        of the run: a callable taking the dict of parameters and returning TaskRequirements, or a tuple
+        `(param_name, lookup)`, where lookup maps the values of the parameter to TaskRequirements. If None is
+        returned (or the value is not in the lookup), the `requirements` of the Task are used. Applied only
+        in the non-iterative processing schemes (EXECUTION, ENCODING_AND_EXECUTION)
     """
 
     def __init__(self, type, requirements=None, name=None, model="default", resume_level=ResumeLevel.BASIC, **params):
+        # validated before the submission of any task, which is done in batches
+        if resume_level == ResumeLevel.VERIFIED and not params.get("outputs"):
+            raise ValueError("The 'outputs' parameter is required for the VERIFIED resume level")
+
         self._type = type
         self._requirements = requirements
         self._model = model
@@ -46,6 +68,45 @@ class Task:
     def get_requirements(self):
         return self._requirements
 
+    def set_requirements(self, requirements):
+        self._requirements = requirements
+
+    def has_run_requirements(self):
+        """Returns True if the requirements of the task depend on the parameters of the processed run"""
+
+        return self._params.get("requirements_per_run") is not None
+
+    def get_run_requirements(self, run_params=None):
+        """ Returns the requirements of the task processing a single run
+
+        Parameters
+        ----------
+        run_params : dict, optional
+            the parameters of the run
+
+        Returns
+        -------
+        TaskRequirements or None
+            the requirements computed from the parameters of the run by `requirements_per_run`,
+            the requirements of the Task if not available
+        """
+        requirements_per_run = self._params.get("requirements_per_run")
+        if requirements_per_run is None or run_params is None:
+            return self._requirements
+
+        if callable(requirements_per_run):
+            requirements = requirements_per_run(run_params)
+        else:
+            param_name, lookup = requirements_per_run
+            requirements = lookup.get(run_params.get(param_name))
+
+        if requirements is None:
+            return self._requirements
+        if not isinstance(requirements, TaskRequirements):
+            raise ValueError(f"The requirements of the task {self._name} for a run should be an instance "
+                             f"of TaskRequirements, got: {requirements!r}")
+        return requirements
+
     def get_model(self):
         return self._model
 
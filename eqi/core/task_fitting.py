@@ -0,0 +1,135 @@
+from math import ceil
+
+from eqi.core.processing_scheme import ProcessingScheme
+from eqi.core.task import TaskType
+from eqi.core.task_requirements import Resources
+
+# The proposed number of cores of a task is searched between the half and the double of the declared one
+CORES_SCALING_RANGE = 2
+
+# The number of runs above which the iterative processing schemes are proposed,
+# so the number of QCG-PilotJob tasks doesn't grow with the number of runs
+ITERATIVE_SCHEME_MIN_RUNS = 1000
+
+# The maximal share of idle cores during the encoding in the condensed scheme,
+# in relation to the core-time of the execution, for which the condensed scheme is proposed
+CONDENSED_IDLE_TOLERANCE = 0.05
+
+
+def fit_task_cores(total_cores, cores, runs, runtime=None):
+    """Proposes the number of cores of a task processing the runs, which minimises the makespan
+
+    The application is assumed to scale linearly, thus the makespan is proportional to the number of waves
+    of tasks (the allocation executes `total_cores // cores` tasks at a time) divided by the number of cores.
+    Among the proposals with the same makespan, the one closest to the declared number of cores is selected,
+    thus the divisors of the allocation size are usually proposed. If all runs are processed in a single wave,
+    the tasks may also take the cores left idle, up to the equal share of the allocation.
+
+    Parameters
+    ----------
+    total_cores : int
+        the number of cores of the allocation
+    cores : int
+        the declared number of cores of the task
+    runs : int
+        the number of runs processed by the task
+    runtime : float, optional
+        the estimated time (in seconds) of processing of a single run with the declared number of cores
+
+    Returns
+    -------
+    dict
+        the proposed number of `cores`, the `resources` of the task, the number of `waves` of tasks,
+        the `idle_cores` in a full wave, the `utilisation` of the allocation (a fraction of core-time),
+        and the `makespan` (in seconds, None if the runtime is not given)
+    """
+    if total_cores < 1 or cores < 1:
+        raise ValueError("The numbers of cores should be positive integers")
+    runs = max(runs, 1)
+
+    def cost(candidate):
+        waves = ceil(runs / (total_cores // candidate))
+        return waves / candidate, abs(candidate - cores), -candidate
+
+    candidates = range(max(ceil(cores / CORES_SCALING_RANGE), 1), min(cores * CORES_SCALING_RANGE, total_cores) + 1)
+    if not candidates:
+        # the task doesn't fit in the allocation at all
+        return {'cores': cores, 'resources': Resources(exact=cores), 'waves': None, 'idle_cores': total_cores,
+                'utilisation': 0.0, 'makespan': None}
+
+    proposed = min(candidates, key=cost)
+    slots = total_cores // proposed
+    waves = ceil(runs / slots)
+    resources = Resources(exact=proposed)
+    if waves == 1 and cores > 1 and total_cores // runs > proposed:
+        resources = Resources(min=proposed, max=total_cores // runs)
+
+    core_time = runs * proposed / total_cores
+    return {
+        'cores': proposed,
+        'resources': resources,
+        'waves': waves,
+        'idle_cores': total_cores - slots * proposed,
+        'utilisation': core_time / waves,
+        'makespan': waves * runtime * cores / proposed if runtime is not None else None,
+    }
+
+
+def select_processing_scheme(task_types, runs, execution_cores=1, encoding_runtime=None, execution_runtime=None):
+    """Proposes the processing scheme for the registered types of tasks
+
+    The condensed scheme (a single task encodes and executes a run) halves the number of tasks,
+    but the cores of the task except one are idle during the encoding. Thus it is proposed
+    for single-core executions, or if the idle core-time is negligible according to the runtime estimates.
+    The iterative schemes are proposed for large numbers of runs.
+
+    Parameters
+    ----------
+    task_types : set of TaskType
+        the types of the registered tasks
+    runs : int
+        the number of runs
+    execution_cores : int, optional
+        the number of cores of the execution task
+    encoding_runtime : float, optional
+        the estimated time (in seconds) of encoding of a single run
+    execution_runtime : float, optional
+        the estimated time (in seconds) of execution of a single run
+
+    Returns
+    -------
+    ProcessingScheme or None
+        the proposed scheme, None if the registered tasks are not sufficient for any scheme
+    """
+    iterative = runs >= ITERATIVE_SCHEME_MIN_RUNS
+    separate = TaskType.ENCODING in task_types and TaskType.EXECUTION in task_types
+
+    condensed = TaskType.ENCODING_AND_EXECUTION in task_types
+    if condensed and separate and execution_cores > 1:
+        condensed = encoding_runtime is not None and execution_runtime is not None and \
+            (execution_cores - 1) * encoding_runtime <= \
+            CONDENSED_IDLE_TOLERANCE * execution_cores * execution_runtime
+
+    if condensed:
+        return ProcessingScheme.SAMPLE_ORIENTED_CONDENSED_ITERATIVE if iterative \
+            else ProcessingScheme.SAMPLE_ORIENTED_CONDENSED
+    if separate and TaskType.DECODING in task_types:
+        return ProcessingScheme.STEP_ORIENTED_DECODING_ITERATIVE if iterative \
+            else ProcessingScheme.SAMPLE_ORIENTED_DECODING
+    if separate:
+        return ProcessingScheme.STEP_ORIENTED_ITERATIVE if iterative else ProcessingScheme.SAMPLE_ORIENTED
+    if TaskType.EXECUTION in task_types:
+        return ProcessingScheme.EXEC_ONLY_ITERATIVE if iterative else ProcessingScheme.EXEC_ONLY
+    return None
+
+
+def get_exact_cores(requirements):
+    """Returns the exact number of cores of the requirements, None if the requirements are not exact
+    (e.g. given as a range or in nodes)"""
+
+    if requirements is None:
+        return 1
+    resources = requirements.get_resources().get('resources', {})
+    if 'numNodes' in resources:
+        return None
+    return resources.get('numCores', {}).get('exact')
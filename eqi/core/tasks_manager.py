@@ -1,4 +1,12 @@
+import hashlib
+
+from os.path import abspath, join
+from tempfile import gettempdir
+
 from eqi.core.task import TaskType
+from eqi.core.pool_manager import get_required_cores
+from eqi.core.resume import ResumeLevel
+from eqi.utils.run_index import RunIndex
 
 
 class TasksManager:
@@ -9,39 +17,164 @@ class TasksManager:
 
     """
 
-    def __init__(self, campaign, eqi_dir, config_file=None):
+    # The names of tasks (and phases in the resume journal) that finish the processing of runs
+    FINAL_TASKS = ('execute', 'encode_execute')
+
+    def __init__(self, campaign, eqi_dir, config_file=None, config_env_file=None):
         self._tasks = {}
         self._campaign = campaign
         self._config_file = config_file
+        self._config_env_file = config_env_file
         self._eqi_dir = eqi_dir
+        self._indexes = {}
+        self._runs_params = {}
 
     def add_task(self, task):
         self._tasks[task.get_name()] = task
 
-    def get_task(self, name, key=None, key_min=None, key_max=None, after=None):
+    def get_tasks(self):
+        """Returns the registered tasks"""
+
+        return list(self._tasks.values())
+
+    def has_run_requirements(self):
+        """Returns True if the requirements of any of the registered tasks depend on the parameters of runs"""
+
+        return any(task.has_run_requirements() for task in self._tasks.values())
+
+    def uses_encoder_service(self):
+        """Returns True if any of the registered tasks encodes the runs with the encoder service"""
+
+        return any(task.get_params().get("encoder_service") for task in self._tasks.values())
+
+    def set_runs_params(self, runs_params):
+        """Sets the parameters of runs, used to compute the requirements of tasks processing single runs
+
+        Parameters
+        ----------
+        runs_params : dict(str, dict)
+            the parameters of runs by their ids
+        """
+        self._runs_params = runs_params
+
+    def get_chunk_size(self, name):
+        """Returns the number of runs processed by a single instance of the task
+
+        Parameters
+        ----------
+        name : str or TaskType
+            the name of the task
+
+        Returns
+        -------
+        int
+            the value of `chunk_size` parameter of the task or 1 if the parameter is not set
+        """
+        task = self._tasks.get(name)
+        if not task:
+            return 1
+
+        chunk_size = task.get_params().get("chunk_size", 1)
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError("The value of 'chunk_size' parameter should be a positive integer")
+
+        return chunk_size
+
+    def get_cores(self, name, run_params=None):
+        """Returns the number of cores required by a single instance of the task
+
+        Parameters
+        ----------
+        name : str or TaskType
+            the name of the task
+        run_params : dict, optional
+            the parameters of the processed run, used if the requirements of the task depend on them
+
+        Returns
+        -------
+        int
+            the minimal number of cores satisfying the requirements of the task, 1 if the task is not defined
+        """
+        task = self._tasks.get(name)
+        requirements = task.get_run_requirements(run_params) if task else None
+        if not requirements:
+            return 1
+
+        return get_required_cores(requirements.get_resources().get('resources', {}))
+
+    def get_final_runs(self, job_name, iteration=None):
+        """Returns the runs for which the QCG-PilotJob job (or its iteration) finishes the processing
+
+        Parameters
+        ----------
+        job_name : str
+            the name of a job prepared by TasksManager
+        iteration : int, optional
+            the iteration index, used for iterative jobs
+
+        Returns
+        -------
+        list of str
+            the list of run ids, empty if the job doesn't finish the processing of any run
+        """
+        if job_name in TasksManager.FINAL_TASKS:
+            if iteration is None:
+                return []
+            # the iterations of the job are mapped to runs by the index of the same name
+            if job_name not in self._indexes:
+                self._indexes[job_name] = RunIndex(self._eqi_dir, job_name).read()
+            runs = self._indexes[job_name]
+            return runs[iteration] if iteration < len(runs) else []
+
+        for final_task in TasksManager.FINAL_TASKS:
+            if job_name.startswith(final_task + '_'):
+                return [job_name[len(final_task) + 1:]]
+
+        return []
+
+    def get_task(self, name, key=None, after=None, index=None):
         task = self._tasks.get(name)
         task_type = task.get_type()
 
         ready_task = None
 
-        if key:
+        if index:
+            switcher = {
+                TaskType.ENCODING: self._prepare_encoding_task_indexed,
+                TaskType.EXECUTION: self._prepare_exec_task_indexed,
+                TaskType.ENCODING_AND_EXECUTION: self._prepare_encoding_and_exec_task_indexed,
+                TaskType.DECODING: self._prepare_decoding_task_indexed,
+            }
+            task_method = switcher.get(task_type)
+            ready_task = task_method(task, index)
+        elif key:
             switcher = {
                 TaskType.ENCODING: self._prepare_encoding_task,
                 TaskType.EXECUTION: self._prepare_exec_task,
                 TaskType.ENCODING_AND_EXECUTION: self._prepare_encoding_and_exec_task,
+                TaskType.DECODING: self._prepare_decoding_task,
             }
             task_method = switcher.get(task_type)
             ready_task = task_method(task, key)
-        elif key_max:
-            switcher = {
-                TaskType.ENCODING: self._prepare_encoding_task_iterative,
-                TaskType.EXECUTION: self._prepare_exec_task_iterative,
-                TaskType.ENCODING_AND_EXECUTION: self._prepare_encoding_and_exec_task_iterative,
-            }
-            task_method = switcher.get(task_type)
-            ready_task = task_method(task, key_max, key_min)
 
-        self._fill_task_with_common_params(ready_task, task.get_resume_level(), task.get_requirements(), after)
+        requirements = task.get_requirements()
+        if key and task_type in (TaskType.EXECUTION, TaskType.ENCODING_AND_EXECUTION):
+            requirements = task.get_run_requirements(self._runs_params.get(key))
+
+        self._fill_task_with_common_params(ready_task, task.get_resume_level(), requirements, after,
+                                           task.get_params().get("outputs"))
+
+        if task.get_params().get("encoder_service") and \
+                task_type in (TaskType.ENCODING, TaskType.ENCODING_AND_EXECUTION):
+            ready_task["execution"]["env"].update({"EQI_ENCODER_SOCKET": self._get_encoder_socket()})
+
+        cache_dir = task.get_params().get("cache_dir")
+        if cache_dir and task_type in (TaskType.EXECUTION, TaskType.ENCODING_AND_EXECUTION):
+            ready_task["execution"]["env"].update({"EQI_CACHE_DIR": abspath(cache_dir)})
+            if task.get_params().get("cache_size"):
+                ready_task["execution"]["env"].update({"EQI_CACHE_SIZE": str(task.get_params()["cache_size"])})
+            if task.get_params().get("cache_links"):
+                ready_task["execution"]["env"].update({"EQI_CACHE_LINKS": "1"})
 
         return ready_task
 
@@ -53,43 +186,89 @@ class TasksManager:
             key
         ]
 
+        label = _get_label(key)
+
         encode_task = {
-            "name": 'encode_' + key,
+            "name": 'encode_' + label,
             "execution": {
                 "model": model,
                 "exec": 'easyvvuq_encode',
                 "args": enc_args,
-                "stdout": f"encode_{key}.stdout",
-                "stderr": f"encode_{key}.stderr"
+                "stdout": f"encode_{label}.stdout",
+                "stderr": f"encode_{label}.stderr"
             }
         }
 
         return encode_task
 
-    def _prepare_encoding_task_iterative(self, task, key_max, key_min=0):
+    def _prepare_encoding_task_indexed(self, task, index):
 
         model = task.get_model()
 
-        key = "Run_${it}"
-
         enc_args = [
-            key,
+            index.get_reference()
         ]
 
         encode_task = {
             "name": "encode",
-            "iteration": {"stop": key_max + 1, "start": key_min},
+            "iteration": {"stop": index.get_iterations(), "start": 0},
             "execution": {
                 "model": model,
                 "exec": 'easyvvuq_encode',
                 "args": enc_args,
-                "stdout": f"encode_{key}.stdout",
-                "stderr": f"encode_{key}.stderr"
+                "stdout": "encode_chunk_${it}.stdout",
+                "stderr": "encode_chunk_${it}.stderr"
             }
         }
 
         return encode_task
 
+    def _prepare_decoding_task(self, task, key):
+
+        model = task.get_model()
+        label = _get_label(key)
+
+        dec_args = [
+            key,
+            'decode_' + label
+        ]
+
+        decode_task = {
+            "name": 'decode_' + label,
+            "execution": {
+                "model": model,
+                "exec": 'easyvvuq_decode',
+                "args": dec_args,
+                "stdout": f"decode_{label}.stdout",
+                "stderr": f"decode_{label}.stderr"
+            }
+        }
+
+        return decode_task
+
+    def _prepare_decoding_task_indexed(self, task, index):
+
+        model = task.get_model()
+
+        dec_args = [
+            index.get_reference(),
+            "decode_chunk_${it}"
+        ]
+
+        decode_task = {
+            "name": "decode",
+            "iteration": {"stop": index.get_iterations(), "start": 0},
+            "execution": {
+                "model": model,
+                "exec": 'easyvvuq_decode',
+                "args": dec_args,
+                "stdout": "decode_chunk_${it}.stdout",
+                "stderr": "decode_chunk_${it}.stderr"
+            }
+        }
+
+        return decode_task
+
     def _prepare_exec_task(self, task, key):
 
         application = task.get_params().get("application")
@@ -113,27 +292,25 @@ class TasksManager:
 
         return execute_task
 
-    def _prepare_exec_task_iterative(self, task, key_max, key_min=0):
+    def _prepare_exec_task_indexed(self, task, index):
 
         application = task.get_params().get("application")
         model = task.get_model()
 
-        key = "Run_${it}"
-
         exec_args = [
-            key,
+            index.get_reference(),
             application
         ]
 
         execute_task = {
             "name": "execute",
-            "iteration": {"stop": key_max + 1, "start": key_min},
+            "iteration": {"stop": index.get_iterations(), "start": 0},
             "execution": {
                 "model": model,
                 "exec": 'easyvvuq_execute',
                 "args": exec_args,
-                "stdout": f"execute_{key}.stdout",
-                "stderr": f"execute_{key}.stderr"
+                "stdout": "execute_${it}.stdout",
+                "stderr": "execute_${it}.stderr"
             }
         }
 
@@ -162,27 +339,25 @@ class TasksManager:
 
         return encode_execute_task
 
-    def _prepare_encoding_and_exec_task_iterative(self, task, key_max, key_min=0):
+    def _prepare_encoding_and_exec_task_indexed(self, task, index):
 
         application = task.get_params().get("application")
         model = task.get_model()
 
-        key = "Run_${it}"
-
         args = [
-            key,
+            index.get_reference(),
             application
         ]
 
         encode_execute_task = {
             "name": 'encode_execute',
-            "iteration": {"stop": key_max + 1, "start": key_min},
+            "iteration": {"stop": index.get_iterations(), "start": 0},
             "execution": {
                 "model": model,
                 "exec": 'easyvvuq_encode_execute',
                 "args": args,
-                "stdout": f"encode_execute_{key}.stdout",
-                "stderr": f"encode_execute_{key}.stderr"
+                "stdout": "encode_execute_${it}.stdout",
+                "stderr": "encode_execute_${it}.stderr"
             }
         }
 
@@ -211,33 +386,7 @@ class TasksManager:
 
         return execute_task
 
-    def _get_exec_only_task_iterative(self, task, key_max, key_min=0):
-
-        application = task.get_params().get("application")
-        model = task.get_model()
-
-        key = "Run_${it}"
-
-        exec_args = [
-            key,
-            application
-        ]
-
-        execute_task = {
-            "name": 'execute',
-            "iteration": {"stop": key_max + 1, "start": key_min},
-            "execution": {
-                "model": model,
-                "exec": 'easyvvuq_execute',
-                "args": exec_args,
-                "stdout": f"execute_{key}.stdout",
-                "stderr": f"execute_{key}.stderr"
-            }
-        }
-
-        return execute_task
-
-    def _fill_task_with_common_params(self, task, resume_level, requirements=None, after=None,):
+    def _fill_task_with_common_params(self, task, resume_level, requirements=None, after=None, outputs=None):
 
         if requirements:
             task.update(requirements.get_resources())
@@ -247,7 +396,27 @@ class TasksManager:
                     'after': after
                 }})
 
-        task["execution"].update({"env": {"EQI_RESUME_LEVEL": resume_level.name}})
+        env = {"EQI_RESUME_LEVEL": resume_level.name}
+        # the environment of the config file captured by the Executor, so the tasks don't source it
+        if self._config_env_file:
+            env.update({"EQI_CONFIG_SNAPSHOT": self._config_env_file})
+
+        if resume_level == ResumeLevel.VERIFIED:
+            env.update({"EQI_RESUME_OUTPUTS": ','.join(outputs)})
 
         if self._config_file:
-            task["execution"].update({"env": {"EQI_CONFIG": self._config_file}})
+            env.update({"EQI_CONFIG": self._config_file})
+
+        task["execution"].update({"env": env})
+
+    def _get_encoder_socket(self):
+        # The socket is created in a local temporary directory, thus there is a separate encoder service
+        # on each node. The name is unique for the EQI directory and short enough for the UNIX socket path limit.
+        eqi_dir_hash = hashlib.md5(abspath(self._eqi_dir).encode()).hexdigest()[:16]
+        return join(gettempdir(), f"eqi-encoder-{eqi_dir_hash}.sock")
+
+
+def _get_label(key):
+    # the key may be a comma-separated list of runs processed in a single task
+    runs = key.split(',')
+    return runs[0] if len(runs) == 1 else f"{runs[0]}-{runs[-1]}"
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import socketserver
+import traceback
+
+from eqi.external_encoder import load_encoder_modules, create_worker, encode_runs
+
+__license__ = "LGPL"
+
+# The service finishes if there are no requests during this time (in seconds)
+DEFAULT_IDLE_TIMEOUT = 120
+
+# The file created in the EQI directory by the Executor, when the QCG-PJ Manager is terminated,
+# which finishes the services on all nodes
+ENCODER_STOP_FILE = '.eqi_encoder_stop'
+
+# The interval (in seconds) of checking the stop file and the inactivity of the service
+CHECK_INTERVAL = 1
+
+
+class EncoderRequestHandler(socketserver.StreamRequestHandler):
+    """Handles a single request for encoding of runs
+
+    The request is a single line with JSON document: `{"runs": ["Run_1", "Run_2", ...]}`.
+    The response is a single line with JSON document: `{"status": "OK"}`
+    or `{"status": "ERROR", "message": "..."}`.
+    """
+
+    def handle(self):
+        worker = self.server.acquire_worker()
+        try:
+            request = json.loads(self.rfile.readline())
+            encode_runs(worker, request['runs'])
+            response = {'status': 'OK'}
+            print(f"Encoded {len(request['runs'])} runs: {','.join(request['runs'])}", flush=True)
+        except Exception:
+            message = traceback.format_exc()
+            print(message, flush=True)
+            worker.campaign_db.session.rollback()
+            response = {'status': 'ERROR', 'message': message}
+        finally:
+            self.server.release_worker(worker)
+
+        self.wfile.write((json.dumps(response) + '\n').encode())
+
+
+class EncoderService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long-lived encoder of runs serving requests of tasks executed on a node
+
+    The service keeps the EasyVVUQ Workers (with the campaign, app and encoder already loaded)
+    in memory, so the encoding tasks don't need to pay for the start-up of a Python interpreter,
+    import of EasyVVUQ and recovery of the campaign. Every request is handled in a separate thread
+    with a Worker (and its database session) not used by other threads at the same time, the Workers
+    are created on demand and reused by the next requests. The threads overlap the I/O of encoding
+    (writing of input files and updates of the database), but the encoding in Python is serialised
+    by the GIL, thus the service is intended for encoders that are cheap in comparison with
+    the start-up of a process.
+
+    The service finishes after `idle_timeout` seconds without requests, or when the stop file
+    is created in the EQI directory (by `Executor.terminate_manager()`).
+
+    Parameters
+    ----------
+    socket_path : str
+        the path of a UNIX socket to listen on
+    eqi_dir : str
+        the EQI directory with the state file of a campaign
+    idle_timeout : int, optional
+        the number of seconds without requests after which the service finishes
+    """
+
+    # the tasks of a node may connect all at once
+    request_queue_size = 128
+    daemon_threads = True
+
+    def __init__(self, socket_path, eqi_dir, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self._eqi_dir = eqi_dir
+        self._workers = queue.LifoQueue()
+        self._workers.put(create_worker(eqi_dir))
+        self._socket_path = socket_path
+        self._idle_timeout = idle_timeout
+        self._last_request = time.time()
+        self._active_requests = 0
+        self._lock = threading.Lock()
+
+        # the socket may remain after the service which was not finished gracefully
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        super().__init__(socket_path, EncoderRequestHandler)
+        self.timeout = min(CHECK_INTERVAL, idle_timeout)
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self._active_requests += 1
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        super().shutdown_request(request)
+        with self._lock:
+            self._active_requests -= 1
+            self._last_request = time.time()
+
+    def acquire_worker(self):
+        try:
+            return self._workers.get_nowait()
+        except queue.Empty:
+            return create_worker(self._eqi_dir)
+
+    def release_worker(self, worker):
+        self._workers.put(worker)
+
+    def get_stop_reason(self):
+        """Returns the reason of finishing the service, None if it should keep serving"""
+
+        if os.path.exists(os.path.join(self._eqi_dir, ENCODER_STOP_FILE)):
+            return "stop requested"
+        with self._lock:
+            if not self._active_requests and time.time() - self._last_request >= self._idle_timeout:
+                return "inactivity"
+        return None
+
+    def serve_until_idle(self):
+        print(f"Encoder service listening on {self._socket_path}", flush=True)
+
+        reason = None
+        try:
+            while reason is None:
+                self.handle_request()
+                reason = self.get_stop_reason()
+        finally:
+            self.server_close()
+            if os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+
+        print(f"Encoder service finished due to {reason}", flush=True)
+
+
+if __name__ == "__main__":
+
+    load_encoder_modules(globals())
+
+    if len(sys.argv) not in (3, 4):
+        sys.exit(
+            "Usage: python3 socket_path eqi_dir [idle_timeout]"
+        )
+
+    timeout = int(sys.argv[3]) if len(sys.argv) == 4 else DEFAULT_IDLE_TIMEOUT
+    EncoderService(sys.argv[1], sys.argv[2], timeout).serve_until_idle()
@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+
+from cerberus import Validator
+
+from eqi.external_encoder import load_encoder_modules, create_worker
+
+__license__ = "LGPL"
+
+# The directory (relative to the EQI directory) where the shards with decoded results are stored
+DECODED_DIR = 'decoded'
+
+
+def decode_runs(worker, run_id_list, shard_file):
+    """Decodes outputs of the runs and stores the results in a shard file
+
+    The shard is a JSON lines file, where every line contains a document: `{"run_id": ..., "result": ...}`.
+    The runs for which the simulation is not completed (according to the decoder) are skipped.
+    The shard file is written atomically, so the incomplete shards are never merged into the campaign.
+    """
+
+    decoder = worker._active_app_decoder
+    decoderspec = worker._active_app['decoderspec']
+
+    tmp_shard_file = f'{shard_file}.tmp'
+    with open(tmp_shard_file, 'w') as shard:
+        for run_id in run_id_list:
+            run_info = worker.campaign_db.run(run_id)
+
+            if not decoder.sim_complete(run_info=run_info):
+                print(f"Simulation for the run {run_id} not completed - skipping it")
+                continue
+
+            result = decoder.parse_sim_output(run_info=run_info)
+            if decoderspec is not None:
+                validator = Validator()
+                validator.schema = decoderspec
+                if not validator.validate(result):
+                    raise RuntimeError(f"the output of the decoder failed to validate: {result}")
+
+            shard.write(json.dumps({'run_id': run_id, 'result': result}) + '\n')
+
+    os.replace(tmp_shard_file, shard_file)
+
+
+def decode(params):
+    run_id_list = params[1].split(',')
+
+    os.makedirs(DECODED_DIR, exist_ok=True)
+
+    worker = create_worker(os.getcwd())
+    decode_runs(worker, run_id_list, f'{DECODED_DIR}/{params[2]}.jsonl')
+
+
+if __name__ == "__main__":
+
+    load_encoder_modules(globals())
+
+    if len(sys.argv) != 3:
+        sys.exit(
+            "Usage: python3 comma_separated_run_id_list shard_name"
+        )
+
+    decode(sys.argv)
@@ -3,7 +3,7 @@ import sys
 import easyvvuq as uq
 import importlib
 
-from eqi import StateKeeper
+from eqi.utils.state_keeper import StateKeeper
 
 __copyright__ = """
     Copyright 2018 Robin A. Richardson, David W. Wright
@@ -22,10 +22,27 @@ __copyright__ = """
 __license__ = "LGPL"
 
 
-def encode(params):
-    run_id_list = params[1].split(',')
+def load_encoder_modules(namespace):
+    """Imports the modules listed in the ENCODER_MODULES environment variable into the namespace"""
+
+    if 'ENCODER_MODULES' in os.environ:
+        enc_modules = os.environ['ENCODER_MODULES'].split(';')
+        for m in enc_modules:
+            m = m.rstrip()
+            print("Importing encoder module: ", m)
+            module = importlib.import_module(m)
 
-    state_keeper = StateKeeper(os.getcwd())
+            namespace.update(
+                {n: getattr(module, n) for n in module.__all__} if hasattr(module, '__all__')
+                else
+                {k: v for (k, v) in module.__dict__.items() if not k.startswith('_')
+                 })
+
+
+def create_worker(eqi_dir):
+    """Creates EasyVVUQ Worker for the campaign stored in the state file of the EQI directory"""
+
+    state_keeper = StateKeeper(eqi_dir)
     state_params = state_keeper.get_from_state_file()
 
     write_to_db = state_params["campaign_write_to_db"]
@@ -41,30 +58,37 @@ def encode(params):
     else:
         sys.exit("write_to_db arg must be TRUE or FALSE")
 
-    worker = uq.Worker(
+    return uq.Worker(
         db_type=db_type,
         db_location=db_location,
         campaign_name=campaign_name,
         app_name=app_name,
         write_to_db=write_to_db_bool)
 
-    worker.encode_runs(run_id_list)
 
+def encode_runs(worker, run_id_list):
+    """Encodes the runs with the Worker, skipping the runs that are already encoded in the campaign
+    (e.g. with `populate_runs_dir()`)"""
 
-if __name__ == "__main__":
+    runs_dir = worker.campaign_db.runs_dir()
+    run_id_list = [run_id for run_id in run_id_list
+                   if not (os.path.exists(os.path.join(runs_dir, run_id)) and
+                           worker.campaign_db.get_run_status(run_id) == uq.constants.Status.ENCODED)]
 
-    if 'ENCODER_MODULES' in os.environ:
-        enc_modules = os.environ['ENCODER_MODULES'].split(';')
-        for m in enc_modules:
-            m = m.rstrip()
-            print("Importing encoder module: ", m)
-            module = importlib.import_module(m)
+    if run_id_list:
+        worker.encode_runs(run_id_list)
 
-            globals().update(
-                {n: getattr(module, n) for n in module.__all__} if hasattr(module, '__all__')
-                else
-                {k: v for (k, v) in module.__dict__.items() if not k.startswith('_')
-                 })
+
+def encode(params):
+    run_id_list = params[1].split(',')
+
+    worker = create_worker(os.getcwd())
+    encode_runs(worker, run_id_list)
+
+
+if __name__ == "__main__":
+
+    load_encoder_modules(globals())
 
     if len(sys.argv) != 2:
         sys.exit(
@@ -0,0 +1,314 @@
+import os
+import sys
+import json
+import stat
+import time
+import fcntl
+import errno
+import shutil
+import socket
+import hashlib
+import subprocess
+
+from glob import glob
+from tempfile import mkdtemp
+
+from eqi.resume_engine import scan_run_dir, diff_snapshot, hash_file
+
+__license__ = "LGPL"
+
+# The default bound of the total size of outputs stored in a cache (in bytes)
+DEFAULT_CACHE_SIZE = 10 * 1024 ** 3
+
+# The prefix of EQI files in run directories, never treated as inputs or outputs of an application
+EQI_FILES_PFX = '.eqi_'
+
+ENTRIES_DIR = 'entries'
+STATS_FILE_PFX = 'stats_'
+LOCK_FILE = '.lock'
+META_FILE = 'meta.json'
+OUTPUTS_DIR = 'outputs'
+
+STAT_HIT = 'HIT'
+STAT_MISS = 'MISS'
+STAT_EVICTED = 'EVICTED'
+
+# The write permissions removed from the files of an entry shared with the restored outputs by hardlinks
+WRITE_PERMISSIONS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+class ResultCache:
+    """Content-addressed cache of outputs of executions, shared between campaigns
+
+    The entries of the cache are keyed by the hash of the input files of a run directory (the files present
+    before the execution) and the application command. On a cache hit, the outputs of the previous execution
+    (the files created or modified by it) are copied to the run directory and the application is not executed.
+    Optionally, the outputs are restored with hardlinks (or copies, if the cache is on a different file system),
+    then the files of the entry are made read-only, so an in-place write to a restored output fails instead
+    of silently corrupting the entry for all future hits.
+    The total size of stored outputs is bounded, the least recently used entries are evicted first.
+    The cache may be used concurrently by many tasks on many nodes.
+
+    Parameters
+    ----------
+    cache_dir : str
+        the directory of the cache, created if not existing
+    max_size : int, optional
+        the bound of the total size of outputs stored in the cache (in bytes)
+    link_outputs : bool, optional
+        if True, the outputs are restored with read-only hardlinks to the files of the entry instead of copies
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_CACHE_SIZE, link_outputs=False):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._link_outputs = link_outputs
+        os.makedirs(os.path.join(cache_dir, ENTRIES_DIR), exist_ok=True)
+
+    def get_key(self, run_dir, command):
+        """Returns the key of a cache entry for the inputs of a run directory and an application command
+
+        Parameters
+        ----------
+        run_dir : str
+            the run directory with the input files
+        command : str
+            the application command
+
+        Returns
+        -------
+        str
+            the hex digest of the key
+        """
+        sha = hashlib.sha256(command.encode())
+        for path, size, _ in scan_run_dir(run_dir):
+            if size >= 0 and not os.path.basename(path).startswith(EQI_FILES_PFX):
+                sha.update(f'\0{path}\0{hash_file(os.path.join(run_dir, path))}'.encode())
+        return sha.hexdigest()
+
+    def execute(self, run_dir, args, hit_file=None):
+        """Executes the application in a run directory, or restores its outputs from the cache
+
+        Parameters
+        ----------
+        run_dir : str
+            the run directory, the working directory of the application
+        args : list of str
+            the application command with arguments
+        hit_file : str, optional
+            the path (relative to the run directory) of the file created for a cache hit,
+            so the callers may tell the restored outputs from the execution of the application
+
+        Returns
+        -------
+        int
+            the exit code of the application, 0 for a cache hit
+        """
+        key = self.get_key(run_dir, ' '.join(args))
+
+        if self._restore(key, run_dir):
+            if hit_file:
+                open(os.path.join(run_dir, hit_file), 'w').close()
+            return 0
+
+        inputs = scan_run_dir(run_dir)
+        start = time.time()
+        exit_code = subprocess.call(args, cwd=run_dir)
+        duration = time.time() - start
+
+        self._append_stat(STAT_MISS, key, duration)
+        if exit_code == 0:
+            self._store(key, run_dir, inputs, duration)
+
+        return exit_code
+
+    def get_stats(self):
+        """Returns the statistics of the cache usage, aggregated from all nodes
+
+        Returns
+        -------
+        dict
+            the numbers of hits, misses and evicted entries, the hit ratio, the execution time saved
+            by hits (in seconds), and the current number of entries and their total size (in bytes)
+        """
+        stats = {'hits': 0, 'misses': 0, 'evicted': 0, 'saved_time': 0.0}
+        for stats_file in glob(os.path.join(self._cache_dir, f'{STATS_FILE_PFX}*')):
+            with open(stats_file, 'r') as f:
+                for line in f:
+                    fields = line.split()
+                    # the last line may be incomplete if a task was killed while appending it
+                    if len(fields) != 3 or not line.endswith('\n'):
+                        continue
+                    if fields[0] == STAT_HIT:
+                        stats['hits'] += 1
+                        stats['saved_time'] += float(fields[2])
+                    elif fields[0] == STAT_MISS:
+                        stats['misses'] += 1
+                    elif fields[0] == STAT_EVICTED:
+                        stats['evicted'] += 1
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+
+        entries = self._list_entries()
+        stats['entries'] = len(entries)
+        stats['size'] = sum(size for _, size, _ in entries)
+        return stats
+
+    def _entry_dir(self, key):
+        return os.path.join(self._cache_dir, ENTRIES_DIR, key[:2], key)
+
+    def _restore(self, key, run_dir):
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, META_FILE), 'r') as f:
+                meta = json.load(f)
+            # the access time of an entry is its modification time, used for the LRU eviction
+            os.utime(os.path.join(entry_dir, META_FILE))
+
+            outputs_dir = os.path.join(entry_dir, OUTPUTS_DIR)
+            restore_file = _link_read_only if self._link_outputs else _copy_writable
+            for rel_path in meta['outputs']:
+                src, dst = os.path.join(outputs_dir, rel_path), os.path.join(run_dir, rel_path)
+                if os.path.isdir(dst) and not os.path.islink(dst):
+                    shutil.rmtree(dst)
+                elif os.path.lexists(dst):
+                    os.remove(dst)
+                if os.path.isdir(src) and not os.path.islink(src):
+                    shutil.copytree(src, dst, symlinks=True, copy_function=restore_file)
+                else:
+                    restore_file(src, dst)
+        except (OSError, ValueError, KeyError):
+            # a missing entry, or the entry evicted during the restore by another task
+            return False
+
+        print(f"Outputs restored from the result cache entry {key}")
+        self._append_stat(STAT_HIT, key, meta.get('duration', 0.0))
+        return True
+
+    def _store(self, key, run_dir, inputs, duration):
+        if os.path.exists(self._entry_dir(key)):
+            return
+
+        new_entries, modified = diff_snapshot(inputs, scan_run_dir(run_dir))
+        outputs = [path for path, _ in new_entries] + modified
+        outputs = [path for path in outputs if not os.path.basename(path).startswith(EQI_FILES_PFX)]
+
+        # the entry is prepared in a temporary directory and moved to its place atomically
+        tmp_dir = mkdtemp(prefix='.tmp-', dir=os.path.join(self._cache_dir, ENTRIES_DIR))
+        try:
+            size = 0
+            for rel_path in outputs:
+                src, dst = os.path.join(run_dir, rel_path), os.path.join(tmp_dir, OUTPUTS_DIR, rel_path)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if os.path.isdir(src) and not os.path.islink(src):
+                    shutil.copytree(src, dst, symlinks=True)
+                else:
+                    shutil.copy2(src, dst, follow_symlinks=False)
+                size += _get_size(dst)
+
+            if size > self._max_size:
+                print(f"Outputs larger than the result cache ({size} B), not stored")
+                return
+
+            with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+                json.dump({'outputs': outputs, 'size': size, 'duration': duration}, f)
+
+            os.makedirs(os.path.dirname(self._entry_dir(key)), exist_ok=True)
+            try:
+                os.rename(tmp_dir, self._entry_dir(key))
+            except OSError as e:
+                # the same entry has been stored concurrently by another task
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+                return
+        finally:
+            if os.path.exists(tmp_dir):
+                shutil.rmtree(tmp_dir)
+
+        print(f"Outputs stored in the result cache entry {key}")
+        self._evict()
+
+    def _evict(self):
+        # only one task evicts the entries at a time, others wait on the lock
+        with open(os.path.join(self._cache_dir, LOCK_FILE), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            entries = self._list_entries()
+            total_size = sum(size for _, size, _ in entries)
+            for entry_dir, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if total_size <= self._max_size:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total_size -= size
+                self._append_stat(STAT_EVICTED, os.path.basename(entry_dir), size)
+
+    def _list_entries(self):
+        """Returns the entries as tuples: (directory, size, access time)"""
+
+        entries = []
+        for meta_file in glob(os.path.join(self._cache_dir, ENTRIES_DIR, '*', '*', META_FILE)):
+            try:
+                with open(meta_file, 'r') as f:
+                    size = json.load(f)['size']
+                entries.append((os.path.dirname(meta_file), size, os.stat(meta_file).st_mtime))
+            except (OSError, ValueError, KeyError):
+                continue
+        return entries
+
+    def _append_stat(self, stat, key, value):
+        # a single, atomic write of a line to the statistics of the node
+        fd = os.open(os.path.join(self._cache_dir, f'{STATS_FILE_PFX}{socket.gethostname()}'),
+                     os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, f'{stat} {key} {value}\n'.encode())
+        finally:
+            os.close(fd)
+
+
+def _link_read_only(src, dst):
+    if not os.path.islink(src):
+        mode = os.lstat(src).st_mode
+        if mode & WRITE_PERMISSIONS:
+            os.chmod(src, mode & ~WRITE_PERMISSIONS)
+    try:
+        os.link(src, dst, follow_symlinks=False)
+    except OSError:
+        _copy_writable(src, dst)
+    return dst
+
+
+def _copy_writable(src, dst):
+    shutil.copy2(src, dst, follow_symlinks=False)
+    # the files of the entry may have been made read-only for the hardlinks
+    if not os.path.islink(dst):
+        os.chmod(dst, os.lstat(dst).st_mode | stat.S_IWUSR)
+    return dst
+
+
+def _get_size(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+    return os.lstat(path).st_size
+
+
+def print_stats(stats):
+    print(f"Hits: {stats['hits']}, misses: {stats['misses']}, hit ratio: {100 * stats['hit_ratio']:.1f}%")
+    print(f"Execution time saved: {stats['saved_time']:.1f} s")
+    print(f"Entries: {stats['entries']}, size: {stats['size']} B, evicted entries: {stats['evicted']}")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 3 or (sys.argv[1] == 'stats' and len(sys.argv) != 3):
+        sys.exit(
+            "Usage: python3 -m eqi.result_cache cache_dir command [args...]\n"
+            "       python3 -m eqi.result_cache stats cache_dir"
+        )
+
+    if sys.argv[1] == 'stats':
+        print_stats(ResultCache(sys.argv[2]).get_stats())
+    else:
+        cache = ResultCache(sys.argv[1], int(os.environ.get('EQI_CACHE_SIZE', DEFAULT_CACHE_SIZE)),
+                            os.environ.get('EQI_CACHE_LINKS') == '1')
+        sys.exit(cache.execute(os.getcwd(), sys.argv[2:], os.environ.get('EQI_CACHE_HIT_FILE')))
@@ -0,0 +1,476 @@
+import os
+import sys
+import json
+import contextlib
+import zlib
+import base64
+import hashlib
+import shutil
+import socket
+import binascii
+
+from glob import glob
+
+from eqi.core.resume import ResumeJournal, JOURNAL_FILE_PFX, SNAPSHOTS_FILE_PFX, OUTPUTS_MANIFEST_PFX, \
+    RECORD_NO_DIR, RECORD_STARTED, RECORD_COMPLETED
+
+__license__ = "LGPL"
+
+# The directory (relative to the EQI directory) with the run directories
+RUNS_DIR = '../runs'
+
+# The size of blocks in which the output files are read for hashing
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def scan_run_dir(base_dir):
+    """Lists the content of a run directory
+
+    Parameters
+    ----------
+    base_dir : str
+        the run directory
+
+    Returns
+    -------
+    list of (str, int, int)
+        the entries in the snapshot order: the paths relative to the run directory, the sizes
+        (-1 for directories) and the modification times in nanoseconds
+    """
+    entries = []
+    dirs = ['']
+    while dirs:
+        rel_dir = dirs.pop()
+        with os.scandir(os.path.join(base_dir, rel_dir)) as it:
+            for entry in it:
+                rel_path = os.path.join(rel_dir, entry.name)
+                stat = entry.stat(follow_symlinks=False)
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append((rel_path, -1, stat.st_mtime_ns))
+                    dirs.append(rel_path)
+                else:
+                    entries.append((rel_path, stat.st_size, stat.st_mtime_ns))
+
+    entries.sort(key=lambda entry: _sort_key(entry[0]))
+    return entries
+
+
+def _sort_key(path):
+    # the separators sort before any other character, so the content of a directory directly follows it
+    return path.replace(os.sep, '\0')
+
+
+def store_snapshot(eqi_dir, run_id, phase, entries):
+    """Stores the snapshot of a run directory in the snapshot journal of the node
+
+    The snapshot is stored as a single line: `<RUN_ID> <PHASE> <DATA>`, where the data is the list of entries,
+    compressed and encoded in base64. Every entry shares a prefix of the path and the modification time
+    with the previous one, so only the differences are stored. The line is appended with a single write,
+    and the not complete lines of killed tasks are ignored on read, so the snapshot is never partially restored.
+    """
+    lines = []
+    prev_path, prev_mtime = '', 0
+    for path, size, mtime in entries:
+        common = len(os.path.commonprefix([prev_path, path]))
+        lines.append(f'{common}\t{path[common:]}\t{size}\t{mtime - prev_mtime}')
+        prev_path, prev_mtime = path, mtime
+
+    encoded = base64.b64encode(zlib.compress('\n'.join(lines).encode(), 9)).decode()
+
+    _append_line(os.path.join(eqi_dir, f'{SNAPSHOTS_FILE_PFX}{socket.gethostname()}'),
+                 f'{run_id} {phase} {encoded}\n')
+
+
+def load_snapshot(eqi_dir, run_id, phase):
+    """Returns the snapshot of a run directory stored in the snapshot journal, None if not stored"""
+
+    return load_snapshots(eqi_dir, {(run_id, phase)}).get((run_id, phase))
+
+
+def load_snapshots(eqi_dir, keys, journal=None):
+    """Returns the snapshots of run directories stored in the snapshot journal
+
+    If the journal has been indexed at the submission of tasks, the snapshots are read directly
+    at their locations. Otherwise, the snapshot journals are read in a single pass for all requested runs' phases.
+
+    Parameters
+    ----------
+    eqi_dir : str
+        the EQI directory
+    keys : set of (str, str)
+        the ids of runs and the phases
+    journal : ResumeJournal, optional
+        the journal of the EQI directory, with the locations of snapshots
+
+    Returns
+    -------
+    dict((str, str), list of (str, int, int))
+        the entries of the stored snapshots, keyed by the runs and phases
+    """
+    snapshots = {}
+    if not keys:
+        return snapshots
+
+    locations = journal.get_snapshot_locations(keys) if journal else None
+    if locations is not None:
+        offsets = {}
+        for snapshots_file, offset in locations.values():
+            offsets.setdefault(snapshots_file, []).append(offset)
+        for snapshots_file, file_offsets in offsets.items():
+            with open(os.path.join(eqi_dir, snapshots_file), 'rb') as snapshots_journal:
+                for offset in sorted(file_offsets):
+                    snapshots_journal.seek(offset)
+                    _parse_snapshot(snapshots_journal.readline().decode(), keys, snapshots)
+        return snapshots
+
+    for snapshot_file in glob(os.path.join(eqi_dir, f'{SNAPSHOTS_FILE_PFX}*')):
+        with open(snapshot_file, 'r') as snapshots_journal:
+            for line in snapshots_journal:
+                _parse_snapshot(line, keys, snapshots)
+
+    return snapshots
+
+
+def _parse_snapshot(line, keys, snapshots):
+    fields = line.split(' ', 2)
+    if len(fields) != 3 or (fields[0], fields[1]) not in keys or not line.endswith('\n'):
+        return
+    try:
+        data = zlib.decompress(base64.b64decode(fields[2])).decode()
+    except (binascii.Error, zlib.error):
+        return
+
+    entries = []
+    path, mtime = '', 0
+    for entry in data.splitlines():
+        common, entry = entry.split('\t', 1)
+        suffix, size, mtime_delta = entry.rsplit('\t', 2)
+        path = path[:int(common)] + suffix
+        mtime += int(mtime_delta)
+        entries.append((path, int(size), mtime))
+    # the first snapshot of a run's phase is valid, the resumed tasks don't store it again
+    snapshots.setdefault((fields[0], fields[1]), entries)
+
+
+def diff_snapshot(snapshot, entries):
+    """Compares the snapshot with the current entries of a run directory with a sorted merge
+
+    Parameters
+    ----------
+    snapshot : list of (str, int, int)
+        the entries of a run directory stored in a snapshot
+    entries : list of (str, int, int)
+        the current entries of a run directory, as returned by `scan_run_dir`
+
+    Returns
+    -------
+    (list of (str, bool), list of str)
+        the new entries, with the information if the entry is a directory, and the paths of files
+        modified since the snapshot. The content of new directories is not listed
+    """
+    new_entries = []
+    modified = []
+    new_dir_prefix = None
+
+    position = 0
+    for path, size, mtime in entries:
+        key = _sort_key(path)
+        while position < len(snapshot) and _sort_key(snapshot[position][0]) < key:
+            position += 1
+
+        if position < len(snapshot) and snapshot[position][0] == path:
+            if size >= 0 and (size, mtime) != snapshot[position][1:]:
+                modified.append(path)
+        elif new_dir_prefix is None or not path.startswith(new_dir_prefix):
+            new_entries.append((path, size < 0))
+            if size < 0:
+                new_dir_prefix = path + os.sep
+
+    return new_entries, modified
+
+
+def basic_clean(base_dir):
+    """Removes the run directory created by the previous, not completed task"""
+
+    if os.path.isdir(base_dir):
+        print(f"Removing run dir to start from the scratch: {base_dir}")
+        shutil.rmtree(base_dir)
+    else:
+        print(f"Starting from the scratch, the run dir not existing yet {base_dir}")
+
+
+def moderate_clean(snapshot, base_dir):
+    """Restores the run directory to the state stored in a snapshot
+
+    All files and directories not present in the snapshot are removed. The new directories
+    are removed as a whole. The files modified since the snapshot are only reported.
+    """
+    print("Checking for possibly broken files from previous execution")
+
+    new_entries, modified = diff_snapshot(snapshot, scan_run_dir(base_dir))
+
+    for path in modified:
+        print(f"File modified since the start of the previous execution, keeping it: {path}")
+
+    removed_dirs = 0
+    for rel_path, is_dir in new_entries:
+        path = os.path.join(base_dir, rel_path)
+        if is_dir:
+            shutil.rmtree(path)
+            removed_dirs += 1
+        else:
+            os.unlink(path)
+
+    print(f"Removed {len(new_entries) - removed_dirs} files and {removed_dirs} directories "
+          f"not present at the start of the previous execution")
+
+
+def hash_file(path):
+    """Returns the SHA-256 hash of a file's content"""
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def record_outputs(base_dir, phase, outputs):
+    """Stores the content hashes of the declared output files of a run's phase in the run directory
+
+    Parameters
+    ----------
+    base_dir : str
+        the run directory
+    phase : str
+        the phase of processing
+    outputs : list of str
+        the glob patterns of output files, relative to the run directory, every pattern must match a file
+    """
+    files = {}
+    for pattern in outputs:
+        paths = [path for path in glob(os.path.join(base_dir, pattern)) if os.path.isfile(path)]
+        if not paths:
+            raise FileNotFoundError(f"No output file matching '{pattern}' in {base_dir}")
+        for path in paths:
+            files[os.path.relpath(path, base_dir)] = {'size': os.path.getsize(path), 'sha256': hash_file(path)}
+
+    manifest_file = os.path.join(base_dir, f'{OUTPUTS_MANIFEST_PFX}{phase}')
+    with open(f'{manifest_file}.tmp', 'w') as manifest:
+        json.dump(files, manifest)
+    os.replace(f'{manifest_file}.tmp', manifest_file)
+
+    print(f"Stored the hashes of {len(files)} output files")
+
+
+def verify_outputs(base_dir, phase):
+    """Checks the output files of a run's phase against the hashes stored at its completion
+
+    Returns
+    -------
+    bool or None
+        True if all outputs are intact, False if any of them is missing or corrupted,
+        None if the hashes have not been stored. The manifest of not intact outputs is removed
+    """
+    manifest_file = os.path.join(base_dir, f'{OUTPUTS_MANIFEST_PFX}{phase}')
+    try:
+        with open(manifest_file, 'r') as manifest:
+            files = json.load(manifest)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        files = None
+
+    for rel_path, expected in (files or {}).items():
+        path = os.path.join(base_dir, rel_path)
+        if not os.path.isfile(path) or os.path.getsize(path) != expected['size'] or \
+                hash_file(path) != expected['sha256']:
+            print(f"Output file missing or corrupted: {rel_path}")
+            break
+    else:
+        if files is not None:
+            return True
+
+    os.remove(manifest_file)
+    return False
+
+
+def init_tasks(eqi_dir, run_ids, phase, resume_level):
+    """Prepares the processing of a phase of many runs, e.g. of a chunk processed by a single task
+
+    The journal and the snapshots are read once, for all runs.
+
+    Parameters
+    ----------
+    eqi_dir : str
+        the EQI directory
+    run_ids : list of str
+        the ids of runs
+    phase : str
+        the phase of processing, e.g. `encode`, `execute` or `encode_execute`
+    resume_level : str
+        the name of the ResumeLevel
+
+    Returns
+    -------
+    list of str
+        the runs, for which the phase should be processed, i.e. it is not completed yet
+    """
+    journal = ResumeJournal(eqi_dir, before_cutoff=True)
+    snapshots = {}
+    if resume_level in ('MODERATE', 'VERIFIED'):
+        snapshots = load_snapshots(eqi_dir, {(run_id, phase) for run_id in run_ids
+                                             if RECORD_STARTED in journal.get_records(run_id, phase)}, journal)
+
+    return [run_id for run_id in run_ids
+            if not init_task(eqi_dir, run_id, phase, resume_level, journal, snapshots)]
+
+
+def finish_tasks(eqi_dir, run_ids, phase, resume_level, outputs):
+    """Records the completion of a phase of many runs, see `finish_task`"""
+
+    for run_id in run_ids:
+        finish_task(eqi_dir, run_id, phase, resume_level, outputs)
+
+
+def init_task(eqi_dir, run_id, phase, resume_level, journal=None, snapshots=None):
+    """Prepares the processing of a run's phase for a possible resume
+
+    If the phase has been started previously, but not completed, the run directory is cleaned
+    according to the resume level. Next, the start of the phase is recorded in the journal.
+    For the VERIFIED level, the phase is completed if its outputs are intact, and it is processed again
+    if they are missing, corrupted or their hashes are not stored, regardless of the journal.
+
+    Parameters
+    ----------
+    eqi_dir : str
+        the EQI directory
+    run_id : str
+        the id of the run
+    phase : str
+        the phase of processing, e.g. `encode`, `execute` or `encode_execute`
+    resume_level : str
+        the name of the ResumeLevel
+    journal : ResumeJournal, optional
+        the journal of the EQI directory, read again if not given
+    snapshots : dict, optional
+        the snapshots of run directories loaded by `load_snapshots`, read again if not given
+
+    Returns
+    -------
+    bool
+        True if the phase is already completed and its processing should be skipped
+    """
+    print(f"Initialisation of data for resume of {run_id} in {resume_level} level")
+    base_dir = os.path.normpath(os.path.join(eqi_dir, RUNS_DIR, run_id))
+    moderate = resume_level in ('MODERATE', 'VERIFIED')
+
+    print("Checking for previously uncompleted execution")
+    records = set((journal or ResumeJournal(eqi_dir, before_cutoff=True)).get_records(run_id, phase))
+
+    if resume_level == 'VERIFIED':
+        intact = verify_outputs(base_dir, phase) if os.path.isdir(base_dir) else None
+        if intact:
+            print("The outputs of the task are intact, we can skip its processing")
+            if RECORD_COMPLETED not in records:
+                append_record(eqi_dir, RECORD_COMPLETED, run_id, phase)
+            return True
+        # the completion recorded in the journal is not trusted without the hashes, which are removed
+        # if the outputs are corrupted, so also the killed processing of such outputs is started again
+        if intact is False or RECORD_COMPLETED in records:
+            print("The outputs of the task are not intact, it will be processed again")
+        records.discard(RECORD_COMPLETED)
+
+    snapshot = None
+    if not records:
+        print("Fresh startup, nothing to clean")
+    elif RECORD_COMPLETED in records:
+        print("The task is already completed, we can skip its processing")
+        return True
+    elif RECORD_NO_DIR in records:
+        print("Previous task execution found - performing a cleanup")
+        basic_clean(base_dir)
+    elif moderate:
+        snapshot = load_snapshot(eqi_dir, run_id, phase) if snapshots is None \
+            else snapshots.get((run_id, phase))
+        if snapshot is not None:
+            print("Previous task execution found - performing a cleanup")
+            moderate_clean(snapshot, base_dir)
+
+    print("Storing initial state of a task")
+    if not os.path.exists(base_dir):
+        append_record(eqi_dir, RECORD_NO_DIR, run_id, phase)
+    else:
+        # The snapshot of a resumed task is already stored, and the run dir has been restored to this state
+        if moderate and snapshot is None:
+            store_snapshot(eqi_dir, run_id, phase, scan_run_dir(base_dir))
+        append_record(eqi_dir, RECORD_STARTED, run_id, phase)
+
+    return False
+
+
+def finish_task(eqi_dir, run_id, phase, resume_level, outputs):
+    """Records the completion of a run's phase
+
+    For the VERIFIED level, the content hashes of the output files are stored in the run directory first.
+
+    Parameters
+    ----------
+    eqi_dir : str
+        the EQI directory
+    run_id : str
+        the id of the run
+    phase : str
+        the phase of processing, e.g. `encode`, `execute` or `encode_execute`
+    resume_level : str
+        the name of the ResumeLevel
+    outputs : list of str
+        the glob patterns of output files, relative to the run directory
+    """
+    print("Marking completion of task")
+
+    if resume_level == 'VERIFIED':
+        record_outputs(os.path.normpath(os.path.join(eqi_dir, RUNS_DIR, run_id)), phase, outputs)
+
+    append_record(eqi_dir, RECORD_COMPLETED, run_id, phase)
+
+
+def append_record(eqi_dir, record, run_id, phase):
+    """Appends a record to the journal of the node with a single, atomic write"""
+
+    _append_line(os.path.join(eqi_dir, f'{JOURNAL_FILE_PFX}{socket.gethostname()}'),
+                 f'{record} {run_id} {phase}\n')
+
+
+def _append_line(path, line):
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+
+
+def main(argv):
+    if len(argv) != 4 or argv[0] not in ('init', 'finish'):
+        sys.exit(
+            "Usage: eqi_run_module eqi.resume_engine init|finish run_id[,run_id...] phase resume_level"
+        )
+
+    action, runs, run_phase, level = argv
+    run_ids = [run_id for run_id in runs.split(',') if run_id]
+
+    # the runs to process are printed to stdout for the task script, the messages of the engine to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        if action == 'init':
+            run_ids = init_tasks(os.getcwd(), run_ids, run_phase, level)
+        else:
+            declared_outputs = [pattern for pattern in os.environ.get('EQI_RESUME_OUTPUTS', '').split(',')
+                                if pattern]
+            finish_tasks(os.getcwd(), run_ids, run_phase, level, declared_outputs)
+
+    if action == 'init':
+        print(','.join(run_ids))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
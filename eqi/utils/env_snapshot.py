@@ -0,0 +1,108 @@
+import os
+import re
+import shlex
+import subprocess
+
+# Separates the environment before and after sourcing of the config file in the output of the capturing script
+_SEPARATOR = 'EQI_ENV_SNAPSHOT_SEPARATOR'
+
+# Sources the config file (given as $1) between two dumps of the environment. The output of the config file
+# goes to stderr, so it doesn't interfere with the dumps
+_CAPTURE_SCRIPT = f'''
+env -0
+printf '{_SEPARATOR}\\0'
+. "$1" 1>&2 || exit $?
+env -0
+'''
+
+# The variables set by the shell itself, never passed to tasks
+_SHELL_VARIABLES = {'_', 'SHLVL', 'PWD', 'OLDPWD'}
+
+# The names of the environment variables of the exported bash functions
+_FUNCTION_VARIABLE = re.compile(r'BASH_FUNC_(.+)%%')
+_VARIABLE_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def capture_config_environment(config_file, timeout=600):
+    """Returns the changes of the environment made by sourcing of the config file
+
+    The config file is sourced once, in a bash shell started with the environment of the current process,
+    and the environment variables (including exported functions, e.g. `module`) added or modified
+    by the config file are returned, so they may be set in the environment of tasks instead of sourcing
+    the config file in every task. The variables removed by the config file are not reported.
+
+    Parameters
+    ----------
+    config_file : str
+        the path to the config file
+    timeout : float, optional
+        the maximal time (in seconds) of sourcing of the config file
+
+    Returns
+    -------
+    dict(str, str)
+        the added or modified environment variables
+
+    Raises
+    ------
+    RuntimeError
+        if sourcing of the config file failed
+    """
+    try:
+        result = subprocess.run(['bash', '-c', _CAPTURE_SCRIPT, 'eqi_env_snapshot', config_file],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"Sourcing of the config file {config_file} failed: {e}") from e
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Sourcing of the config file {config_file} failed with exit code "
+                           f"{result.returncode}: {result.stderr.decode(errors='replace').strip()}")
+
+    entries = result.stdout.decode(errors='surrogateescape').split('\0')
+    separator = entries.index(_SEPARATOR)
+    before, after = _parse_env(entries[:separator]), _parse_env(entries[separator + 1:])
+
+    return {name: value for name, value in after.items()
+            if before.get(name) != value and name not in _SHELL_VARIABLES}
+
+
+def _parse_env(entries):
+    env = {}
+    for entry in entries:
+        name, sep, value = entry.partition('=')
+        if sep:
+            env[name] = value
+    return env
+
+
+def write_environment_script(env, path):
+    """Writes the environment variables as a bash script, which exports them when sourced
+
+    The exported functions (e.g. `module`) are defined and exported again. The variables
+    with names not valid in bash are skipped. The script is replaced atomically.
+
+    Parameters
+    ----------
+    env : dict(str, str)
+        the environment variables, e.g. captured by `capture_config_environment`
+    path : str
+        the path of the script
+    """
+    lines = []
+    for name, value in sorted(env.items()):
+        function = _FUNCTION_VARIABLE.fullmatch(name)
+        if function:
+            lines.append(f'{function.group(1)} {value}')
+            lines.append(f'export -f {function.group(1)}')
+        elif _VARIABLE_NAME.fullmatch(name):
+            lines.append(f'export {name}={shlex.quote(value)}')
+
+    with open(f'{path}.tmp', 'w') as script:
+        script.write('\n'.join(lines) + '\n')
+    os.replace(f'{path}.tmp', path)
+
+
+def get_environment_size(env):
+    """Returns the size (in bytes) of the environment variables, as passed to a process"""
+
+    return sum(len(os.fsencode(name)) + len(os.fsencode(value)) + 2 for name, value in env.items())
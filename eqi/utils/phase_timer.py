@@ -0,0 +1,137 @@
+import cProfile
+import os
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from enum import Enum
+
+# The environment variable with the comma-separated names of profilers enabled for the phases of Executor
+PROFILE_ENV_VARIABLE = 'EQI_PROFILE'
+
+
+class Profiler(Enum):
+    """ Specifies the profiler capturing the phases of processing in Executor
+    """
+
+    CPROFILE = \
+        "The calls of Python functions are profiled with cProfile, the statistics of every phase " \
+        "are stored in the `profile_<PHASE>.prof` file of the EQI directory, readable with pstats or snakeviz"
+    TRACEMALLOC = \
+        "The memory allocated by Python is traced with tracemalloc and the peak of memory allocated " \
+        "during every phase is reported. The tracing slows down the processing considerably. " \
+        "Before Python 3.9 the peak of an entry of a phase is exact only if it exceeds the peaks " \
+        "of all previous entries, otherwise the growth of memory during the entry is reported"
+
+    @staticmethod
+    def from_environment():
+        """Returns the profilers listed (by case-insensitive names) in the EQI_PROFILE environment variable"""
+
+        names = os.environ.get(PROFILE_ENV_VARIABLE, '')
+        return [Profiler[name.strip().upper()] for name in names.split(',') if name.strip()]
+
+
+class PhaseTimer:
+    """ Measures the wall time of phases of processing, optionally with profilers
+
+    A phase may be entered many times (e.g. the preparation of every task), the times are accumulated.
+    The phases should not be nested, since a single profiler is active at a time.
+
+    Parameters
+    ----------
+    profilers : iterable of Profiler, optional
+        the profilers capturing the phases
+    """
+
+    def __init__(self, profilers=()):
+        self._profilers = set(profilers)
+        self._phases = {}
+        self._profiles = {}
+        self._tracing_started = False
+
+    @contextmanager
+    def phase(self, name):
+        """Measures the time of the code executed in the context as a part of the phase of a given name"""
+
+        stats = self._phases.setdefault(name, {'time': 0.0, 'calls': 0, 'peak_memory': None})
+
+        profile = None
+        if Profiler.CPROFILE in self._profilers:
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+        if Profiler.TRACEMALLOC in self._profilers:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing_started = True
+            # tracemalloc.reset_peak() is available since Python 3.9
+            reset_peak = hasattr(tracemalloc, 'reset_peak')
+            if reset_peak:
+                tracemalloc.reset_peak()
+            memory, previous_peak = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            stats['time'] += time.perf_counter() - start
+            stats['calls'] += 1
+            if Profiler.TRACEMALLOC in self._profilers:
+                current, peak = tracemalloc.get_traced_memory()
+                # without the reset, the peak of tracing is reached in this entry only if it has grown,
+                # otherwise the growth of memory is the lower bound of the peak of the entry
+                if not reset_peak and peak <= previous_peak:
+                    peak = current
+                stats['peak_memory'] = max(stats['peak_memory'] or 0, peak - memory)
+
+    def timed_iter(self, iterable, name):
+        """Yields the items of the iterable, measuring their generation as a part of the phase of a given name"""
+
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def get_timings(self):
+        """ Returns the measurements of phases
+
+        Returns
+        -------
+        dict(str, dict)
+            for every phase (in the order of the first entry), the total `time` in seconds, the number of `calls`,
+            and the `peak_memory` allocated during the phase in bytes (None if not traced)
+        """
+        return {name: dict(stats) for name, stats in self._phases.items()}
+
+    def dump_profiles(self, directory):
+        """ Stores the cProfile statistics of phases in the `profile_<PHASE>.prof` files
+
+        Parameters
+        ----------
+        directory : str
+            the target directory
+
+        Returns
+        -------
+        list of str
+            the paths of the stored files
+        """
+        paths = []
+        for name, profile in self._profiles.items():
+            path = os.path.join(directory, f'profile_{name}.prof')
+            profile.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def stop(self):
+        """Stops the tracing of memory, if started by the timer"""
+
+        if self._tracing_started:
+            tracemalloc.stop()
+            self._tracing_started = False
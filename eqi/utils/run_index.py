@@ -0,0 +1,92 @@
+import os
+
+EQI_INDEX_FILE_PFX = '.eqi_index_'
+
+
+class RunIndex:
+    """ Maps iterations of QCG-PilotJob iterative tasks to EasyVVUQ runs
+
+    The index is stored as a plain text file in the EQI directory, where the n-th line
+    (counting from 0) contains a comma-separated list of run ids processed
+    by the n-th iteration of a task. The file is read by the tasks' scripts
+    with the `eqi_resolve_runs` function from `eqi_utils.sh`.
+
+    Parameters
+    ----------
+    directory : str
+        the EQI directory where the index file will be stored
+    name : str
+        the name of the index, typically the name of the iterative task using it
+
+    """
+
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        self._iterations = None
+
+    def get_file_name(self):
+        """ Returns the name of the index file, relative to the EQI directory
+        """
+        return EQI_INDEX_FILE_PFX + self.name
+
+    def get_reference(self, iteration="${it}"):
+        """ Returns the reference to the runs processed by a given iteration,
+        in a form that can be passed as the run argument to EQI scripts.
+
+        Parameters
+        ----------
+        iteration : str or int, optional
+            the iteration number, by default it is the QCG-PilotJob iteration variable
+
+        Returns
+        -------
+        str
+            the reference in a form `@INDEX_FILE:ITERATION`
+        """
+        return f'@{self.get_file_name()}:{iteration}'
+
+    def write(self, chunks):
+        """ Writes the index file
+
+        Parameters
+        ----------
+        chunks : iterable of list of str
+            consecutive lists of run ids, a single list per iteration
+
+        Returns
+        -------
+        int
+            the number of iterations stored in the index
+        """
+        iterations = 0
+        with open(f'{self.directory}/{self.get_file_name()}', 'w') as index_file:
+            for chunk in chunks:
+                index_file.write(','.join(chunk) + '\n')
+                iterations += 1
+
+        self._iterations = iterations
+        return iterations
+
+    def get_iterations(self):
+        """ Returns the number of iterations stored in the index
+        """
+        if self._iterations is None:
+            self._iterations = len(self.read())
+
+        return self._iterations
+
+    def read(self):
+        """ Reads the index file
+
+        Returns
+        -------
+        list of list of str
+            the lists of run ids, a single list per iteration
+        """
+        index_file_loc = f'{self.directory}/{self.get_file_name()}'
+        if not os.path.exists(index_file_loc):
+            return []
+
+        with open(index_file_loc, 'r') as index_file:
+            return [line.rstrip('\n').split(',') for line in index_file]
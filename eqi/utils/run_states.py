@@ -0,0 +1,243 @@
+import os
+import sqlite3
+
+from glob import glob
+
+from eqi.core.resume import JOURNAL_FILE_PFX, RECORD_NO_DIR, RECORD_STARTED, RECORD_COMPLETED
+from eqi.utils.runtimes import RUNTIMES_FILE_PFX, parse_runtime_record
+
+RUN_STATES_FILE_NAME = '.eqi_run_states.sqlite'
+
+STATE_SUBMITTED = 'SUBMITTED'
+STATE_STARTED = 'STARTED'
+STATE_COMPLETED = 'COMPLETED'
+STATE_FAILED = 'FAILED'
+
+# The phase of the runtimes records, the executions are timed by easyvvuq_execute
+EXECUTION_PHASE = 'execute'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_states (
+    run_id TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    start_time REAL,
+    end_time REAL,
+    exit_code INTEGER,
+    host TEXT,
+    executions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, phase)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS run_states_phase_state ON run_states (phase, state);
+CREATE TABLE IF NOT EXISTS journal_offsets (
+    file TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+
+class RunStateTable:
+    """ Indexed table of states of processing of runs' phases, stored in a SQLite file
+
+    For every run and phase, the table keeps the state (`SUBMITTED`, `STARTED`, `COMPLETED` or `FAILED`),
+    the number of attempts, the start and end time and the exit code of the last execution, and the node
+    of the last attempt. The table is written only by the Executor: the runs are registered at the submission
+    and the records appended by tasks to the per-node journals of the EQI directory are ingested by `update()`,
+    incrementally, from the offsets reached by the previous update. Thus the queries about the states of runs
+    don't scan the journals nor run directories.
+
+    The journals of different nodes are ingested in an arbitrary order, thus a record of an earlier attempt
+    may be ingested after the records of a later one. The start of every attempt is journaled before
+    its execution is timed, so an execution record fails the phase only if it is not older than the last
+    started attempt, and the times of the last execution are replaced only by the times of a later one.
+    The table uses only the SQL supported by the SQLite versions older than 3.24 (without upserts).
+
+    Parameters
+    ----------
+    directory : str
+        the EQI directory, where the table is stored (in the `.eqi_run_states.sqlite` file) and the journals are read
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._db = sqlite3.connect(os.path.join(directory, RUN_STATES_FILE_NAME))
+        self._db.executescript(_SCHEMA)
+
+    def register(self, run_ids, phase):
+        """ Registers the submitted runs' phases, the state of the phases already known is not changed
+
+        Parameters
+        ----------
+        run_ids : iterable of str
+            the ids of runs
+        phase : str
+            the phase of processing, e.g. `encode`, `execute` or `encode_execute`
+        """
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO run_states (run_id, phase, state) VALUES (?, ?, ?)",
+                                 ((run_id, phase, STATE_SUBMITTED) for run_id in run_ids))
+
+    def update(self):
+        """ Ingests the records appended to the resume and runtimes journals since the previous update """
+
+        with self._db:
+            for journal_file, lines in self._read_new_lines(JOURNAL_FILE_PFX):
+                host = os.path.basename(journal_file)[len(JOURNAL_FILE_PFX):]
+                for line in lines:
+                    fields = line.split()
+                    if len(fields) == 3:
+                        self._apply_record(fields[0], fields[1], fields[2], host)
+
+            for runtimes_file, lines in self._read_new_lines(RUNTIMES_FILE_PFX):
+                host = os.path.basename(runtimes_file)[len(RUNTIMES_FILE_PFX):]
+                for line in lines:
+                    record = parse_runtime_record(line)
+                    if record:
+                        self._apply_execution(*record[:4], host)
+
+    def mark(self, run_ids, state):
+        """ Sets the state of all phases of runs, e.g. according to the statuses of QCG-PJ tasks.
+        The completed phases are never marked as failed.
+
+        Parameters
+        ----------
+        run_ids : iterable of str
+            the ids of runs
+        state : str
+            the state
+        """
+        with self._db:
+            self._db.executemany(
+                "UPDATE run_states SET state = ? WHERE run_id = ? AND NOT (state = ? AND ? = ?)",
+                ((state, run_id, STATE_COMPLETED, state, STATE_FAILED) for run_id in run_ids))
+
+    def get(self, run_id, phase):
+        """ Returns the state of a run's phase
+
+        Parameters
+        ----------
+        run_id : str
+            the id of the run
+        phase : str
+            the phase of processing
+
+        Returns
+        -------
+        dict or None
+            the `state`, `attempts`, `start_time`, `end_time`, `exit_code` and `host`, None if the phase is unknown
+        """
+        cursor = self._db.execute(
+            "SELECT state, attempts, start_time, end_time, exit_code, host FROM run_states "
+            "WHERE run_id = ? AND phase = ?",
+            (run_id, phase))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip(('state', 'attempts', 'start_time', 'end_time', 'exit_code', 'host'), row))
+
+    def get_runs(self, phases, state):
+        """ Returns the runs for which any of the phases is in a given state
+
+        Parameters
+        ----------
+        phases : iterable of str
+            the phases of processing
+        state : str
+            the state
+
+        Returns
+        -------
+        set of str
+            the ids of runs
+        """
+        phases = list(phases)
+        cursor = self._db.execute(
+            f"SELECT run_id FROM run_states WHERE state = ? AND phase IN ({', '.join('?' * len(phases))})",
+            [state] + phases)
+        return {run_id for run_id, in cursor}
+
+    def get_not_completed_runs(self, phase):
+        """ Returns the registered runs, for which the phase has not been completed
+
+        Parameters
+        ----------
+        phase : str
+            the phase of processing
+
+        Returns
+        -------
+        list of str
+            the sorted ids of runs
+        """
+        cursor = self._db.execute(
+            "SELECT run_id FROM run_states WHERE phase = ? AND state != ? ORDER BY run_id",
+            (phase, STATE_COMPLETED))
+        return [run_id for run_id, in cursor]
+
+    def get_summary(self):
+        """ Returns the numbers of runs in each of the states, for every phase
+
+        Returns
+        -------
+        dict(str, dict(str, int))
+            the numbers of runs by phases and states
+        """
+        summary = {}
+        for phase, state, count in self._db.execute(
+                "SELECT phase, state, COUNT(*) FROM run_states GROUP BY phase, state"):
+            summary.setdefault(phase, {})[state] = count
+        return summary
+
+    def close(self):
+        self._db.close()
+
+    def _apply_record(self, record, run_id, phase, host):
+        if record in (RECORD_NO_DIR, RECORD_STARTED):
+            # every attempt starts with a single record, NO_DIR if the run directory doesn't exist yet
+            self._insert_missing(run_id, phase, STATE_STARTED)
+            self._db.execute(
+                "UPDATE run_states SET attempts = attempts + 1, host = ?, "
+                "state = CASE WHEN state = ? THEN state ELSE ? END WHERE run_id = ? AND phase = ?",
+                (host, STATE_COMPLETED, STATE_STARTED, run_id, phase))
+        elif record == RECORD_COMPLETED:
+            self._insert_missing(run_id, phase, STATE_COMPLETED, host)
+            self._db.execute("UPDATE run_states SET state = ? WHERE run_id = ? AND phase = ?",
+                             (STATE_COMPLETED, run_id, phase))
+
+    def _apply_execution(self, run_id, start, end, exit_code, host):
+        # the completion of a successful execution is recorded in the resume journal, the failed execution
+        # of an earlier attempt (with fewer executions than the attempts started) doesn't fail the phase
+        self._insert_missing(run_id, EXECUTION_PHASE, STATE_STARTED)
+        self._db.execute(
+            "UPDATE run_states SET executions = executions + 1, "
+            "state = CASE WHEN ? != 0 AND state != ? AND executions + 1 >= attempts THEN ? ELSE state END "
+            "WHERE run_id = ? AND phase = ?",
+            (exit_code, STATE_COMPLETED, STATE_FAILED, run_id, EXECUTION_PHASE))
+        self._db.execute(
+            "UPDATE run_states SET start_time = ?, end_time = ?, exit_code = ?, host = ? "
+            "WHERE run_id = ? AND phase = ? AND (start_time IS NULL OR start_time <= ?)",
+            (start, end, exit_code, host, run_id, EXECUTION_PHASE, start))
+
+    def _insert_missing(self, run_id, phase, state, host=None):
+        self._db.execute("INSERT OR IGNORE INTO run_states (run_id, phase, state, host) VALUES (?, ?, ?, ?)",
+                         (run_id, phase, state, host))
+
+    def _read_new_lines(self, prefix):
+        """Yields the complete lines appended to the journal files since the previous read"""
+
+        for journal_file in sorted(glob(os.path.join(self.directory, f'{prefix}*'))):
+            name = os.path.basename(journal_file)
+            row = self._db.execute("SELECT offset FROM journal_offsets WHERE file = ?", (name,)).fetchone()
+            offset = row[0] if row else 0
+
+            with open(journal_file, 'rb') as journal:
+                journal.seek(offset)
+                data = journal.read()
+
+            # the last line may be incomplete if a task is appending it, it is read by the next update
+            data = data[:data.rfind(b'\n') + 1]
+            if data:
+                yield journal_file, data.decode().splitlines()
+                self._db.execute("INSERT OR REPLACE INTO journal_offsets (file, offset) VALUES (?, ?)",
+                                 (name, offset + len(data)))
@@ -0,0 +1,248 @@
+import json
+import os
+import sqlite3
+import time
+
+from enum import Enum
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runtimes (
+    app TEXT NOT NULL,
+    campaign TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    params TEXT NOT NULL,
+    cores INTEGER NOT NULL,
+    wall_time REAL NOT NULL,
+    recorded REAL NOT NULL,
+    PRIMARY KEY (app, campaign, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runtimes_app_recorded ON runtimes (app, recorded);
+"""
+
+# The default number of the most recent records of an application used to fit a cost model
+DEFAULT_MAX_RECORDS = 10000
+
+
+class CostModelMethod(Enum):
+    """ Specifies the method predicting the cost of a run from the recorded history
+    """
+
+    NEAREST = \
+        "The cost is the mean of the costs of the nearest recorded runs, in the space of numerical parameters " \
+        "normalised by their ranges. Every non-numerical parameter different from the run's one adds 1 " \
+        "to the distance"
+    LINEAR = \
+        "The cost is a linear function of numerical parameters, fitted to the recorded runs " \
+        "with the least squares method. The non-numerical parameters are ignored"
+
+
+class RuntimeHistory:
+    """ Persistent history of wall times of runs, shared by the campaigns of applications, stored in a SQLite file
+
+    For every run, the history keeps the parameters, the number of cores of the task executing the run
+    and the wall time of the execution. The records are grouped by the name of the application,
+    so the history of earlier campaigns of an application may be used to predict the cost of runs
+    of the next ones (see `fit`). The records of a run of a campaign recorded again are replaced.
+
+    Parameters
+    ----------
+    path : str
+        the path of the SQLite file of the history, created if it doesn't exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # the history may be updated by many campaigns executed at the same time
+        self._db = sqlite3.connect(path, timeout=60)
+        self._db.executescript(_SCHEMA)
+
+    def record(self, app, campaign, records):
+        """ Records the wall times of runs
+
+        Parameters
+        ----------
+        app : str
+            the name of the application
+        campaign : str
+            the identifier of the campaign, e.g. the campaign's directory
+        records : iterable of tuple
+            the id of the run, the dict of its parameters, the number of cores and the wall time in seconds
+
+        Returns
+        -------
+        int
+            the number of recorded runs
+        """
+        now = time.time()
+        rows = [(app, campaign, run_id, json.dumps(params, sort_keys=True), int(cores), float(wall_time), now)
+                for run_id, params, cores, wall_time in records]
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO runtimes (app, campaign, run_id, params, cores, wall_time, "
+                                 "recorded) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def get_records(self, app, max_records=None):
+        """ Returns the records of an application
+
+        Parameters
+        ----------
+        app : str
+            the name of the application
+        max_records : int, optional
+            the maximal number of records, the most recent are returned
+
+        Returns
+        -------
+        list of dict
+            the `params`, `cores` and `wall_time` of runs, the most recent first
+        """
+        query = "SELECT params, cores, wall_time FROM runtimes WHERE app = ? ORDER BY recorded DESC"
+        args = (app,)
+        if max_records is not None:
+            query += " LIMIT ?"
+            args += (max_records,)
+        return [{'params': json.loads(params), 'cores': cores, 'wall_time': wall_time}
+                for params, cores, wall_time in self._db.execute(query, args)]
+
+    def fit(self, app, method=CostModelMethod.NEAREST, max_records=DEFAULT_MAX_RECORDS, **kwargs):
+        """ Fits the cost model of runs of an application to the recorded history
+
+        Parameters
+        ----------
+        app : str
+            the name of the application
+        method : CostModelMethod, optional
+            the method of prediction
+        max_records : int, optional
+            the number of the most recent records used to fit the model
+        kwargs
+            the additional parameters of CostModel, e.g. `neighbours`
+
+        Returns
+        -------
+        CostModel
+            the model, predicting None if there are no records of the application
+        """
+        return CostModel(self.get_records(app, max_records), method, **kwargs)
+
+    def close(self):
+        self._db.close()
+
+
+class CostModel:
+    """ Predicts the cost of runs from their parameters, fitted to the records of a runtime history
+
+    The cost of a run is expressed in core-seconds (the wall time multiplied by the number of cores),
+    assuming the linear scalability of the application, so the runs executed with different numbers of cores
+    are comparable. The model is callable with the dict of parameters of a run, thus it may be passed
+    directly as the `runtime_predictor` of `Executor.run()`.
+
+    Parameters
+    ----------
+    records : list of dict
+        the `params`, `cores` and `wall_time` of recorded runs
+    method : CostModelMethod, optional
+        the method of prediction
+    neighbours : int, optional
+        the number of the nearest recorded runs averaged by the NEAREST method
+    """
+
+    def __init__(self, records, method=CostModelMethod.NEAREST, neighbours=3):
+        if not isinstance(neighbours, int) or neighbours < 1:
+            raise ValueError("The value of 'neighbours' parameter should be a positive integer")
+
+        self.method = method
+        self._neighbours = neighbours
+        self._size = len(records)
+        if not records:
+            return
+
+        self._costs = np.array([record['wall_time'] * record['cores'] for record in records])
+
+        # the parameters of all records are used, the numerical ones as the coordinates of runs
+        names = set.intersection(*(set(record['params']) for record in records))
+        self._numerical = sorted(name for name in names
+                                 if all(_is_number(record['params'][name]) for record in records))
+        self._categorical = sorted(names - set(self._numerical))
+
+        self._points = np.array([[record['params'][name] for name in self._numerical] for record in records],
+                                dtype=float).reshape(len(records), len(self._numerical))
+        ranges = self._points.max(axis=0) - self._points.min(axis=0)
+        self._scales = np.where(ranges > 0, ranges, 1.0)
+
+        self._categories = [{} for _ in self._categorical]
+        self._codes = np.array([[self._categories[i].setdefault(json.dumps(record['params'][name]),
+                                                                len(self._categories[i]))
+                                 for i, name in enumerate(self._categorical)] for record in records],
+                               dtype=int).reshape(len(records), len(self._categorical))
+
+        if method == CostModelMethod.LINEAR:
+            design = np.hstack([self._points, np.ones((len(records), 1))])
+            self._coefficients = np.linalg.lstsq(design, self._costs, rcond=None)[0]
+
+    def __call__(self, params):
+        return self.predict(params)
+
+    def __len__(self):
+        return self._size
+
+    def predict(self, params):
+        """ Predicts the cost of a run
+
+        Parameters
+        ----------
+        params : dict
+            the parameters of the run
+
+        Returns
+        -------
+        float or None
+            the predicted cost in core-seconds, None if the model has no records or the numerical parameters
+            of the run are missing or not numbers
+        """
+        if not self._size:
+            return None
+
+        values = [params.get(name) for name in self._numerical]
+        if not all(_is_number(value) for value in values):
+            return None
+        point = np.array(values, dtype=float)
+
+        if self.method == CostModelMethod.LINEAR:
+            # the negative costs extrapolated far from the recorded runs are meaningless
+            return max(float(point @ self._coefficients[:-1] + self._coefficients[-1]), 0.0)
+
+        distances = (((self._points - point) / self._scales) ** 2).sum(axis=1)
+        if self._categorical:
+            codes = np.array([self._categories[i].get(json.dumps(params.get(name)), -1)
+                              for i, name in enumerate(self._categorical)])
+            distances += (self._codes != codes).sum(axis=1)
+
+        nearest = np.argsort(distances, kind='stable')[:self._neighbours]
+        return float(self._costs[nearest].mean())
+
+    def predict_wall_time(self, params, cores):
+        """ Predicts the wall time of a run executed with a given number of cores
+
+        Parameters
+        ----------
+        params : dict
+            the parameters of the run
+        cores : int
+            the number of cores of the task executing the run
+
+        Returns
+        -------
+        float or None
+            the predicted wall time in seconds, None if the cost of the run is not predicted
+        """
+        cost = self.predict(params)
+        return cost / cores if cost is not None else None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,66 @@
+from glob import glob
+
+# Must be consistent with the names used in eqi_utils.sh
+RUNTIMES_FILE_PFX = ".eqi_runtimes_"
+CACHED_MARK = "cached"
+
+
+def parse_runtime_record(line):
+    """Parses a record of the runtimes journal: `<RUN_ID> <START> <END> <EXIT_CODE> [cached]`
+
+    Parameters
+    ----------
+    line : str
+        the line of the journal
+
+    Returns
+    -------
+    tuple or None
+        the id of the run, the start and end time, the exit code of the execution and whether the outputs
+        were restored from the result cache, None if the line is not a valid record
+    """
+    fields = line.split()
+    # the records written without the exit code are of successful executions
+    if len(fields) not in (3, 4, 5) or (len(fields) == 5 and fields[4] != CACHED_MARK):
+        return None
+    try:
+        return fields[0], float(fields[1]), float(fields[2]), int(fields[3]) if len(fields) > 3 else 0, \
+            len(fields) == 5
+    except ValueError:
+        return None
+
+
+def read_runtimes(eqi_dir, include_cached=False):
+    """Returns the wall times of successful executions of runs, recorded by the tasks
+
+    The tasks append the records to the runtimes journal, a single file per node
+    (`.eqi_runtimes_<NODE_NAME>` in the EQI directory). Every record is a single line:
+    `<RUN_ID> <START> <END> <EXIT_CODE>`, with the times in seconds since the epoch, followed by `cached`
+    if the outputs were restored from the result cache instead of executing the application.
+
+    Parameters
+    ----------
+    eqi_dir : str
+        the EQI directory where the journal is stored
+    include_cached : bool, optional
+        if True, the executions restored from the result cache are included. Their wall times are
+        the times of restoring outputs, thus they are excluded by default from the estimates of runtimes
+
+    Returns
+    -------
+    dict(str, float)
+        the wall times (in seconds) of executions of runs, the last record is taken for the runs executed many times
+    """
+    runtimes = {}
+    for runtimes_file in sorted(glob(f'{eqi_dir}/{RUNTIMES_FILE_PFX}*')):
+        with open(runtimes_file, 'r') as runtimes_journal:
+            for line in runtimes_journal:
+                # the last line may be incomplete if a task was killed while appending it
+                record = parse_runtime_record(line) if line.endswith('\n') else None
+                if record and record[3] == 0:
+                    if record[4] and not include_cached:
+                        runtimes.pop(record[0], None)
+                    else:
+                        runtimes[record[0]] = record[2] - record[1]
+
+    return runtimes
@@ -1,25 +1,60 @@
 import os
 import json
+import time
+
+from enum import Enum
+
+from eqi.utils.run_states import RunStateTable
 
 EQI_STATE_FILE_NAME = '.eqi_state.json'
 
 
+class FsyncPolicy(Enum):
+    """ The durability of writes of the EQI state file. The state file is always replaced atomically,
+    thus the readers see either the previous or the new state, but without fsync the new state may be lost
+    (and the previous one seen) after a crash of the machine.
+    """
+
+    NEVER = \
+        "The state file is never synced, the write relies on the operating system"
+    FILE = \
+        "The content of the state file is synced before it replaces the previous one"
+    FULL = \
+        "The content of the state file is synced before it replaces the previous one, " \
+        "and the EQI directory is synced after the replacement"
+
+
 class StateKeeper:
 
     EQI_CAMPAIGN_STATE_FILE_NAME = '.eqi_campaign_state.json'
 
     """ Stores information about EQI execution
 
+    The state is kept in memory and written to the state file (`.eqi_state.json` in the EQI directory)
+    as a whole, with a temporary file replacing the previous one, thus the state file is always complete,
+    also for the tasks reading it concurrently. The updates made within `write_interval` since the previous
+    write are coalesced and written by the first later update or by `flush()`.
+
     Parameters
     ----------
     directory : string
         the root directory where the information will be stored
-    campaign : Campaign
-        the EasyVVUQ Campaign object from which the StateKeeper will be inited
-
+    fsync_policy : FsyncPolicy, optional
+        the durability of writes of the state file
+    write_interval : float, optional
+        the minimal interval (in seconds) between writes of the state file,
+        by default every update is written immediately
+    run_states : bool, optional
+        if True, the states of processing of individual runs are kept in the `run_states` table
     """
-    def __init__(self, directory):
+    def __init__(self, directory, fsync_policy=FsyncPolicy.FILE, write_interval=0.0, run_states=False):
         self.directory = directory
+        self.run_states = RunStateTable(directory) if run_states else None
+        self._fsync_policy = fsync_policy
+        self._write_interval = write_interval
+        self._state = None
+        self._dirty = False
+        self._last_write = 0.0
 
     def setup(self, campaign):
         """ Initialises StateKeeper with campaign
@@ -38,32 +73,87 @@ class StateKeeper:
             'campaign_active_app_name': campaign._active_app_name
         }
 
+        # the tasks read the campaign's parameters, thus they are written regardless of the write interval
         self.write_to_state_file(_dict)
+        self.flush()
 
         # Safe state of a campaign to state_file
-        campaign.save_state(self.directory + "/" + StateKeeper.EQI_CAMPAIGN_STATE_FILE_NAME)
+        self._replace(StateKeeper.EQI_CAMPAIGN_STATE_FILE_NAME, campaign.save_state)
 
     def write_to_state_file(self, data):
+        """ Updates the state and writes it to the state file, unless the previous write was made
+        within the write interval
 
-        eqi_file_loc = f'{self.directory}/{EQI_STATE_FILE_NAME}'
+        Parameters
+        ----------
+        data : dict
+            the entries to update
+        """
+
+        self._get_state().update(data)
+        self._dirty = True
 
-        if os.path.exists(eqi_file_loc):
-            with open(eqi_file_loc, 'r') as eqi_file:
-                state_dict = json.load(eqi_file)
-                state_dict.update(data)
-        else:
-            state_dict = data
+        if time.monotonic() - self._last_write >= self._write_interval:
+            self.flush()
 
-        with open(eqi_file_loc, 'w') as eqi_file:
-            json.dump(state_dict, eqi_file)
+    def flush(self):
+        """ Writes the pending updates of the state to the state file """
+
+        if not self._dirty:
+            return
+
+        def dump(path):
+            with open(path, 'w') as eqi_file:
+                json.dump(self._state, eqi_file)
+
+        self._replace(EQI_STATE_FILE_NAME, dump)
+        self._dirty = False
+        self._last_write = time.monotonic()
 
     def get_from_state_file(self):
+        """ Returns the state, read from the state file at the first call
 
-        eqi_file_loc = f'{self.directory}/{EQI_STATE_FILE_NAME}'
-        if os.path.exists(eqi_file_loc):
-            with open(eqi_file_loc, 'r') as eqi_file:
-                state_dict = json.load(eqi_file)
-        else:
-            state_dict = {}
+        Returns
+        -------
+        dict
+            the copy of the state
+        """
 
-        return state_dict
+        return dict(self._get_state())
+
+    def _get_state(self):
+        if self._state is None:
+            eqi_file_loc = f'{self.directory}/{EQI_STATE_FILE_NAME}'
+            if os.path.exists(eqi_file_loc):
+                with open(eqi_file_loc, 'r') as eqi_file:
+                    self._state = json.load(eqi_file)
+            else:
+                self._state = {}
+
+        return self._state
+
+    def _replace(self, file_name, write):
+        """Writes a file with the `write` function to a temporary file, which atomically replaces the target"""
+
+        # the file is created by the function (with the default permissions), unique for the writing process
+        tmp_file = f'{self.directory}/{file_name}.{os.getpid()}.tmp'
+        try:
+            write(tmp_file)
+            if self._fsync_policy != FsyncPolicy.NEVER:
+                _fsync(tmp_file, os.O_RDONLY)
+            os.replace(tmp_file, f'{self.directory}/{file_name}')
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+
+        if self._fsync_policy == FsyncPolicy.FULL:
+            _fsync(self.directory, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+
+
+def _fsync(path, flags):
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,140 @@
+import pandas as pd
+
+from qcg.pilotjob.utils.reportstats import JobsReportStats
+
+# The phases of processing, recognised by the prefixes of names of tasks (the longest first)
+PHASES = ('encode_execute', 'encode', 'execute', 'decode')
+
+COLUMNS = ['task', 'phase', 'iteration', 'state', 'exit_code', 'nodes', 'cores', 'queued', 'scheduled',
+           'started', 'finished', 'queue_wait', 'launch_latency', 'runtime']
+
+
+def get_phase(task_name):
+    """Returns the phase of processing of a task (or its iteration) of a given name, None for other tasks"""
+
+    name = task_name.split(':')[0]
+    for phase in PHASES:
+        if name == phase or name.startswith(phase + '_'):
+            return phase
+    return None
+
+
+def read_tasks_stats(eqi_dir):
+    """Reads the statistics of tasks (and iterations of iterative tasks) executed by QCG-PilotJob Manager
+
+    The statistics are read from the reports of QCG-PilotJob Manager services in the EQI directory
+    (`jobs.report` files). If the Manager was started with `enable_rt_stats`, the real start and finish times
+    of the processes are taken from the runtime statistics files, otherwise the times registered
+    by the Manager are used.
+
+    Parameters
+    ----------
+    eqi_dir : str
+        the EQI directory, the working directory of QCG-PilotJob Manager
+
+    Returns
+    -------
+    pandas.DataFrame
+        a row for every executed task or iteration: the `task` name, the `phase` of processing, the `iteration`,
+        the final `state` and `exit_code`, the `nodes` (comma-separated) and the number of `cores` of the allocation,
+        the times when the task was `queued`, `scheduled`, `started` and `finished`, and the `queue_wait`
+        (from queuing to scheduling), `launch_latency` (from scheduling to the start of the process)
+        and `runtime` in seconds
+    """
+    report = JobsReportStats.from_workdir(eqi_dir)
+    jobs = report.job_stats().get('jobs', {})
+
+    rows = []
+    for name, job in jobs.items():
+        started = job.get('real_start') or job.get('s_time')
+        if not started or not job.get('sched_time'):
+            # the iterative tasks are reported by their iterations
+            continue
+
+        task, _, iteration = name.partition(':')
+        # the iterations are queued together with the iterative task
+        queued = job.get('queue_time') or jobs.get(task, {}).get('queue_time')
+        finished = job.get('real_finish') if job.get('real_start') else job.get('f_time')
+        if job.get('real_start') or not job.get('r_time'):
+            runtime = (finished - started).total_seconds()
+        else:
+            runtime = job['r_time'].total_seconds()
+
+        nodes = job.get('nodes') or {}
+        exit_code = job.get('runtime', {}).get('exit_code')
+        rows.append({
+            'task': task,
+            'phase': get_phase(task),
+            'iteration': int(iteration) if iteration else None,
+            'state': job.get('state'),
+            'exit_code': int(exit_code) if exit_code is not None else None,
+            'nodes': ','.join(nodes),
+            'cores': sum(len(cores) for cores in nodes.values()),
+            'queued': queued,
+            'scheduled': job['sched_time'],
+            'started': started,
+            'finished': finished,
+            'queue_wait': (job['sched_time'] - queued).total_seconds() if queued else None,
+            'launch_latency': (started - job['sched_time']).total_seconds(),
+            'runtime': runtime,
+        })
+
+    return pd.DataFrame(rows, columns=COLUMNS).astype({'iteration': 'Int64', 'exit_code': 'Int64'})
+
+
+def summarise_tasks_stats(stats, total_cores=None):
+    """Summarises the statistics of tasks: the useful work of tasks versus the overhead of their scheduling
+
+    The useful work is the core-time of processes of tasks, the overhead is the core-time of allocations
+    of tasks before the start of their processes (the launch latency).
+
+    Parameters
+    ----------
+    stats : pandas.DataFrame
+        the statistics of tasks, as returned by `read_tasks_stats`
+    total_cores : int, optional
+        the number of cores of the allocation, used to compute the utilisation
+
+    Returns
+    -------
+    dict
+        the number of `tasks`, the `makespan` (in seconds, from the first queued to the last finished task),
+        the `useful_core_hours`, the `overhead_core_hours`, the `overhead_ratio` (of the overhead to the total
+        core-time of allocations), the `utilisation` of the allocation (None if the number of cores is not given),
+        and the statistics for `phases`: the number of `tasks`, the mean `queue_wait`, `launch_latency`
+        and `runtime` in seconds, and the `core_hours`
+    """
+    if stats.empty:
+        return {'tasks': 0, 'makespan': 0.0, 'useful_core_hours': 0.0, 'overhead_core_hours': 0.0,
+                'overhead_ratio': 0.0, 'utilisation': None, 'phases': {}}
+
+    useful = (stats['runtime'] * stats['cores']).sum() / 3600
+    overhead = (stats['launch_latency'] * stats['cores']).sum() / 3600
+    first = stats['queued'].fillna(stats['scheduled']).min()
+    makespan = (stats['finished'].max() - first).total_seconds()
+
+    phases = {}
+    for phase, phase_stats in stats.groupby(stats['phase'].fillna('other')):
+        phases[phase] = {
+            'tasks': len(phase_stats),
+            'queue_wait': phase_stats['queue_wait'].mean(),
+            'launch_latency': phase_stats['launch_latency'].mean(),
+            'runtime': phase_stats['runtime'].mean(),
+            'core_hours': (phase_stats['runtime'] * phase_stats['cores']).sum() / 3600,
+        }
+
+    return {
+        'tasks': len(stats),
+        'makespan': makespan,
+        'useful_core_hours': useful,
+        'overhead_core_hours': overhead,
+        'overhead_ratio': overhead / (useful + overhead) if useful + overhead else 0.0,
+        'utilisation': useful * 3600 / (makespan * total_cores) if total_cores and makespan else None,
+        'phases': phases,
+    }
+
+
+def get_total_cores(eqi_dir):
+    """Returns the number of cores of QCG-PilotJob Manager services reported in the EQI directory"""
+
+    return JobsReportStats.from_workdir(eqi_dir).global_stats().get('total_cores') or None
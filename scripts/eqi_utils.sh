@@ -1,123 +1,247 @@
 #!/bin/bash
 
-RESUME_FILE_PFX=".eqi_resume_"
+# The resume journal is appended by tasks, a single file per node.
+# Must be consistent with the names and records used in eqi/core/resume.py
+JOURNAL_FILE_PFX=".eqi_journal_"
+JOURNAL_CUTOFF_FILE=".eqi_journal_cutoff"
+JOURNAL_INDEX_DIR=".eqi_records_index"
+INDEX_KEY_LENGTH=3
+
+RECORD_NO_DIR="EQI_NO_DIR"
+RECORD_STARTED="EQI_STARTED"
+RECORD_COMPLETED="EQI_COMPLETED"
+
+# The wall times of executions of runs are appended by tasks, a single file per node.
+# Must be consistent with the names used in eqi/utils/runtimes.py
+RUNTIMES_FILE_PFX=".eqi_runtimes_"
+RUNTIME_CACHED_MARK="cached"
+
+# The file created in the run directory by the result cache, if the outputs are restored from the cache
+CACHE_HIT_FILE=".eqi_cache_hit"
+
+eqi_source_config() {
+    # Sources the configuration file given in EQI_CONFIG. If the environment of the file has been captured
+    # once by the Executor, the script exporting it (given in EQI_CONFIG_SNAPSHOT) is sourced instead.
+    # Nothing is sourced if it has been already done by the parent task script (EQI_CONFIG_LOADED is set)
+
+    if [[ -n $EQI_CONFIG_LOADED ]]; then
+        return 0
+    fi
 
-RET_COMPLETED=1
-RET_NEW=2
+    if [[ -f $EQI_CONFIG_SNAPSHOT ]]; then
+        . "$EQI_CONFIG_SNAPSHOT"
+        export EQI_CONFIG_LOADED=1
+        return 0
+    fi
 
-_eqi_basic_clean() {
-	echo "Checking for previously uncompleted execution"
+    if [[ ! -f $EQI_CONFIG ]]; then
+        return 0
+    fi
 
-    run=$1
-    phase=$2
+    echo "Sourcing configuration file: $EQI_CONFIG"
+    . "$EQI_CONFIG"
+    export EQI_CONFIG_LOADED=1
+}
 
-    resume_file="$RESUME_FILE_PFX"${run}_${phase}
+eqi_resolve_runs() {
+    # Prints the comma-separated list of runs. The list may be given directly
+    # or as a reference to a line of an EQI index file in a form @INDEX_FILE:ITERATION
 
-    if [[ ! -f "$resume_file" ]]; then
-	    echo "Fresh startup, nothing to clean"
-    	return $RET_NEW
+    if [[ "$1" == @* ]]; then
+        ref="${1#@}"
+        # sed quits at the line of the iteration, so the rest of the index file is not read
+        sed -n "$(( ${ref##*:} + 1 )){p;q}" "${ref%:*}"
+    else
+        echo "$1"
     fi
+}
 
-	echo "Lock file for the previous task execution found - performing a cleanup"
+eqi_encode() {
+    # Encodes the comma-separated list of runs. If the EQI_ENCODER_SOCKET is set, the runs
+    # are encoded by the encoder service running on the node, otherwise in a separate process
 
-    while IFS= read -r line;
-    do
-    	if [[ "$line" == "EQI_COMPLETED" ]]; then # Check if the task is already completed
-    	    echo "The task is already completed, we can skip its processing"
-    	    return $RET_COMPLETED
-    	elif [[ "$line" == "EQI_NO_DIR" ]]; then
-    	    if [[ -d "../runs/${run}" ]]; then # Check for run dir that was not present
-    	                                   # at the beginning of a task - we should remove it
-            	echo "Removing run dir to start from the scratch: ../runs/${run}"
-       	        rm -r "../runs/${run}"
-        	    return $RET_NEW
-            else
-                echo "Starting from the scratch, the run dir not existing yet ../runs/${run}"
-            	return $RET_NEW
-            fi
-    	else
-    	    break
-    	fi
-    done < "$resume_file"
+    if [[ -n "$EQI_ENCODER_SOCKET" ]]; then
+        eqi_encoder_client "$EQI_ENCODER_SOCKET" "$1"
+    else
+        python3 -m eqi.external_encoder "$1"
+    fi
 }
 
+eqi_execute() {
+    # Executes the application command in the current directory. If the EQI_CACHE_DIR is set, the outputs
+    # are restored from the result cache for the same inputs and command, or stored in it after the execution.
+    # EQI_CACHED is set to 1 if the outputs have been restored from the cache, to 0 otherwise
+
+    EQI_CACHED=0
+    if [[ -n "$EQI_CACHE_DIR" ]]; then
+        rm -f "$CACHE_HIT_FILE"
+        EQI_CACHE_HIT_FILE="$CACHE_HIT_FILE" eqi_run_module eqi.result_cache "$EQI_CACHE_DIR" "$@"
+        local ret=$?
+        if [[ -f "$CACHE_HIT_FILE" ]]; then
+            EQI_CACHED=1
+            rm -f "$CACHE_HIT_FILE"
+        fi
+        return $ret
+    else
+        "$@"
+    fi
+}
+
+eqi_record_runtime() {
+    # Appends the start and end time (in seconds since the epoch) and the exit code of the execution of a run
+    # to the runtimes journal of the node. The executions restored from the result cache (the fifth argument
+    # equal to 1) are marked, so they are not taken as the runtimes of the application
 
-_eqi_moderate_clean() {
+    local mark=""
+    (( ${5:-0} == 1 )) && mark=" $RUNTIME_CACHED_MARK"
+    echo "$1 $2 $3 $4$mark" >> "${RUNTIMES_FILE_PFX}${HOSTNAME}"
+}
 
-	echo "Checking for possibly broken files from previous execution"
+_eqi_journal_append() {
+    # Appends a record for a run's phase to the journal of the node. The record is short,
+    # so it is written with a single atomic append, even if many tasks run on the node concurrently
 
-    run=$1
-    phase=$2
+    echo "$1 $2 $3" >> "${JOURNAL_FILE_PFX}${HOSTNAME}"
+}
 
-    resume_file="$RESUME_FILE_PFX"${run}_${phase}
-    base_dir="../runs/${run}"
+_eqi_journal_read() {
+    # Prints the records of the journals of all nodes. If the sizes of journals at the submission of tasks
+    # are stored by the Executor, only the records of the previous workflows are printed: a run's phase
+    # is processed by a single task of a workflow, thus the later records concern other runs' phases
+
+    if [[ -f "$JOURNAL_CUTOFF_FILE" ]]; then
+        local file size
+        while read -r file size
+        do
+            head -c "$size" "$file"
+        done < "$JOURNAL_CUTOFF_FILE"
+    else
+        cat "$JOURNAL_FILE_PFX"* 2>/dev/null
+    fi
+}
 
-    # Look for changes in run dir, and remove everything what is new
-    declare -A locked_files
+_eqi_journal_records() {
+    # Prints the records (RECORD RUN_ID) stored in the journals for a phase of the comma-separated runs.
+    # If the journals have been indexed by the Executor, only the index files of the runs are read
+    # (see ResumeJournal.write_cutoff), otherwise the journals are read in a single pass
+
+    if [[ -d "$JOURNAL_INDEX_DIR" ]]; then
+        declare -A index_files
+        local run
+        for run in ${1//,/ }
+        do
+            index_files["$JOURNAL_INDEX_DIR/$2/${run:$(( ${#run} > INDEX_KEY_LENGTH ? -INDEX_KEY_LENGTH : 0 ))}"]=1
+        done
+
+        local index_file
+        for index_file in "${!index_files[@]}"
+        do
+            [[ -f "$index_file" ]] && cat "$index_file"
+        done | awk -v runs="$1" '
+            BEGIN { n = split(runs, ids, ","); for (i = 1; i <= n; i++) wanted[ids[i]] = 1 }
+            $1 in wanted { n = split($2, records, ","); for (i = 1; i <= n; i++) print records[i], $1 }'
+        return 0
+    fi
 
-    while IFS= read -r line;
-    do
-    	echo "$line"
-    	locked_files["$line"]=1
-    done < "$resume_file"
-
-    find "$base_dir" -print0 |
-    	while IFS= read -r -d '' line; do
-	    	if [[ ${locked_files["$line"]} == 1 ]]; then
-    			echo "Item locked, keeping it: $line"
-    		else
-    			if [[ -f "$line" ]]; then
-    				echo "File not locked, deleting it: $line"
-    				rm "$line"
-    			elif [[ -d "$line" ]]; then
-    				echo "Dir not locked, deleting it recursively: $line"
-    				rm -r "$line"
-    			fi
-    		fi
-    	done
+    _eqi_journal_read | grep -xF -f <(
+        for run in ${1//,/ }
+        do
+            printf '%s %s %s\n' "$RECORD_NO_DIR" "$run" "$2" "$RECORD_STARTED" "$run" "$2" \
+                "$RECORD_COMPLETED" "$run" "$2"
+        done) | cut -d' ' -f1,2
 }
 
-eqi_resume_init() {
+_eqi_basic_clean() {
 
-    if [[ $EQI_RESUME_LEVEL == "DISABLED" ]]; then
-        return 0;
+    base_dir="../runs/$1"
+
+    # The run dir was not present at the beginning of the previous task - we should remove it
+    if [[ -d "$base_dir" ]]; then
+        echo "Removing run dir to start from the scratch: $base_dir"
+        rm -r "$base_dir"
+    else
+        echo "Starting from the scratch, the run dir not existing yet $base_dir"
     fi
+}
 
-    echo "Initialisation of data for resume in ${EQI_RESUME_LEVEL} level"
-    run=$1
-    phase="$2"
-    base_dir="../runs/${run}"
+_eqi_basic_init() {
+    # The BASIC level, handled without the start of the resume engine
 
-    echo "Cleaning old task"
-    # Check if resume is not disabled, if it is return
-    _eqi_basic_clean "${run}" "${phase}"
+    declare -A records
+    local record run
+    while read -r record run
+    do
+        records[$run]+="$record "
+    done < <(_eqi_journal_records "$1" "$2")
 
-    # If the task is already completed, return this info to the parent script
-    ret_code=$?
-    (( ret_code == $RET_COMPLETED )) && return $RET_COMPLETED
+    local runs=()
+    for run in ${1//,/ }
+    do
+        echo "Initialisation of data for resume of $run in BASIC level"
+        if [[ -z "${records[$run]}" ]]; then
+            echo "Fresh startup, nothing to clean"
+        elif [[ "${records[$run]}" == *"$RECORD_COMPLETED"* ]]; then
+            echo "The task is already completed, we can skip its processing"
+            continue
+        elif [[ "${records[$run]}" == *"$RECORD_NO_DIR"* ]]; then
+            echo "Previous task execution found - performing a cleanup"
+            _eqi_basic_clean "$run"
+        fi
+
+        echo "Storing initial state of a task"
+        if [[ ! -e "../runs/$run" ]]; then
+            _eqi_journal_append "$RECORD_NO_DIR" "$run" "$2"
+        else
+            _eqi_journal_append "$RECORD_STARTED" "$run" "$2"
+        fi
+        runs+=("$run")
+    done >&2
+
+    (IFS=,; echo "${runs[*]}")
+}
 
-    if [[ $EQI_RESUME_LEVEL == "MODERATE" ]]; then
-        _eqi_moderate_clean "${run}" "${phase}"
+eqi_resume_init() {
+    # Prepares the processing of a phase of the comma-separated runs for a possible resume, and prints
+    # the runs for which the phase should be processed, i.e. not completed yet. The messages are printed to stderr.
+    # The BASIC level is handled in bash, the higher levels by the EQI resume engine, started once for all runs
+
+    if [[ $EQI_RESUME_LEVEL == "DISABLED" ]]; then
+        echo "$1"
+        return 0
+    elif [[ $EQI_RESUME_LEVEL == "BASIC" ]]; then
+        _eqi_basic_init "$1" "$2"
+        return 0
     fi
 
-    echo "Storing initial state of a task"
-    if [[ ! -e "$base_dir" ]]; then
-        echo "EQI_NO_DIR" > "$RESUME_FILE_PFX"${run}_${phase}
-    elif [[ $EQI_RESUME_LEVEL == "MODERATE" ]]; then
-        find "$base_dir" > "$RESUME_FILE_PFX"${run}_${phase}
+    eqi_run_module eqi.resume_engine init "$1" "$2" "$EQI_RESUME_LEVEL"
+    ret=$?
+
+    # The task can't be safely processed on a not cleaned run dir
+    if (( ret != 0 )); then
+        echo "Initialisation of data for resume failed with exit code $ret" >&2
+        exit $ret
     fi
 }
 
 eqi_resume_finish() {
+    # Records the completion of a phase of the comma-separated runs
 
     if [[ $EQI_RESUME_LEVEL == "DISABLED" ]]; then
         return 0;
     fi
 
-    echo "Marking completion of task"
+    # The hashes of outputs (declared in EQI_RESUME_OUTPUTS) are stored by the resume engine,
+    # the task without the declared outputs fails
+    if [[ $EQI_RESUME_LEVEL == "VERIFIED" ]]; then
+        eqi_run_module eqi.resume_engine finish "$1" "$2" "$EQI_RESUME_LEVEL" || exit $?
+        return 0
+    fi
 
-    run=$1
-    phase="$2"
+    echo "Marking completion of task"
 
-    echo "EQI_COMPLETED" > "$RESUME_FILE_PFX"${run}_${phase}
+    local run
+    for run in ${1//,/ }
+    do
+        _eqi_journal_append "$RECORD_COMPLETED" "$run" "$2"
+    done
 }
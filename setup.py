@@ -34,6 +34,9 @@ setup(
         'scripts/easyvvuq_encode',
         'scripts/easyvvuq_execute',
         'scripts/easyvvuq_encode_execute',
+        'scripts/easyvvuq_decode',
+        'scripts/eqi_encoder_client',
+        'scripts/eqi_run_module',
         'scripts/eqi_utils.sh'
     ],
 
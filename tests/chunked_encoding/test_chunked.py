@@ -0,0 +1,206 @@
+import os
+import sys
+import math
+import time
+import socket
+import subprocess
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+CHUNK_SIZE = 4
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def _prepare_chunked(backend=Backend.QCGPJ):
+    print("Job directory: " + jobdir)
+    print("Temporary directory: " + tmpdir)
+
+    # ---- CAMPAIGN INITIALISATION ---
+    print("Initializing Campaign")
+    # Set up a fresh campaign called "cooling"
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+
+    # Associate the sampler with the campaign
+    my_campaign.set_sampler(cooling_sampler)
+
+    # Will draw all (of the finite set of samples)
+    my_campaign.draw_samples()
+
+    print("Preparing execution with QCG-PJ")
+    qcgpjexec = Executor(my_campaign)
+
+    # Create QCG PJ-Manager with 4 cores
+    # (if you want to use all available resources remove resources parameter)
+    qcgpjexec.create_manager(resources="4", log_level='debug', backend=backend)
+
+    # 9 samples are encoded in chunks of 4 samples (the last chunk is smaller)
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1),
+        chunk_size=CHUNK_SIZE
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    return my_campaign, qcgpjexec, cooling_stats
+
+
+def _run_chunked(processing_scheme):
+    my_campaign, qcgpjexec, cooling_stats = _prepare_chunked()
+
+    print("Starting execution with QCG-PJ")
+    qcgpjexec.run(processing_scheme=processing_scheme)
+
+    # a single encoding task (or iteration) per chunk of samples
+    runs = list(my_campaign.campaign_db.run_ids())
+    jobs = qcgpjexec._qcgpjm.list()
+    if processing_scheme.is_iterative():
+        encode_tasks = qcgpjexec._qcgpjm.info(['encode'], withChilds=True)['jobs']['encode']['data']['childs']
+    else:
+        encode_tasks = [job_name for job_name in jobs if job_name.startswith('encode_')]
+    assert len(encode_tasks) == math.ceil(len(runs) / CHUNK_SIZE)
+
+    qcgpjexec.terminate_manager()
+
+    assert not qcgpjexec.get_failed_runs()
+    assert sorted(my_campaign.campaign_db.run_ids(status=uq.constants.Status.ENCODED)) == sorted(runs)
+
+    print("Collating results")
+    my_campaign.collate()
+
+    print("Making analysis")
+
+    my_campaign.apply_analysis(cooling_stats)
+
+    results = my_campaign.get_last_analysis()
+
+    stats = results.describe()['te'].loc['mean'], results.describe()['te'].loc['std']
+
+    print("Processing completed")
+    return stats
+
+
+def test_chunked_encoding_sample_oriented():
+    start_time = time.time()
+    print("Running CHUNKED ENCODING in SAMPLE_ORIENTED scheme")
+
+    stats = _run_chunked(ProcessingScheme.SAMPLE_ORIENTED)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
+def test_chunked_encoding_step_oriented_iterative():
+    start_time = time.time()
+    print("Running CHUNKED ENCODING in STEP_ORIENTED_CHUNKED_ITERATIVE scheme")
+
+    stats = _run_chunked(ProcessingScheme.STEP_ORIENTED_CHUNKED_ITERATIVE)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
+def test_chunked_encoding_resume():
+    start_time = time.time()
+    print("Running CHUNKED ENCODING of a partially encoded chunk")
+
+    my_campaign, qcgpjexec, _ = _prepare_chunked(Backend.LOCAL_POOL)
+    eqi_dir = qcgpjexec._eqi_dir
+
+    # the first two runs of the first chunk have been encoded by an interrupted workflow
+    subprocess.run([sys.executable, '-m', 'eqi.external_encoder', 'Run_1,Run_2'], cwd=eqi_dir, check=True)
+    with open(os.path.join(eqi_dir, f'.eqi_journal_{socket.gethostname()}'), 'a') as journal:
+        journal.write('EQI_COMPLETED Run_1 encode\nEQI_COMPLETED Run_2 encode\n')
+    inputs = {run_id: os.path.join(my_campaign.campaign_dir, 'runs', run_id, ENCODED_FILENAME)
+              for run_id in ('Run_1', 'Run_2')}
+    for path in inputs.values():
+        os.utime(path, (0, 0))
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+    qcgpjexec.terminate_manager()
+
+    # the completed runs are skipped by the task encoding their chunk, the remaining ones are encoded
+    runs = list(my_campaign.campaign_db.run_ids())
+    assert not qcgpjexec.get_failed_runs()
+    assert sorted(my_campaign.campaign_db.run_ids(status=uq.constants.Status.ENCODED)) == sorted(runs)
+    assert all(os.stat(path).st_mtime == 0 for path in inputs.values())
+    assert os.path.exists(os.path.join(my_campaign.campaign_dir, 'runs', 'Run_3', ENCODED_FILENAME))
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_chunked_encoding_sample_oriented()
+    test_chunked_encoding_step_oriented_iterative()
+    test_chunked_encoding_resume()
@@ -0,0 +1,229 @@
+import os
+import time
+import pathlib
+import tempfile
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme
+from eqi.external_decoder import DECODED_DIR
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def _prepare_decoding(application):
+    print("Job directory: " + jobdir)
+    print("Temporary directory: " + tmpdir)
+
+    # ---- CAMPAIGN INITIALISATION ---
+    print("Initializing Campaign")
+    # Set up a fresh campaign called "cooling"
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+
+    # Associate the sampler with the campaign
+    my_campaign.set_sampler(cooling_sampler)
+
+    # Will draw all (of the finite set of samples)
+    my_campaign.draw_samples()
+
+    print("Preparing execution with QCG-PJ")
+    qcgpjexec = Executor(my_campaign)
+
+    # Create QCG PJ-Manager with 4 cores
+    # (if you want to use all available resources remove resources parameter)
+    qcgpjexec.create_manager(resources="4", log_level='debug')
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application=application
+    ))
+
+    # 9 samples are decoded in chunks of 4 samples (the last chunk is smaller)
+    qcgpjexec.add_task(Task(
+        TaskType.DECODING,
+        TaskRequirements(cores=1),
+        chunk_size=4
+    ))
+
+    return my_campaign, qcgpjexec, cooling_stats
+
+
+def _run_decoding(processing_scheme):
+    my_campaign, qcgpjexec, cooling_stats = _prepare_decoding(
+        'python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME)
+
+    print("Starting execution with QCG-PJ")
+    qcgpjexec.run(processing_scheme=processing_scheme)
+
+    qcgpjexec.terminate_manager()
+
+    # The results are already stored in the campaign, so collate() is not needed
+    runs = [run[0] for run in my_campaign.list_runs()]
+    collated = list(my_campaign.campaign_db.run_ids(status=uq.constants.Status.COLLATED))
+    assert sorted(collated) == sorted(runs)
+
+    print("Making analysis")
+
+    my_campaign.apply_analysis(cooling_stats)
+
+    results = my_campaign.get_last_analysis()
+
+    stats = results.describe()['te'].loc['mean'], results.describe()['te'].loc['std']
+
+    print("Processing completed")
+    return stats
+
+
+def test_decoding_sample_oriented():
+    start_time = time.time()
+    print("Running PARALLEL DECODING in SAMPLE_ORIENTED_DECODING scheme")
+
+    stats = _run_decoding(ProcessingScheme.SAMPLE_ORIENTED_DECODING)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
+def test_decoding_step_oriented_iterative():
+    start_time = time.time()
+    print("Running PARALLEL DECODING in STEP_ORIENTED_DECODING_ITERATIVE scheme")
+
+    stats = _run_decoding(ProcessingScheme.STEP_ORIENTED_DECODING_ITERATIVE)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
+def test_decoding_failed_run(tmp_path):
+    start_time = time.time()
+    print("Running PARALLEL DECODING in SAMPLE_ORIENTED_DECODING scheme with a failed run")
+
+    # the application fails for the second run
+    application = tmp_path / 'failing_app.sh'
+    application.write_text('[ "$(basename "$PWD")" = Run_2 ] && exit 1\n'
+                           f'exec python3 {jobdir}/{APPLICATION} "$@"\n')
+
+    my_campaign, qcgpjexec, cooling_stats = _prepare_decoding(f'bash {application} {ENCODED_FILENAME}')
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED_DECODING)
+    qcgpjexec.terminate_manager()
+
+    # the decoding of the chunk of the failed run is not started, its remaining runs are left for collate()
+    assert qcgpjexec.get_failed_runs() == ['Run_2']
+    assert qcgpjexec.get_not_decoded_runs() == ['Run_1', 'Run_3', 'Run_4']
+    assert sorted(my_campaign.campaign_db.run_ids(status=uq.constants.Status.ENCODED)) == \
+        ['Run_1', 'Run_3', 'Run_4']
+    assert len(list(my_campaign.campaign_db.run_ids(status=uq.constants.Status.COLLATED))) == 5
+
+    my_campaign.collate()
+    assert len(list(my_campaign.campaign_db.run_ids(status=uq.constants.Status.COLLATED))) == 8
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+def test_decoding_killed_and_earlier_runs():
+    start_time = time.time()
+    print("Running PARALLEL DECODING in SAMPLE_ORIENTED_DECODING scheme with the runs of an earlier sampler")
+
+    my_campaign, qcgpjexec, cooling_stats = _prepare_decoding(
+        'python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME)
+
+    # the runs of the earlier sampler, processed by an earlier workflow without decoding
+    earlier_runs = list(my_campaign.campaign_db.run_ids())
+    my_campaign.campaign_db.set_run_statuses(earlier_runs, uq.constants.Status.ENCODED)
+    my_campaign.set_sampler(setup_cooling_app()[3])
+    my_campaign.draw_samples()
+
+    # the shard of a decoding task killed while appending a result
+    os.makedirs(f'{qcgpjexec._eqi_dir}/{DECODED_DIR}')
+    with open(f'{qcgpjexec._eqi_dir}/{DECODED_DIR}/killed.jsonl', 'w') as shard:
+        shard.write('{"run_id": "Run_1", "res')
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED_DECODING)
+    qcgpjexec.terminate_manager()
+
+    # only the runs of the workflow are decoded and reported
+    assert not qcgpjexec.get_failed_runs()
+    assert not qcgpjexec.get_not_decoded_runs()
+    assert sorted(my_campaign.campaign_db.run_ids(status=uq.constants.Status.ENCODED)) == sorted(earlier_runs)
+    assert len(list(my_campaign.campaign_db.run_ids(status=uq.constants.Status.COLLATED))) == len(earlier_runs)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_decoding_sample_oriented()
+    test_decoding_step_oriented_iterative()
+    test_decoding_failed_run(pathlib.Path(tempfile.mkdtemp()))
+    test_decoding_killed_and_earlier_runs()
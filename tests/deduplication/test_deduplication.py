@@ -0,0 +1,146 @@
+import os
+import time
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=1)
+    return params, encoder, decoder, cooling_sampler
+
+
+REPLICAS = 3
+
+
+def _run_deduplicated(processing_scheme, streaming=False):
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+
+    # every sample is added many times, as identical runs
+    my_campaign.draw_samples(replicas=REPLICAS)
+
+    qcgpjexec = Executor(my_campaign)
+    qcgpjexec.create_manager(resources="4", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=2),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    if streaming:
+        processed = list(qcgpjexec.run_streaming(processing_scheme=processing_scheme, poll_interval=1,
+                                                 deduplicate=True))
+    else:
+        qcgpjexec.run(processing_scheme=processing_scheme, deduplicate=True)
+        processed = my_campaign.list_runs(status=uq.constants.Status.ENCODED)
+
+    qcgpjexec.terminate_manager()
+
+    assert not qcgpjexec.get_failed_runs()
+
+    runs = my_campaign.list_runs()
+    assert len(processed) == len(runs)
+    for run_id, run_info in runs:
+        assert os.path.isfile(os.path.join(run_info['run_dir'], 'output.csv'))
+
+    report = qcgpjexec.get_deduplication_report()
+    print(f"Deduplication report: {report}")
+    assert report['unique_runs'] * REPLICAS == len(runs)
+    assert report['duplicate_runs'] == len(runs) - report['unique_runs']
+    assert report['saved_core_hours'] > 0
+
+    # the analysis of PCE doesn't accept replicated samples, thus only the collated results are checked
+    my_campaign.collate()
+    results = my_campaign.get_collation_result()
+    assert len(results) == len(runs)
+    assert results['te'].drop_duplicates().shape[0] * REPLICAS == len(runs)
+
+
+def test_deduplication_sample_oriented():
+    start_time = time.time()
+    print("Running SAMPLE_ORIENTED scheme with deduplication of runs")
+
+    _run_deduplicated(ProcessingScheme.SAMPLE_ORIENTED)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+def test_deduplication_streaming_iterative():
+    start_time = time.time()
+    print("Running STEP_ORIENTED_ITERATIVE scheme in streaming mode with deduplication of runs")
+
+    _run_deduplicated(ProcessingScheme.STEP_ORIENTED_ITERATIVE, streaming=True)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_deduplication_sample_oriented()
+    test_deduplication_streaming_iterative()
@@ -0,0 +1,171 @@
+import os
+import subprocess
+import time
+
+from glob import glob
+
+import pytest
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+from eqi.utils.env_snapshot import capture_config_environment, write_environment_script
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=1)
+    return params, encoder, decoder, cooling_sampler
+
+
+CONFIG = """#!/bin/bash
+echo "sourced" >> {log}
+echo "Loading the environment"
+export EQI_TEST_VARIABLE="a value
+with a new line"
+export PATH="/opt/eqi-test/bin:$PATH"
+eqi_test_function() {{ echo "test"; }}
+export -f eqi_test_function
+"""
+
+
+def write_config(tmp_path, content=None):
+    config_file = tmp_path / 'eqi_config.sh'
+    config_file.write_text(content or CONFIG.format(log=tmp_path / 'sourced.log'))
+    return str(config_file)
+
+
+def count_sourcing(tmp_path):
+    log = tmp_path / 'sourced.log'
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+def test_capture_config_environment(tmp_path):
+    env = capture_config_environment(write_config(tmp_path))
+
+    assert env['EQI_TEST_VARIABLE'] == 'a value\nwith a new line'
+    assert env['PATH'] == '/opt/eqi-test/bin:' + os.environ['PATH']
+    assert 'echo "test"' in env['BASH_FUNC_eqi_test_function%%']
+    # only the changes are captured
+    assert 'HOME' not in env and 'SHLVL' not in env
+    assert count_sourcing(tmp_path) == 1
+
+    with pytest.raises(RuntimeError):
+        capture_config_environment(write_config(tmp_path, 'echo "failed" >&2; false'))
+
+
+def test_write_environment_script(tmp_path):
+    env = capture_config_environment(write_config(tmp_path))
+    script = str(tmp_path / 'config_env.sh')
+    write_environment_script(env, script)
+
+    # the variables and functions are exported by the script, also to the child processes
+    output = subprocess.run(['bash', '-c', f'. {script}; bash -c \'echo "$EQI_TEST_VARIABLE"; eqi_test_function\''],
+                            stdout=subprocess.PIPE, check=True).stdout.decode()
+    assert output == 'a value\nwith a new line\ntest\n'
+    assert count_sourcing(tmp_path) == 1
+
+
+def _run_with_config(config_file, **kwargs):
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign, config_file=config_file, **kwargs)
+    qcgpjexec.create_manager(resources="4", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+    qcgpjexec.terminate_manager()
+
+    assert not qcgpjexec.get_failed_runs()
+    return my_campaign
+
+
+def test_config_snapshot(tmp_path):
+    start_time = time.time()
+
+    # the config file is sourced only once, by the Executor, and its environment is stored for tasks
+    campaign = _run_with_config(write_config(tmp_path), config_snapshot=True)
+    assert count_sourcing(tmp_path) == 1
+    assert glob(f'{campaign.campaign_dir}/.eqi-*/.eqi_config_env')
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+def test_config_sourced_by_tasks(tmp_path):
+    start_time = time.time()
+
+    # by default the config file is sourced by every encoding and execution task
+    campaign = _run_with_config(write_config(tmp_path))
+    assert count_sourcing(tmp_path) == 2 * len(campaign.list_runs())
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
@@ -319,8 +319,69 @@ def test_execution():
     return stats
 
 
+def test_failed_execution():
+    start_time = time.time()
+
+    print("Running FAILED EXECUTION")
+    print("Job directory: " + jobdir)
+    print("Temporary directory: " + tmpdir)
+
+    # ---- CAMPAIGN INITIALISATION ---
+    print("Initializing Campaign")
+    # Set up a fresh campaign called "cooling"
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+
+    # Associate the sampler with the campaign
+    my_campaign.set_sampler(cooling_sampler)
+
+    # Will draw all (of the finite set of samples)
+    my_campaign.draw_samples()
+
+    print("Preparing execution with QCG-PJ")
+    qcgpjexec = Executor(my_campaign)
+
+    # Create QCG PJ-Manager with 4 cores
+    # (if you want to use all available resources remove resources parameter)
+    qcgpjexec.create_manager(resources="4", log_level='debug')
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    # the application always fails
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='false'
+    ))
+
+    print("Starting execution with QCG-PJ")
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+
+    qcgpjexec.terminate_manager()
+
+    # the failed runs are reported and not marked as ENCODED
+    runs = my_campaign.list_runs()
+    assert len(qcgpjexec.get_failed_runs()) == len(runs)
+    assert all(run_info['status'] == uq.constants.Status.NEW for _, run_info in runs)
+
+    print("Processing completed")
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
 if __name__ == "__main__":
     test_encoding_execution_step_oriented()
     test_encoding_execution_sample_oriented()
     test_encoding_execution_sample_oriented_condensed()
     test_execution()
+    test_failed_execution()
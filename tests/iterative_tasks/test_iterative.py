@@ -255,7 +255,87 @@ def test_iterative_execution():
     return stats
 
 
+def test_iterative_non_contiguous_runs():
+    start_time = time.time()
+    print("Running ITERATIVE ENCODING AND EXECUTION for non-contiguous runs")
+    print("Job directory: " + jobdir)
+    print("Temporary directory: " + tmpdir)
+
+    # ---- CAMPAIGN INITIALISATION ---
+    print("Initializing Campaign")
+    # Set up a fresh campaign called "cooling"
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+
+    my_campaign.add_app(name="cooling_default",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+
+    # Associate the sampler with the campaign
+    my_campaign.set_app("cooling")
+    my_campaign.set_sampler(cooling_sampler)
+
+    # The samples are drawn in two parts, with a run of another app in between,
+    # so the runs of the "cooling" app are not contiguous
+    my_campaign.draw_samples(num_samples=4)
+    my_campaign.set_app("cooling_default")
+    my_campaign.add_default_run()
+    my_campaign.set_app("cooling")
+    my_campaign.draw_samples()
+
+    print("Preparing execution with QCG-PJ")
+    qcgpjexec = Executor(my_campaign)
+
+    # Create QCG PJ-Manager with 4 cores
+    # (if you want to use all available resources remove resources parameter)
+    qcgpjexec.create_manager(resources="4", log_level='debug')
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    print("Starting execution with QCG-PJ")
+    qcgpjexec.run(processing_scheme=ProcessingScheme.STEP_ORIENTED_ITERATIVE)
+
+    qcgpjexec.terminate_manager()
+
+    # The run of the other app is not processed
+    assert my_campaign.campaign_db.get_run_status('Run_5') == uq.constants.Status.NEW
+    assert not qcgpjexec.get_failed_runs()
+
+    print("Collating results")
+    my_campaign.collate()
+
+    print("Making analysis")
+
+    my_campaign.apply_analysis(cooling_stats)
+
+    results = my_campaign.get_last_analysis()
+
+    stats = results.describe()['te'].loc['mean'], results.describe()['te'].loc['std']
+
+    print("Processing completed")
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
 if __name__ == "__main__":
     test_iterative_encoding_execution()
     test_iterative_encoding_execution_condensed()
     test_iterative_execution()
+    test_iterative_non_contiguous_runs()
@@ -0,0 +1,212 @@
+import os
+import time
+
+from glob import glob
+
+from qcg.pilotjob.api.job import Jobs
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend, ResumeLevel
+from eqi.core.pool_manager import PoolManager
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def _run_local_pool(processing_scheme, resume_level=ResumeLevel.BASIC, track_run_states=False):
+    print("Job directory: " + jobdir)
+    print("Temporary directory: " + tmpdir)
+
+    # ---- CAMPAIGN INITIALISATION ---
+    print("Initializing Campaign")
+    # Set up a fresh campaign called "cooling"
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+
+    # Associate the sampler with the campaign
+    my_campaign.set_sampler(cooling_sampler)
+
+    # Will draw all (of the finite set of samples)
+    my_campaign.draw_samples()
+
+    print("Preparing execution with local pool")
+    qcgpjexec = Executor(my_campaign, track_run_states=track_run_states)
+
+    # Create local pool manager with 4 cores
+    # (if you want to use all available cores remove resources parameter)
+    qcgpjexec.create_manager(resources="4", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=2),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME,
+        resume_level=resume_level,
+        outputs=['output.csv']
+    ))
+
+    print("Starting execution with local pool")
+    qcgpjexec.run(processing_scheme=processing_scheme)
+
+    qcgpjexec.terminate_manager()
+
+    assert not qcgpjexec.get_failed_runs()
+
+    if resume_level == ResumeLevel.VERIFIED:
+        run_dirs = glob(f'{my_campaign.campaign_dir}/runs/Run_*')
+        assert run_dirs and len(glob(f'{my_campaign.campaign_dir}/runs/Run_*/.eqi_outputs_execute')) == len(run_dirs)
+
+    if track_run_states:
+        run_states = qcgpjexec.get_run_states()
+        runs = len(glob(f'{my_campaign.campaign_dir}/runs/Run_*'))
+        assert run_states.get_summary()['execute'] == {'COMPLETED': runs}
+        assert run_states.get_summary()['encode'] == {'COMPLETED': runs}
+        assert not run_states.get_not_completed_runs('execute')
+        assert run_states.get('Run_1', 'execute')['exit_code'] == 0
+
+    print("Collating results")
+    my_campaign.collate()
+
+    print("Making analysis")
+
+    my_campaign.apply_analysis(cooling_stats)
+
+    results = my_campaign.get_last_analysis()
+
+    stats = results.describe()['te'].loc['mean'], results.describe()['te'].loc['std']
+
+    print("Processing completed")
+    return stats
+
+
+def test_local_pool_sample_oriented():
+    start_time = time.time()
+    print("Running SAMPLE_ORIENTED scheme with local pool")
+
+    stats = _run_local_pool(ProcessingScheme.SAMPLE_ORIENTED)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
+def test_local_pool_step_oriented_iterative():
+    start_time = time.time()
+    print("Running STEP_ORIENTED_ITERATIVE scheme with local pool")
+
+    stats = _run_local_pool(ProcessingScheme.STEP_ORIENTED_ITERATIVE)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
+def test_local_pool_verified_resume_level():
+    start_time = time.time()
+    print("Running SAMPLE_ORIENTED scheme with local pool and VERIFIED resume level")
+
+    stats = _run_local_pool(ProcessingScheme.SAMPLE_ORIENTED, ResumeLevel.VERIFIED, track_run_states=True)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+    return stats
+
+
+def test_local_pool_dependencies():
+    jobs = Jobs()
+    jobs.add(name='failing', exec='false')
+    jobs.add(name='omitted', exec='true', after=['failing'])
+    jobs.add(name='omitted_chain', exec='true', after=['omitted'])
+    jobs.add(name='first', exec='true', iteration=10)
+    # many tasks released by the completion of a single one
+    for i in range(200):
+        jobs.add(name=f'dependent_{i}', exec='true', after=['first'])
+    jobs.add(name='last', exec='true', after=[f'dependent_{i}' for i in range(200)])
+    jobs.add(name='too_big', exec='true', numCores=1000)
+    jobs.add(name='omitted_big', exec='true', after=['too_big'])
+
+    manager = PoolManager(tmpdir, cores=4)
+    try:
+        manager.submit(jobs)
+        manager.wait4all()
+        statuses = {name: info['status'] for name, info in manager.list().items()}
+        assert manager.resources()['free_cores'] == 4
+    finally:
+        manager.finish()
+
+    assert statuses.pop('failing') == 'FAILED'
+    assert statuses.pop('too_big') == 'FAILED'
+    for name in ['omitted', 'omitted_chain', 'omitted_big']:
+        assert statuses.pop(name) == 'OMITTED'
+    assert set(statuses.values()) == {'SUCCEED'}
+
+
+if __name__ == "__main__":
+    test_local_pool_sample_oriented()
+    test_local_pool_step_oriented_iterative()
+    test_local_pool_verified_resume_level()
@@ -146,6 +146,35 @@ def test_multi_app_pj():
 #    stat_2 = results2['statistical_moments']["u2"]
 
 
+def test_runs_of_active_app_and_sampler():
+    campaign = uq.Campaign(name='multiapp_', work_dir=tmpdir)
+
+    (params1, encoder1, decoder1, sampler1, _, _) = setup_app1()
+    campaign.add_app(name="app1", params=params1, encoder=encoder1, decoder=decoder1)
+    campaign.set_app("app1")
+    campaign.set_sampler(sampler1)
+    campaign.draw_samples()
+    app1_runs = set(campaign.campaign_db.run_ids())
+
+    (params2, encoder2, decoder2, sampler2, _) = setup_app2()
+    campaign.add_app(name="app2", params=params2, encoder=encoder2, decoder=decoder2)
+    campaign.set_app("app2")
+    campaign.set_sampler(sampler2)
+    campaign.draw_samples()
+    sampler2_runs = set(campaign.campaign_db.run_ids()) - app1_runs
+
+    # the next sampler of the same app
+    sampler3 = setup_app2()[3]
+    campaign.set_sampler(sampler3)
+    campaign.draw_samples()
+    sampler3_runs = set(campaign.campaign_db.run_ids()) - app1_runs - sampler2_runs
+    assert app1_runs and sampler2_runs and sampler3_runs
+
+    # only the runs of the active app and sampler are processed by the Executor
+    qcgpjexec = eqi.Executor(campaign)
+    assert sorted(qcgpjexec._list_run_ids()) == sorted(sampler3_runs)
+
+
 # Main
 if __name__ == "__main__":
     start_time = time.time()
@@ -0,0 +1,181 @@
+import os
+import pstats
+import time
+import tracemalloc
+
+from glob import glob
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend, Profiler
+from eqi.utils.phase_timer import PhaseTimer
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def test_phase_timer():
+    timer = PhaseTimer([Profiler.CPROFILE, Profiler.TRACEMALLOC])
+
+    items = list(timer.timed_iter((i for i in range(3)), 'prepare'))
+    with timer.phase('submit'):
+        data = [bytearray(1024) for _ in range(1024)]
+    with timer.phase('submit'):
+        del data
+
+    timings = timer.get_timings()
+    assert items == [0, 1, 2]
+    assert list(timings) == ['prepare', 'submit']
+    # the end of the iteration is measured too
+    assert timings['prepare']['calls'] == 4
+    assert timings['submit']['calls'] == 2
+    assert timings['submit']['peak_memory'] >= 2 ** 20
+    timer.stop()
+
+
+def test_phase_timer_without_reset_peak(monkeypatch):
+    # Python < 3.9 has no tracemalloc.reset_peak(), the peak of tracing is used only if exceeded in a phase
+    monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    timer = PhaseTimer([Profiler.TRACEMALLOC])
+
+    with timer.phase('prepare'):
+        kept = [bytearray(1024) for _ in range(1024)]
+        data = [bytearray(1024) for _ in range(4 * 1024)]
+    del data
+    with timer.phase('submit'):
+        data = [bytearray(1024) for _ in range(1024)]
+    del data
+
+    timings = timer.get_timings()
+    assert timings['prepare']['peak_memory'] >= 5 * 2 ** 20
+    assert 2 ** 20 <= timings['submit']['peak_memory'] < 4 * 2 ** 20
+    # the tracing is not restarted, the allocations of earlier phases are still traced
+    assert tracemalloc.get_traced_memory()[0] >= 2 ** 20
+    del kept
+    timer.stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_phase_timer_profiles(tmp_path):
+    timer = PhaseTimer([Profiler.CPROFILE])
+    with timer.phase('sync'):
+        sorted(range(100))
+
+    paths = timer.dump_profiles(str(tmp_path))
+    assert paths == [str(tmp_path / 'profile_sync.prof')]
+    assert any(func[2] == "<built-in method builtins.sorted>" for func in pstats.Stats(paths[0]).stats)
+    assert timer.get_timings()['sync']['peak_memory'] is None
+
+
+def test_profilers_from_environment(monkeypatch):
+    monkeypatch.setenv('EQI_PROFILE', 'cProfile, tracemalloc')
+    assert Profiler.from_environment() == [Profiler.CPROFILE, Profiler.TRACEMALLOC]
+    monkeypatch.delenv('EQI_PROFILE')
+    assert Profiler.from_environment() == []
+
+
+def test_phase_timings_local_pool():
+    start_time = time.time()
+    print("Running SAMPLE_ORIENTED scheme with profiling of phases")
+
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign, profilers=[Profiler.CPROFILE])
+    qcgpjexec.create_manager(resources="4", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+
+    qcgpjexec.terminate_manager()
+
+    timings = qcgpjexec.get_phase_timings()
+    assert list(timings) == ['prepare', 'submit', 'wait', 'collect', 'sync']
+    assert timings['submit']['calls'] == 1
+    assert timings['wait']['time'] > timings['submit']['time']
+
+    eqi_dir, = glob(f'{my_campaign.campaign_dir}/.eqi-*')
+    for phase in timings:
+        assert os.path.exists(os.path.join(eqi_dir, f'profile_{phase}.prof'))
+    with open(os.path.join(eqi_dir, 'eqi.log')) as log:
+        assert 'Phase timings: prepare' in log.read()
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_phase_timer()
+    test_phase_timings_local_pool()
@@ -0,0 +1,99 @@
+import os
+import stat
+import sys
+
+from eqi.result_cache import ResultCache, WRITE_PERMISSIONS
+
+__license__ = "LGPL"
+
+# Appends a line to the executions log (to count the executions) and writes the output of a model
+MODEL = "import sys; open(sys.argv[1], 'a').write('x\\n'); " \
+        "open('output.csv', 'w').write(open('input.json').read() * 100); " \
+        "import os; os.makedirs('results', exist_ok=True); open('results/a.dat', 'w').write('a')"
+
+
+def create_run_dir(path, content):
+    os.makedirs(path)
+    with open(os.path.join(path, 'input.json'), 'w') as f:
+        f.write(content)
+    return str(path)
+
+
+def count_executions(log):
+    return len(open(log).readlines()) if os.path.exists(log) else 0
+
+
+def test_result_cache_hit(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    log = str(tmp_path / 'executions.log')
+    args = [sys.executable, '-c', MODEL, log]
+
+    run_1 = create_run_dir(tmp_path / 'Run_1', '{"kappa": 0.025}')
+    assert cache.execute(run_1, args) == 0
+    assert count_executions(log) == 1
+
+    # the same inputs in another run directory (e.g. of another campaign)
+    run_2 = create_run_dir(tmp_path / 'Run_2', '{"kappa": 0.025}')
+    assert cache.execute(run_2, args) == 0
+    assert count_executions(log) == 1
+    assert open(os.path.join(run_2, 'output.csv')).read() == open(os.path.join(run_1, 'output.csv')).read()
+    assert os.path.isfile(os.path.join(run_2, 'results', 'a.dat'))
+
+    # different inputs
+    run_3 = create_run_dir(tmp_path / 'Run_3', '{"kappa": 0.05}')
+    assert cache.execute(run_3, args) == 0
+    assert count_executions(log) == 2
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+
+
+def test_result_cache_eviction(tmp_path):
+    # the outputs of a single execution take about 1.7 kB
+    cache = ResultCache(str(tmp_path / 'cache'), max_size=4000)
+    log = str(tmp_path / 'executions.log')
+    args = [sys.executable, '-c', MODEL, log]
+
+    for i in range(3):
+        cache.execute(create_run_dir(tmp_path / f'Run_{i}', f'{{"kappa": 0.0{i}}}'), args)
+    assert cache.get_stats()['entries'] == 2
+    assert cache.get_stats()['evicted'] == 1
+
+    # the least recently used entry (of the first run) has been evicted
+    cache.execute(create_run_dir(tmp_path / 'Run_0_again', '{"kappa": 0.00}'), args)
+    assert count_executions(log) == 4
+
+    # the failed executions are not stored
+    assert cache.execute(create_run_dir(tmp_path / 'Run_failed', '{}'), [sys.executable, '-c', 'exit(3)']) == 3
+    assert cache.execute(create_run_dir(tmp_path / 'Run_failed_again', '{}'),
+                         [sys.executable, '-c', 'exit(3)']) == 3
+
+
+def test_result_cache_restore(tmp_path):
+    log = str(tmp_path / 'executions.log')
+    args = [sys.executable, '-c', MODEL, log]
+
+    # by default the outputs are copied, so their in-place modification doesn't change the entry
+    cache = ResultCache(str(tmp_path / 'cache'))
+    run_1 = create_run_dir(tmp_path / 'Run_1', '{"kappa": 0.025}')
+    cache.execute(run_1, args)
+    run_2 = create_run_dir(tmp_path / 'Run_2', '{"kappa": 0.025}')
+    cache.execute(run_2, args)
+    with open(os.path.join(run_2, 'output.csv'), 'a') as f:
+        f.write('appended')
+    run_3 = create_run_dir(tmp_path / 'Run_3', '{"kappa": 0.025}')
+    cache.execute(run_3, args)
+    assert open(os.path.join(run_3, 'output.csv')).read() == open(os.path.join(run_1, 'output.csv')).read()
+
+    # the hardlinks to the entry are read-only
+    cache = ResultCache(str(tmp_path / 'cache'), link_outputs=True)
+    run_4 = create_run_dir(tmp_path / 'Run_4', '{"kappa": 0.025}')
+    cache.execute(run_4, args)
+    assert os.stat(os.path.join(run_4, 'output.csv')).st_nlink == 2
+    assert not os.stat(os.path.join(run_4, 'results', 'a.dat')).st_mode & WRITE_PERMISSIONS
+
+    # the copies of read-only files of the entry are writable
+    run_5 = create_run_dir(tmp_path / 'Run_5', '{"kappa": 0.025}')
+    ResultCache(str(tmp_path / 'cache')).execute(run_5, args)
+    assert os.stat(os.path.join(run_5, 'output.csv')).st_mode & stat.S_IWUSR
+    assert count_executions(log) == 1
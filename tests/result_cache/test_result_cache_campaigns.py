@@ -0,0 +1,139 @@
+import os
+import time
+import pathlib
+import tempfile
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+from eqi.result_cache import ResultCache
+from eqi.utils.runtime_history import RuntimeHistory
+from eqi.utils.runtimes import read_runtimes
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def _run_campaign(cache_dir, history_path):
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign, runtime_history=history_path)
+    qcgpjexec.create_manager(resources="4", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME,
+        cache_dir=cache_dir
+    ))
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+    qcgpjexec.terminate_manager()
+
+    assert not qcgpjexec.get_failed_runs()
+
+    my_campaign.collate()
+    my_campaign.apply_analysis(cooling_stats)
+    results = my_campaign.get_last_analysis()
+
+    return results.describe()['te'].loc['mean'], results.describe()['te'].loc['std'], qcgpjexec
+
+
+def test_result_cache_across_campaigns(tmp_path):
+    start_time = time.time()
+    cache_dir = str(tmp_path / 'cache')
+    history_path = str(tmp_path / 'runtimes.sqlite')
+
+    print("Running the first campaign, filling the result cache")
+    first_mean, first_std, _ = _run_campaign(cache_dir, history_path)
+    first_stats = ResultCache(cache_dir).get_stats()
+    assert first_stats['hits'] == 0 and first_stats['entries'] == first_stats['misses'] > 0
+    assert len(RuntimeHistory(history_path).get_records('cooling')) == first_stats['misses']
+
+    print("Running the second campaign with the same samples, restored from the result cache")
+    mean, std, qcgpjexec = _run_campaign(cache_dir, history_path)
+    assert mean.equals(first_mean) and std.equals(first_std)
+    second_stats = ResultCache(cache_dir).get_stats()
+    assert second_stats['hits'] == first_stats['misses'] and second_stats['misses'] == first_stats['misses']
+
+    # the restored runs are completed, but their wall times are not the runtimes of the application
+    eqi_dir = qcgpjexec._eqi_dir
+    assert len(read_runtimes(eqi_dir, include_cached=True)) == second_stats['hits']
+    assert read_runtimes(eqi_dir) == {}
+    assert qcgpjexec.get_eta()['remaining_runs'] == 0
+    assert len(RuntimeHistory(history_path).get_records('cooling')) == first_stats['misses']
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_result_cache_across_campaigns(pathlib.Path(tempfile.mkdtemp()))
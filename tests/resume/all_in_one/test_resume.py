@@ -153,6 +153,10 @@ def test_cooling_pj():
 
     qcgpjexec.terminate_manager()
 
+    # The resume information is stored in the journal, not in separate files for each run
+    assert glob(f'{eqi_dirs[0]}/.eqi_journal_*')
+    assert not glob(f'{eqi_dirs[0]}/.eqi_resume_*')
+
     print("Collating results")
     my_campaign.collate()
 
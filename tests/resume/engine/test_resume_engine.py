@@ -0,0 +1,183 @@
+import os
+
+import pytest
+
+from eqi import Task, TaskType
+from eqi.core.resume import ResumeJournal, ResumeLevel, JOURNAL_INDEX_DIR
+from eqi.resume_engine import init_task, finish_task, init_tasks, finish_tasks, load_snapshot
+
+__license__ = "LGPL"
+
+
+def create_files(base_dir, *paths):
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.join(base_dir, path)), exist_ok=True)
+        with open(os.path.join(base_dir, path), 'w') as f:
+            f.write('x')
+
+
+def list_files(base_dir):
+    return sorted(os.path.relpath(os.path.join(root, name), base_dir)
+                  for root, dirs, files in os.walk(base_dir) for name in dirs + files)
+
+
+def test_resume_engine_moderate(tmp_path):
+    eqi_dir = tmp_path / 'eqi'
+    eqi_dir.mkdir()
+    run_dir = tmp_path / 'runs' / 'Run_1'
+    create_files(run_dir, 'input.json', 'data/mesh.dat')
+
+    assert not init_task(str(eqi_dir), 'Run_1', 'execute', 'MODERATE')
+
+    # the files created by the killed task are removed, the initial ones kept (even if modified)
+    create_files(run_dir, 'output.csv', 'data/partial.dat', 'data-new/a.dat', 'results/a/b.dat', 'input.json')
+    assert not init_task(str(eqi_dir), 'Run_1', 'execute', 'MODERATE')
+    assert list_files(run_dir) == ['data', 'data/mesh.dat', 'input.json']
+
+    # the snapshot is stored once, in the snapshot journal of the node
+    assert len(list(eqi_dir.glob('.eqi_snapshots_*'))) == 1
+    assert load_snapshot(str(eqi_dir), 'Run_1', 'execute')[0][0] == 'data'
+    create_files(run_dir, 'output.csv')
+    assert not init_task(str(eqi_dir), 'Run_1', 'execute', 'MODERATE')
+    assert list_files(run_dir) == ['data', 'data/mesh.dat', 'input.json']
+    assert len(next(eqi_dir.glob('.eqi_snapshots_*')).read_text().splitlines()) == 1
+
+    journal = ResumeJournal(str(eqi_dir))
+    assert journal.get_records('Run_1', 'execute') == {'EQI_STARTED'}
+    assert journal.get_records('Run_1', 'encode') == set()
+
+
+def test_resume_engine_basic(tmp_path):
+    eqi_dir = tmp_path / 'eqi'
+    eqi_dir.mkdir()
+    run_dir = tmp_path / 'runs' / 'Run_1'
+
+    assert not init_task(str(eqi_dir), 'Run_1', 'encode', 'BASIC')
+
+    # the run dir created by the killed task is removed
+    create_files(run_dir, 'input.json')
+    assert not init_task(str(eqi_dir), 'Run_1', 'encode', 'BASIC')
+    assert not run_dir.exists()
+
+    with open(next(eqi_dir.glob('.eqi_journal_*')), 'a') as journal:
+        journal.write('EQI_COMPLETED Run_1 encode\n')
+    assert init_task(str(eqi_dir), 'Run_1', 'encode', 'BASIC')
+    assert ResumeJournal(str(eqi_dir)).is_completed('Run_1', 'encode')
+
+
+def test_resume_engine_verified(tmp_path):
+    eqi_dir = tmp_path / 'eqi'
+    eqi_dir.mkdir()
+    run_dir = tmp_path / 'runs' / 'Run_1'
+    create_files(run_dir, 'input.json')
+
+    assert not init_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED')
+    with pytest.raises(FileNotFoundError):
+        finish_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED', ['output*.csv'])
+
+    create_files(run_dir, 'output_1.csv', 'output_2.csv')
+    finish_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED', ['output*.csv'])
+    assert init_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED')
+
+    # the intact outputs are detected even if the EQI directory has been recreated
+    new_eqi_dir = tmp_path / 'new_eqi'
+    new_eqi_dir.mkdir()
+    assert init_task(str(new_eqi_dir), 'Run_1', 'execute', 'VERIFIED')
+    assert ResumeJournal(str(new_eqi_dir)).is_completed('Run_1', 'execute')
+
+    # the corrupted outputs are processed again, even if the phase is marked as completed
+    with open(run_dir / 'output_2.csv', 'w') as f:
+        f.write('truncated')
+    assert not init_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED')
+    assert list_files(run_dir) == ['input.json']
+
+    # the outputs are required before any task is submitted
+    with pytest.raises(ValueError):
+        Task(TaskType.EXECUTION, resume_level=ResumeLevel.VERIFIED, application='model')
+
+    # the processing of the corrupted outputs is killed, the phase is still not completed on the next resume
+    create_files(run_dir, 'output_1.csv')
+    assert not init_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED')
+    assert list_files(run_dir) == ['input.json']
+    assert ResumeJournal(str(eqi_dir)).is_completed('Run_1', 'execute')
+
+    create_files(run_dir, 'output_1.csv', 'output_2.csv')
+    finish_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED', ['output*.csv'])
+    assert init_task(str(eqi_dir), 'Run_1', 'execute', 'VERIFIED')
+
+
+def test_resume_engine_chunk(tmp_path):
+    eqi_dir = tmp_path / 'eqi'
+    eqi_dir.mkdir()
+    for run_id in ('Run_1', 'Run_2', 'Run_3'):
+        create_files(tmp_path / 'runs' / run_id, 'input.json')
+
+    # the runs of a chunk are initialised by a single call of the engine
+    assert init_tasks(str(eqi_dir), ['Run_1', 'Run_2', 'Run_3'], 'execute', 'MODERATE') == ['Run_1', 'Run_2', 'Run_3']
+    finish_tasks(str(eqi_dir), ['Run_1'], 'execute', 'MODERATE', [])
+
+    # the completed run is skipped and the killed ones are restored from their snapshots
+    create_files(tmp_path / 'runs' / 'Run_2', 'output.csv')
+    create_files(tmp_path / 'runs' / 'Run_3', 'partial/output.csv')
+    assert init_tasks(str(eqi_dir), ['Run_1', 'Run_2', 'Run_3'], 'execute', 'MODERATE') == ['Run_2', 'Run_3']
+    assert list_files(tmp_path / 'runs' / 'Run_2') == ['input.json']
+    assert list_files(tmp_path / 'runs' / 'Run_3') == ['input.json']
+    assert len(next(eqi_dir.glob('.eqi_snapshots_*')).read_text().splitlines()) == 3
+
+
+def test_resume_journal_cutoff(tmp_path):
+    eqi_dir = tmp_path / 'eqi'
+    eqi_dir.mkdir()
+    journal_file = eqi_dir / '.eqi_journal_node_1'
+    journal_file.write_text('EQI_NO_DIR Run_1 encode\nEQI_COMPLETED Run_1 encode\nEQI_STARTED Run_2 enc')
+
+    # the records written after the submission of tasks are not read by tasks, nor the incomplete record
+    ResumeJournal(str(eqi_dir)).write_cutoff()
+    with open(journal_file, 'a') as journal:
+        journal.write('ode\nEQI_NO_DIR Run_3 encode\n')
+
+    journal = ResumeJournal(str(eqi_dir), before_cutoff=True)
+    assert journal.is_completed('Run_1', 'encode')
+    assert journal.get_records('Run_2', 'encode') == set()
+    assert journal.get_records('Run_3', 'encode') == set()
+
+    journal = ResumeJournal(str(eqi_dir))
+    assert journal.get_records('Run_3', 'encode') == {'EQI_NO_DIR'}
+
+    # the journal of a node created after the submission is not read by tasks
+    (eqi_dir / '.eqi_journal_node_2').write_text('EQI_COMPLETED Run_4 encode\n')
+    assert not ResumeJournal(str(eqi_dir), before_cutoff=True).is_completed('Run_4', 'encode')
+    assert ResumeJournal(str(eqi_dir)).is_completed('Run_4', 'encode')
+
+
+def test_resume_journal_index(tmp_path):
+    eqi_dir = tmp_path / 'eqi'
+    eqi_dir.mkdir()
+    for run_id in ('Run_1', 'Run_2', 'Run_11', 'Run_1001'):
+        create_files(tmp_path / 'runs' / run_id, 'input.json')
+
+    # a killed workflow
+    assert init_tasks(str(eqi_dir), ['Run_1', 'Run_2', 'Run_11', 'Run_1001'], 'execute', 'MODERATE') == \
+        ['Run_1', 'Run_2', 'Run_11', 'Run_1001']
+    finish_tasks(str(eqi_dir), ['Run_1', 'Run_1001'], 'execute', 'MODERATE', [])
+    for run_id in ('Run_2', 'Run_11'):
+        create_files(tmp_path / 'runs' / run_id, 'output.csv')
+
+    # the resumed tasks read only the index files of their runs, the runs are spread over many files
+    ResumeJournal(str(eqi_dir)).write_cutoff()
+    assert sorted(path.name for path in (eqi_dir / JOURNAL_INDEX_DIR / 'execute').iterdir()) == \
+        ['001', '_11', 'n_1', 'n_2']
+    journal = ResumeJournal(str(eqi_dir), before_cutoff=True)
+    assert journal.get_records('Run_1', 'execute') == {'EQI_STARTED', 'EQI_COMPLETED'}
+    assert journal.get_records('Run_1', 'encode') == set()
+    assert set(journal.get_snapshot_locations({('Run_2', 'execute'), ('Run_3', 'execute')})) == {('Run_2', 'execute')}
+
+    assert init_tasks(str(eqi_dir), ['Run_1', 'Run_2', 'Run_11', 'Run_1001'], 'execute', 'MODERATE') == \
+        ['Run_2', 'Run_11']
+    assert list_files(tmp_path / 'runs' / 'Run_2') == ['input.json']
+    assert list_files(tmp_path / 'runs' / 'Run_11') == ['input.json']
+
+    # the records written after the submission are not indexed
+    assert not init_task(str(eqi_dir), 'Run_3', 'execute', 'MODERATE')
+    assert ResumeJournal(str(eqi_dir), before_cutoff=True).get_records('Run_3', 'execute') == set()
+    assert ResumeJournal(str(eqi_dir)).get_records('Run_3', 'execute') == {'EQI_NO_DIR'}
@@ -0,0 +1,135 @@
+import os
+import time
+
+from glob import glob
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+from eqi.utils.runtimes import RUNTIMES_FILE_PFX, parse_runtime_record
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def read_start_times(eqi_dir):
+    start_times = {}
+    for runtimes_file in glob(f'{eqi_dir}/{RUNTIMES_FILE_PFX}*'):
+        with open(runtimes_file) as f:
+            for line in f:
+                run_id, start = parse_runtime_record(line)[:2]
+                start_times[run_id] = start
+    return start_times
+
+
+def test_longest_predicted_first():
+    start_time = time.time()
+    print("Running SAMPLE_ORIENTED scheme with the runs ordered by the predicted runtime")
+
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    # a single core, so the runs are executed one by one in the order of submission
+    qcgpjexec = Executor(my_campaign)
+    qcgpjexec.create_manager(resources="1", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1),
+        chunk_size=9
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    # the cost is predicted only for the runs with the highest kappa
+    def runtime_predictor(params):
+        return params['kappa'] * params['t_env'] if params['kappa'] > 0.06 else None
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED, runtime_predictor=runtime_predictor)
+
+    qcgpjexec.terminate_manager()
+
+    assert not qcgpjexec.get_failed_runs()
+
+    eqi_dir, = glob(f'{my_campaign.campaign_dir}/.eqi-*')
+    start_times = read_start_times(eqi_dir)
+    runs = dict(my_campaign.campaign_db.runs())
+    executed = sorted(start_times, key=start_times.get)
+    predicted = sorted((run_id for run_id in runs if runtime_predictor(runs[run_id]['params']) is not None),
+                       key=lambda run_id: -runtime_predictor(runs[run_id]['params']))
+
+    assert len(executed) == len(runs)
+    assert executed[:len(predicted)] == predicted
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_longest_predicted_first()
@@ -0,0 +1,155 @@
+import os
+import time
+
+import chaospy as cp
+import easyvvuq as uq
+import pytest
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+from eqi.core.tasks_manager import TasksManager
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def get_cores(task):
+    return task['resources']['numCores']['exact']
+
+
+def test_run_requirements():
+    small, large = TaskRequirements(cores=4), TaskRequirements(cores=64)
+
+    task = Task(TaskType.EXECUTION, small,
+                requirements_per_run=lambda params: large if params['mesh'] > 100 else None)
+    assert task.has_run_requirements()
+    assert task.get_run_requirements({'mesh': 200}) is large
+    assert task.get_run_requirements({'mesh': 50}) is small
+    assert task.get_run_requirements() is small
+
+    task = Task(TaskType.EXECUTION, small, requirements_per_run=('mesh', {200: large}))
+    assert task.get_run_requirements({'mesh': 200}) is large
+    assert task.get_run_requirements({'mesh': 50}) is small
+
+    task = Task(TaskType.EXECUTION, small, requirements_per_run=lambda params: 64)
+    with pytest.raises(ValueError):
+        task.get_run_requirements({'mesh': 200})
+
+    assert not Task(TaskType.EXECUTION, small).has_run_requirements()
+
+
+def test_run_requirements_tasks(tmp_path):
+    tasks_manager = TasksManager(None, str(tmp_path))
+    tasks_manager.add_task(Task(TaskType.ENCODING, TaskRequirements(cores=1)))
+    tasks_manager.add_task(Task(TaskType.EXECUTION, TaskRequirements(cores=4), application='model',
+                                requirements_per_run=('mesh', {200: TaskRequirements(cores=64)})))
+    assert tasks_manager.has_run_requirements()
+
+    tasks_manager.set_runs_params({'Run_1': {'mesh': 200}, 'Run_2': {'mesh': 50}})
+    assert get_cores(tasks_manager.get_task(TaskType.EXECUTION, key='Run_1')) == 64
+    assert get_cores(tasks_manager.get_task(TaskType.EXECUTION, key='Run_2')) == 4
+    # the runs of unknown parameters and the tasks processing many runs use the requirements of tasks
+    assert get_cores(tasks_manager.get_task(TaskType.EXECUTION, key='Run_3')) == 4
+    assert get_cores(tasks_manager.get_task(TaskType.ENCODING, key='Run_1,Run_2')) == 1
+
+
+def test_run_requirements_local_pool():
+    start_time = time.time()
+    print("Running SAMPLE_ORIENTED scheme with the requirements per run")
+
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign)
+    qcgpjexec.create_manager(resources="4", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    # the runs with the highest kappa require more cores than available, so they fail
+    max_kappa = 0.06
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME,
+        requirements_per_run=lambda params: TaskRequirements(cores=8) if params['kappa'] > max_kappa else None
+    ))
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+
+    qcgpjexec.terminate_manager()
+
+    expensive_runs = sorted(run_id for run_id, run in my_campaign.campaign_db.runs()
+                            if run['params']['kappa'] > max_kappa)
+    assert expensive_runs
+    assert qcgpjexec.get_failed_runs() == expensive_runs
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_run_requirements()
+    test_run_requirements_local_pool()
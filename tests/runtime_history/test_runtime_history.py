@@ -0,0 +1,211 @@
+import os
+import time
+import pathlib
+import tempfile
+
+import chaospy as cp
+import easyvvuq as uq
+import pytest
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+from eqi import RuntimeHistory, CostModelMethod
+from eqi.utils.runtime_history import CostModel
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def make_records():
+    # the cost grows linearly with kappa, the runs of the 'fine' mesh are twice as expensive
+    return [{'params': {'kappa': kappa, 'mesh': mesh, 'out_file': 'output.csv'}, 'cores': cores,
+             'wall_time': (100 * kappa + 1) * (2 if mesh == 'fine' else 1) / cores}
+            for kappa in (0.0, 0.1, 0.2, 0.3) for mesh, cores in (('coarse', 1), ('fine', 2))]
+
+
+def test_history_store(tmp_path):
+    path = str(tmp_path / 'history' / 'runtimes.sqlite')
+
+    history = RuntimeHistory(path)
+    assert history.get_records('cooling') == []
+    assert history.record('cooling', 'campaign_1', [('run_1', {'kappa': 0.1}, 2, 10.0),
+                                                    ('run_2', {'kappa': 0.2}, 2, 20.0)]) == 2
+    history.record('other', 'campaign_1', [('run_1', {'x': 1}, 1, 5.0)])
+    history.close()
+
+    # the records are persistent and the records of a run recorded again are replaced
+    history = RuntimeHistory(path)
+    history.record('cooling', 'campaign_1', [('run_2', {'kappa': 0.2}, 4, 12.0)])
+    records = history.get_records('cooling')
+    assert len(records) == 2
+    assert records[0] == {'params': {'kappa': 0.2}, 'cores': 4, 'wall_time': 12.0}
+    assert history.get_records('cooling', max_records=1) == records[:1]
+
+    model = history.fit('cooling', CostModelMethod.NEAREST, neighbours=1)
+    assert len(model) == 2
+    assert model({'kappa': 0.12}) == pytest.approx(20.0)
+    assert model({'kappa': 0.18}) == pytest.approx(48.0)
+    assert history.fit('unknown')({'kappa': 0.1}) is None
+    history.close()
+
+
+def test_nearest_cost_model():
+    model = CostModel(make_records(), CostModelMethod.NEAREST, neighbours=1)
+
+    # the cost is in core-seconds, thus independent of the number of cores of recorded runs
+    assert model.predict({'kappa': 0.1, 'mesh': 'coarse', 'out_file': 'output.csv'}) == pytest.approx(11.0)
+    assert model.predict({'kappa': 0.11, 'mesh': 'fine', 'out_file': 'output.csv'}) == pytest.approx(22.0)
+    assert model.predict_wall_time({'kappa': 0.29, 'mesh': 'fine', 'out_file': 'output.csv'}, 4) == \
+        pytest.approx(62.0 / 4)
+
+    # the differing non-numerical parameters increase the distance, the missing numerical ones prevent prediction
+    assert model.predict({'kappa': 0.2, 'mesh': 'medium', 'out_file': 'output.csv'}) in (pytest.approx(21.0),
+                                                                                         pytest.approx(42.0))
+    assert model.predict({'mesh': 'fine'}) is None
+
+    # the nearest run of a different mesh is farther than the neighbouring value of kappa
+    averaged = CostModel(make_records(), CostModelMethod.NEAREST, neighbours=2)
+    assert averaged.predict({'kappa': 0.0, 'mesh': 'coarse', 'out_file': 'output.csv'}) == pytest.approx(6.0)
+
+    with pytest.raises(ValueError):
+        CostModel(make_records(), neighbours=0)
+
+
+def test_linear_cost_model():
+    records = [record for record in make_records() if record['params']['mesh'] == 'coarse']
+    model = CostModel(records, CostModelMethod.LINEAR)
+
+    assert model.predict({'kappa': 0.15}) == pytest.approx(16.0)
+    assert model.predict({'kappa': 1.0}) == pytest.approx(101.0)
+    # the extrapolation doesn't give negative costs
+    assert model.predict({'kappa': -1.0}) == 0.0
+    assert CostModel([], CostModelMethod.LINEAR).predict({'kappa': 0.1}) is None
+
+
+def process_campaign(runtime_history, track_run_states=False):
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign, runtime_history=runtime_history, track_run_states=track_run_states)
+    qcgpjexec.create_manager(resources="4", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1),
+        chunk_size=9
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=2),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    return my_campaign, qcgpjexec
+
+
+def test_repeated_campaigns(tmp_path):
+    start_time = time.time()
+    print("Running two campaigns sharing the runtime history")
+
+    history_path = str(tmp_path / 'runtimes.sqlite')
+
+    # nothing is known about the runtimes before the first campaign
+    campaign, qcgpjexec = process_campaign(history_path)
+    assert qcgpjexec.get_eta() is None
+    assert qcgpjexec.advise_task_fitting()['tasks'][TaskType.EXECUTION]['makespan'] is None
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+    qcgpjexec.terminate_manager()
+    assert not qcgpjexec.get_failed_runs()
+
+    runs = dict(campaign.campaign_db.runs())
+    records = RuntimeHistory(history_path).get_records('cooling')
+    assert len(records) == len(runs)
+    assert all(record['cores'] == 2 and record['wall_time'] > 0 for record in records)
+
+    # the cost of runs of the next campaign is predicted from the history
+    campaign, qcgpjexec = process_campaign(history_path, track_run_states=True)
+    model = qcgpjexec.get_cost_model()
+    assert len(model) == len(runs)
+
+    eta = qcgpjexec.get_eta()
+    assert eta['remaining_runs'] == len(runs)
+    assert eta['eta'] == pytest.approx(eta['core_seconds'] / 4)
+    assert qcgpjexec.advise_task_fitting()['tasks'][TaskType.EXECUTION]['makespan'] > 0
+
+    # during the processing, the remaining runs are taken from the states of runs
+    remaining = [qcgpjexec.get_eta()['remaining_runs'] for _ in qcgpjexec.run_streaming(
+        processing_scheme=ProcessingScheme.SAMPLE_ORIENTED, poll_interval=1, runtime_predictor=model)]
+    qcgpjexec.terminate_manager()
+    assert len(remaining) == len(runs) and remaining[0] < len(runs)
+    assert remaining == sorted(remaining, reverse=True)
+    assert not qcgpjexec.get_failed_runs()
+    assert qcgpjexec.get_eta()['remaining_runs'] == 0
+    assert len(RuntimeHistory(history_path).get_records('cooling')) == 2 * len(runs)
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_repeated_campaigns(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,81 @@
+from eqi.utils.state_keeper import StateKeeper
+from eqi.utils.run_states import STATE_SUBMITTED, STATE_STARTED, STATE_COMPLETED, STATE_FAILED
+
+__license__ = "LGPL"
+
+
+def append(path, *lines):
+    with open(path, 'a') as f:
+        f.write(''.join(lines))
+
+
+def test_run_states_from_journals(tmp_path):
+    state_keeper = StateKeeper(str(tmp_path), run_states=True)
+    run_states = state_keeper.run_states
+    run_states.register(['Run_1', 'Run_2', 'Run_3'], 'execute')
+    assert run_states.get_summary() == {'execute': {STATE_SUBMITTED: 3}}
+
+    # the first attempt of Run_2 failed on node_a, the second one succeeded on node_b
+    append(tmp_path / '.eqi_journal_node_a',
+           'EQI_NO_DIR Run_1 encode\n', 'EQI_STARTED Run_1 execute\n', 'EQI_STARTED Run_2 execute\n')
+    append(tmp_path / '.eqi_runtimes_node_a', 'Run_2 10.0 12.5 3\n')
+    run_states.update()
+    assert run_states.get('Run_2', 'execute') == {
+        'state': STATE_FAILED, 'attempts': 1, 'start_time': 10.0, 'end_time': 12.5, 'exit_code': 3, 'host': 'node_a'}
+
+    append(tmp_path / '.eqi_journal_node_b', 'EQI_STARTED Run_2 execute\n', 'EQI_COMPLETED Run_2 execute\n',
+           'EQI_STARTED Run_3 exe')
+    append(tmp_path / '.eqi_runtimes_node_b', 'Run_2 20.0 21.0 0\n')
+    run_states.update()
+    assert run_states.get('Run_2', 'execute') == {
+        'state': STATE_COMPLETED, 'attempts': 2, 'start_time': 20.0, 'end_time': 21.0, 'exit_code': 0, 'host': 'node_b'}
+    assert run_states.get('Run_1', 'encode')['state'] == STATE_STARTED
+    assert run_states.get_not_completed_runs('execute') == ['Run_1', 'Run_3']
+
+    # the incomplete line is ingested once completed
+    append(tmp_path / '.eqi_journal_node_b', 'cute\n')
+    run_states.update()
+    assert run_states.get('Run_3', 'execute')['state'] == STATE_STARTED
+    assert run_states.get('Run_2', 'execute')['attempts'] == 2
+
+    # the completed phases are not marked as failed
+    run_states.mark(['Run_2', 'Run_3'], STATE_FAILED)
+    assert run_states.get_runs(['execute', 'encode_execute'], STATE_COMPLETED) == {'Run_2'}
+    assert run_states.get_summary() == {'encode': {STATE_STARTED: 1},
+                                        'execute': {STATE_STARTED: 1, STATE_COMPLETED: 1, STATE_FAILED: 1}}
+
+    # the table survives the restart of the Executor
+    run_states.close()
+    run_states = StateKeeper(str(tmp_path), run_states=True).run_states
+    run_states.update()
+    assert run_states.get('Run_2', 'execute')['attempts'] == 2
+
+
+def test_run_states_out_of_order(tmp_path):
+    run_states = StateKeeper(str(tmp_path), run_states=True).run_states
+    run_states.register(['Run_1', 'Run_2'], 'execute')
+
+    # the failed execution of the first attempt is ingested after the start of the second attempt
+    append(tmp_path / '.eqi_journal_node_z', 'EQI_STARTED Run_1 execute\n')
+    append(tmp_path / '.eqi_journal_node_a', 'EQI_STARTED Run_1 execute\n')
+    append(tmp_path / '.eqi_runtimes_node_z', 'Run_1 10.0 11.0 1\n')
+    run_states.update()
+    assert run_states.get('Run_1', 'execute')['state'] == STATE_STARTED
+    assert run_states.get('Run_1', 'execute')['attempts'] == 2
+
+    append(tmp_path / '.eqi_runtimes_node_a', 'Run_1 20.0 25.0 0\n')
+    append(tmp_path / '.eqi_journal_node_a', 'EQI_COMPLETED Run_1 execute\n')
+    run_states.update()
+    assert run_states.get('Run_1', 'execute') == {
+        'state': STATE_COMPLETED, 'attempts': 2, 'start_time': 20.0, 'end_time': 25.0, 'exit_code': 0, 'host': 'node_a'}
+
+    # the times of the later execution are not replaced by the earlier one, ingested after it
+    append(tmp_path / '.eqi_journal_node_z', 'EQI_STARTED Run_2 execute\n')
+    append(tmp_path / '.eqi_journal_node_a', 'EQI_STARTED Run_2 execute\n', 'EQI_COMPLETED Run_2 execute\n')
+    append(tmp_path / '.eqi_runtimes_node_a', 'Run_2 20.0 25.0 0\n')
+    append(tmp_path / '.eqi_runtimes_node_z', 'Run_2 10.0 11.0 1\n')
+    run_states.update()
+    assert run_states.get('Run_2', 'execute')['state'] == STATE_COMPLETED
+    assert run_states.get('Run_2', 'execute')['start_time'] == 20.0
+    assert run_states.get('Run_2', 'execute')['exit_code'] == 0
+    assert run_states.get_not_completed_runs('execute') == []
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from eqi.utils.state_keeper import StateKeeper, FsyncPolicy, EQI_STATE_FILE_NAME
+
+__license__ = "LGPL"
+
+
+def read_state_file(directory):
+    with open(os.path.join(directory, EQI_STATE_FILE_NAME), 'r') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('fsync_policy', list(FsyncPolicy))
+def test_state_keeper_atomic_write(tmp_path, fsync_policy):
+    state_keeper = StateKeeper(str(tmp_path), fsync_policy)
+    state_keeper.write_to_state_file({'campaign_name': 'cooling'})
+    state_keeper.write_to_state_file({'submitted': True})
+
+    assert read_state_file(tmp_path) == {'campaign_name': 'cooling', 'submitted': True}
+    assert StateKeeper(str(tmp_path)).get_from_state_file() == {'campaign_name': 'cooling', 'submitted': True}
+    # no temporary files left
+    assert os.listdir(tmp_path) == [EQI_STATE_FILE_NAME]
+
+    # a failed write doesn't affect the previous state
+    state_keeper.write_to_state_file({'submitted': True})
+    with pytest.raises(TypeError):
+        state_keeper.write_to_state_file({'completed': object()})
+    assert read_state_file(tmp_path) == {'campaign_name': 'cooling', 'submitted': True}
+    assert os.listdir(tmp_path) == [EQI_STATE_FILE_NAME]
+
+
+def test_state_keeper_coalesced_writes(tmp_path):
+    state_keeper = StateKeeper(str(tmp_path), write_interval=3600)
+    state_keeper.write_to_state_file({'submitted': True})
+    state_keeper.write_to_state_file({'completed': True})
+
+    # the updates made within the write interval are written by the flush
+    assert read_state_file(tmp_path) == {'submitted': True}
+    assert state_keeper.get_from_state_file() == {'submitted': True, 'completed': True}
+    state_keeper.flush()
+    assert read_state_file(tmp_path) == {'submitted': True, 'completed': True}
+
+    # the state is resumed from the file
+    state_keeper = StateKeeper(str(tmp_path))
+    state_keeper.write_to_state_file({'completed': False})
+    assert read_state_file(tmp_path) == {'submitted': True, 'completed': False}
@@ -0,0 +1,172 @@
+import os
+
+import chaospy as cp
+import easyvvuq as uq
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme, Backend
+from eqi.core.task_fitting import fit_task_cores, select_processing_scheme
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=1)
+    return params, encoder, decoder, cooling_sampler
+
+
+def test_fit_task_cores():
+    # 6-core tasks leave 4 of 10 cores idle, 5-core tasks fill the allocation
+    fit = fit_task_cores(10, 6, 100, runtime=60)
+    assert (fit['cores'], fit['idle_cores'], fit['utilisation']) == (5, 0, 1.0)
+    assert fit['resources'].get_dict() == {'exact': 5}
+    assert fit['makespan'] == 50 * 60 * 6 / 5
+
+    # the divisor closest to the declared number of cores
+    assert fit_task_cores(48, 5, 1000)['cores'] == 6
+    assert fit_task_cores(12, 4, 1200)['cores'] == 4
+
+    # a single wave of tasks may take the idle cores
+    fit = fit_task_cores(40, 4, 3)
+    assert fit['waves'] == 1
+    assert fit['resources'].get_dict() == {'min': 8, 'max': 13}
+
+    # the task doesn't fit in the allocation
+    assert fit_task_cores(4, 16, 10)['waves'] is None
+
+
+def test_select_processing_scheme():
+    separate = {TaskType.ENCODING, TaskType.EXECUTION}
+    assert select_processing_scheme(separate, 100, 4) == ProcessingScheme.SAMPLE_ORIENTED
+    assert select_processing_scheme(separate, 10000, 4) == ProcessingScheme.STEP_ORIENTED_ITERATIVE
+    assert select_processing_scheme({TaskType.EXECUTION}, 100) == ProcessingScheme.EXEC_ONLY
+
+    both = separate | {TaskType.ENCODING_AND_EXECUTION}
+    assert select_processing_scheme(both, 100, 1) == ProcessingScheme.SAMPLE_ORIENTED_CONDENSED
+    # the cores idle during the encoding are negligible only for the long executions
+    assert select_processing_scheme(both, 100, 4, encoding_runtime=1, execution_runtime=10) == \
+        ProcessingScheme.SAMPLE_ORIENTED
+    assert select_processing_scheme(both, 100, 4, encoding_runtime=1, execution_runtime=1000) == \
+        ProcessingScheme.SAMPLE_ORIENTED_CONDENSED
+
+
+def test_advise_task_fitting():
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign)
+    qcgpjexec.create_manager(resources="10", backend=Backend.LOCAL_POOL)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    execution = Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=6),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    )
+    qcgpjexec.add_task(execution)
+
+    advice = qcgpjexec.advise_task_fitting(runtime_estimates={TaskType.EXECUTION: 60}, apply=True)
+    qcgpjexec.terminate_manager()
+
+    assert (advice['total_cores'], advice['runs']) == (10, 4)
+    assert advice['processing_scheme'] == ProcessingScheme.SAMPLE_ORIENTED
+    assert TaskType.ENCODING not in advice['tasks']
+
+    # 4 runs of 6-core tasks take 4 waves, 2 waves of 5-core tasks are faster
+    proposal = advice['tasks'][TaskType.EXECUTION]
+    assert (proposal['declared_cores'], proposal['cores'], proposal['waves']) == (6, 5, 2)
+    assert execution.get_requirements().get_resources() == {'resources': {'numCores': {'exact': 5}}}
+
+
+def test_advise_task_fitting_named_tasks():
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign)
+    qcgpjexec.create_manager(resources="10", backend=Backend.LOCAL_POOL)
+
+    application = 'python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    qcgpjexec.add_task(Task(TaskType.ENCODING, TaskRequirements(cores=1), name='encode'))
+    qcgpjexec.add_task(Task(TaskType.EXECUTION, TaskRequirements(cores=6), name='execute', application=application))
+    qcgpjexec.add_task(Task(TaskType.ENCODING_AND_EXECUTION, TaskRequirements(cores=6), name='encode_execute',
+                            application=application))
+
+    # without the estimate of encoding, the cores idle during the encoding in the condensed scheme are unknown
+    advice = qcgpjexec.advise_task_fitting(runtime_estimates={'execute': 1000})
+    assert advice['processing_scheme'] == ProcessingScheme.SAMPLE_ORIENTED
+
+    # the estimates keyed by the names of tasks are used for both the makespan and the processing scheme
+    advice = qcgpjexec.advise_task_fitting(runtime_estimates={'encode': 1, 'execute': 1000})
+    qcgpjexec.terminate_manager()
+
+    assert advice['processing_scheme'] == ProcessingScheme.SAMPLE_ORIENTED_CONDENSED
+    proposal = advice['tasks']['execute']
+    assert (proposal['cores'], proposal['waves']) == (5, 2)
+    assert proposal['makespan'] == 2 * 1000 * 6 / 5
+    assert advice['tasks']['encode_execute']['makespan'] is None
@@ -0,0 +1,179 @@
+import importlib
+import os
+import time
+
+from datetime import datetime, timedelta
+
+import chaospy as cp
+import easyvvuq as uq
+import pandas as pd
+import pytest
+
+from eqi import TaskRequirements, Executor
+from eqi import Task, TaskType, ProcessingScheme
+from eqi.utils.tasks_stats import get_phase, summarise_tasks_stats
+
+# author: Jalal Lakhlili / Bartosz Bosak
+__license__ = "LGPL"
+
+
+TEMPLATE = "tests/app_cooling/cooling.template"
+APPLICATION = "tests/app_cooling/cooling_model.py"
+ENCODED_FILENAME = "cooling_in.json"
+
+if "SCRATCH" in os.environ:
+    tmpdir = os.environ["SCRATCH"]
+else:
+    tmpdir = "/tmp/"
+jobdir = os.getcwd()
+
+
+def parquet_supported():
+    # the export to Parquet requires pyarrow or fastparquet
+    for engine in ('pyarrow', 'fastparquet'):
+        try:
+            importlib.import_module(engine)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+def setup_cooling_app():
+    params = {
+        "temp_init": {
+            "type": "float",
+            "min": 0.0,
+            "max": 100.0,
+            "default": 95.0},
+        "kappa": {
+            "type": "float",
+            "min": 0.0,
+            "max": 0.1,
+            "default": 0.025},
+        "t_env": {
+            "type": "float",
+            "min": 0.0,
+            "max": 40.0,
+            "default": 15.0},
+        "out_file": {
+            "type": "string",
+            "default": "output.csv"}}
+    output_filename = params["out_file"]["default"]
+    output_columns = ["te"]
+
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=f"{jobdir}/{TEMPLATE}",
+        delimiter='$',
+        target_filename=ENCODED_FILENAME)
+    decoder = uq.decoders.SimpleCSV(target_filename=output_filename,
+                                    output_columns=output_columns)
+
+    vary = {
+        "kappa": cp.Uniform(0.025, 0.075),
+        "t_env": cp.Uniform(15, 25)
+    }
+
+    cooling_sampler = uq.sampling.PCESampler(vary=vary, polynomial_order=2)
+    cooling_stats = uq.analysis.PCEAnalysis(sampler=cooling_sampler, qoi_cols=output_columns)
+
+    return params, encoder, decoder, cooling_sampler, cooling_stats
+
+
+def test_get_phase():
+    assert get_phase('encode_Run_1') == 'encode'
+    assert get_phase('execute_Run_1') == 'execute'
+    assert get_phase('encode_execute_Run_1') == 'encode_execute'
+    assert get_phase('encode_execute:12') == 'encode_execute'
+    assert get_phase('decode') == 'decode'
+    assert get_phase('executor_service') is None
+
+
+def test_summarise_tasks_stats():
+    start = datetime(2024, 1, 1)
+
+    def task(name, cores, scheduled, latency, runtime):
+        started = start + timedelta(seconds=scheduled + latency)
+        return {'task': name, 'phase': get_phase(name), 'cores': cores, 'queued': start,
+                'scheduled': start + timedelta(seconds=scheduled), 'started': started,
+                'finished': started + timedelta(seconds=runtime), 'queue_wait': float(scheduled),
+                'launch_latency': float(latency), 'runtime': float(runtime)}
+
+    stats = pd.DataFrame([task('encode_Run_1', 1, 0, 2, 34),
+                          task('execute_Run_1', 2, 36, 4, 32)])
+    summary = summarise_tasks_stats(stats, total_cores=2)
+
+    assert summary['tasks'] == 2
+    assert summary['makespan'] == 72.0
+    assert summary['useful_core_hours'] == pytest.approx((34 + 2 * 32) / 3600)
+    assert summary['overhead_core_hours'] == pytest.approx((2 + 2 * 4) / 3600)
+    assert summary['overhead_ratio'] == pytest.approx(10 / 108)
+    assert summary['utilisation'] == pytest.approx(98 / 144)
+    assert summary['phases']['execute'] == {'tasks': 1, 'queue_wait': 36.0, 'launch_latency': 4.0,
+                                            'runtime': 32.0, 'core_hours': 64 / 3600}
+
+    assert summarise_tasks_stats(stats.iloc[:0])['tasks'] == 0
+
+
+def test_tasks_stats_sample_oriented():
+    start_time = time.time()
+    print("Running SAMPLE_ORIENTED scheme with the runtime statistics")
+
+    my_campaign = uq.Campaign(name='cooling', work_dir=tmpdir)
+
+    (params, encoder, decoder, cooling_sampler, cooling_stats) = setup_cooling_app()
+
+    my_campaign.add_app(name="cooling",
+                        params=params,
+                        encoder=encoder,
+                        decoder=decoder)
+    my_campaign.set_sampler(cooling_sampler)
+    my_campaign.draw_samples()
+
+    qcgpjexec = Executor(my_campaign)
+    qcgpjexec.create_manager(resources="4", enable_rt_stats=True)
+
+    qcgpjexec.add_task(Task(
+        TaskType.ENCODING,
+        TaskRequirements(cores=1)
+    ))
+
+    qcgpjexec.add_task(Task(
+        TaskType.EXECUTION,
+        TaskRequirements(cores=1),
+        application='python3 ' + jobdir + "/" + APPLICATION + " " + ENCODED_FILENAME
+    ))
+
+    qcgpjexec.run(processing_scheme=ProcessingScheme.SAMPLE_ORIENTED)
+
+    qcgpjexec.terminate_manager()
+
+    runs = my_campaign.campaign_db.get_num_runs()
+    csv_file = os.path.join(my_campaign.campaign_dir, 'tasks_stats.csv')
+    stats = qcgpjexec.get_tasks_stats(output_file=csv_file)
+
+    assert stats['phase'].value_counts().to_dict() == {'encode': runs, 'execute': runs}
+    assert (stats['state'] == 'SUCCEED').all()
+    assert (stats['cores'] == 1).all()
+    assert (stats['launch_latency'] >= 0).all() and (stats['runtime'] > 0).all()
+    assert len(pd.read_csv(csv_file)) == runs * 2
+
+    if parquet_supported():
+        parquet_file = os.path.join(my_campaign.campaign_dir, 'tasks_stats.parquet')
+        qcgpjexec.get_tasks_stats(output_file=parquet_file)
+        assert pd.read_parquet(parquet_file)['task'].tolist() == stats['task'].tolist()
+
+    summary = qcgpjexec.get_tasks_stats_summary()
+    assert summary['processing_scheme'] == 'SAMPLE_ORIENTED'
+    assert summary['tasks'] == runs * 2
+    assert set(summary['phases']) == {'encode', 'execute'}
+    assert 0 < summary['utilisation'] <= 1
+
+    end_time = time.time()
+    print('>>>>> elapsed time = ', end_time - start_time)
+
+
+if __name__ == "__main__":
+    test_get_phase()
+    test_summarise_tasks_stats()
+    test_tasks_stats_sample_oriented()